@@ -0,0 +1,36 @@
+"""store input embeddings on user_interactions
+
+Revision ID: interaction_embeddings_001
+Revises: feedback_rollups_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'interaction_embeddings_001'
+down_revision = 'feedback_rollups_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Little-endian float16 bytes (app.utils.embeddings) and the model that
+    # produced them. Nullable: older rows and untracked paths have no vector.
+    # Adding nullable columns is metadata-only and reaches every partition.
+    op.execute("""
+        ALTER TABLE user_interactions
+            ADD COLUMN IF NOT EXISTS input_embedding BYTEA,
+            ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(100)
+    """)
+    # Half floats don't compress; skip the pglz attempt when the value is toasted
+    op.execute("ALTER TABLE user_interactions ALTER COLUMN input_embedding SET STORAGE EXTERNAL")
+
+
+def downgrade():
+    op.execute("""
+        ALTER TABLE user_interactions
+            DROP COLUMN IF EXISTS embedding_model,
+            DROP COLUMN IF EXISTS input_embedding
+    """)
@@ -0,0 +1,63 @@
+"""durable queue for long-running admin jobs
+
+Revision ID: admin_jobs_001
+Revises: learning_metrics_dedup_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'admin_jobs_001'
+down_revision = 'learning_metrics_dedup_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Jobs for app.services.job_queue. Workers claim one row at a time with
+    # FOR UPDATE SKIP LOCKED; locked_at is the claim time, so a running job
+    # whose worker died is claimed again once its lease runs out.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS admin_jobs (
+            id UUID PRIMARY KEY DEFAULT uuid_generate_v7(),
+            job_type VARCHAR(50) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            payload JSONB NOT NULL DEFAULT '{}',
+            progress JSONB,
+            result JSONB,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+            locked_by VARCHAR(100),
+            locked_at TIMESTAMP,
+            created_by VARCHAR(100),
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            finished_at TIMESTAMP,
+            CONSTRAINT admin_jobs_status_check
+                CHECK (status IN ('queued', 'running', 'succeeded', 'failed'))
+        )
+    """)
+    
+    # Claim scans: due queued jobs, and running jobs by lease age
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_admin_jobs_queued
+        ON admin_jobs (run_after) WHERE status = 'queued'
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_admin_jobs_running
+        ON admin_jobs (locked_at) WHERE status = 'running'
+    """)
+    
+    # Retention purge of finished jobs
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_admin_jobs_finished
+        ON admin_jobs (finished_at) WHERE status IN ('succeeded', 'failed')
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS admin_jobs")
@@ -0,0 +1,62 @@
+"""category co-occurrence counts from feedback
+
+Revision ID: category_cooccurrence_001
+Revises: interaction_embeddings_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'category_cooccurrence_001'
+down_revision = 'interaction_embeddings_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sparse (COO) storage of the matrices in app.models.category_cooccurrence:
+    # one row per ordered category pair with a non-zero count, upserted
+    # additively on every feedback write. Diagonal rows hold per-category totals.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS category_cooccurrence (
+            category_a INTEGER NOT NULL,
+            category_b INTEGER NOT NULL,
+            co_accepts INTEGER NOT NULL DEFAULT 0,
+            co_rejects INTEGER NOT NULL DEFAULT 0,
+            substitutions INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (category_a, category_b)
+        )
+    """)
+    
+    # Backfill from existing feedback, latest verdict per category per interaction
+    op.execute("""
+        WITH verdicts AS (
+            SELECT DISTINCT ON (interaction_id, category_id)
+                interaction_id,
+                category_id,
+                feedback_type IN ('accept', 'maybe') AS accepted
+            FROM category_feedback
+            WHERE interaction_id IS NOT NULL
+              AND feedback_type IN ('accept', 'maybe', 'reject', 'irrelevant')
+            ORDER BY interaction_id, category_id, created_at DESC
+        )
+        INSERT INTO category_cooccurrence (category_a, category_b, co_accepts, co_rejects, substitutions)
+        SELECT
+            a.category_id,
+            b.category_id,
+            COUNT(*) FILTER (WHERE a.accepted AND b.accepted),
+            COUNT(*) FILTER (WHERE NOT a.accepted AND NOT b.accepted),
+            COUNT(*) FILTER (WHERE NOT a.accepted AND b.accepted)
+        FROM verdicts a
+        JOIN verdicts b ON a.interaction_id = b.interaction_id
+        GROUP BY a.category_id, b.category_id
+        HAVING a.category_id = b.category_id OR bool_or(b.accepted OR NOT a.accepted)
+        ON CONFLICT (category_a, category_b) DO NOTHING
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS category_cooccurrence")
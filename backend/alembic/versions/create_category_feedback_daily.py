@@ -0,0 +1,63 @@
+"""create category feedback daily counters
+
+Revision ID: feedback_daily_001
+Revises: openai_usage_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'feedback_daily_001'
+down_revision = 'openai_usage_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per category per day, upserted on every feedback write.
+    # Any N-day metric becomes a sum over at most N rows per category.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS category_feedback_daily (
+            category_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            accept_count INTEGER NOT NULL DEFAULT 0,
+            reject_count INTEGER NOT NULL DEFAULT 0,
+            maybe_count INTEGER NOT NULL DEFAULT 0,
+            irrelevant_count INTEGER NOT NULL DEFAULT 0,
+            confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            success_confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (category_id, day)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_category_feedback_daily_day ON category_feedback_daily(day)")
+    
+    # Backfill counters from existing feedback
+    op.execute("""
+        INSERT INTO category_feedback_daily
+        (category_id, day, accept_count, reject_count, maybe_count, irrelevant_count,
+         confidence_sum, success_confidence_sum, rating_sum, rating_count)
+        SELECT
+            category_id,
+            DATE(created_at) as day,
+            COUNT(*) FILTER (WHERE feedback_type = 'accept'),
+            COUNT(*) FILTER (WHERE feedback_type = 'reject'),
+            COUNT(*) FILTER (WHERE feedback_type = 'maybe'),
+            COUNT(*) FILTER (WHERE feedback_type = 'irrelevant'),
+            COALESCE(SUM(confidence_score), 0),
+            COALESCE(SUM(confidence_score) FILTER (WHERE feedback_type IN ('accept', 'maybe')), 0),
+            COALESCE(SUM(user_rating), 0),
+            COUNT(user_rating)
+        FROM category_feedback
+        GROUP BY category_id, DATE(created_at)
+        ON CONFLICT (category_id, day) DO NOTHING
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_category_feedback_daily_day")
+    op.execute("DROP TABLE IF EXISTS category_feedback_daily")
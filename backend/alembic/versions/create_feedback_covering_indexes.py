@@ -0,0 +1,75 @@
+"""feedback path composite and covering indexes
+
+Revision ID: feedback_indexes_001
+Revises: uuid7_defaults_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'feedback_indexes_001'
+down_revision = 'uuid7_defaults_001'
+branch_labels = None
+depends_on = None
+
+
+# name -> definition. Each index is shaped around specific queries; the
+# plan regression suite (tests/test_query_plans.py) checks they are used.
+FEEDBACK_INDEXES = {
+    # Per-category window queries: category insights details/metrics/recent
+    # matches. INCLUDE makes the metrics aggregate index-only.
+    'idx_category_feedback_category_created': """
+        category_feedback (category_id, created_at DESC)
+        INCLUDE (feedback_type, user_rating, confidence_score, similarity_score, interaction_id)
+    """,
+    # Rejection analysis only ever reads reject/irrelevant rows
+    'idx_category_feedback_rejections': """
+        category_feedback (category_id, created_at)
+        INCLUDE (category_name, confidence_score, feedback_reason, interaction_id)
+        WHERE feedback_type IN ('reject', 'irrelevant')
+    """,
+    # All-category time slices: underperforming categories, 24h health count
+    'idx_category_feedback_created_covering': """
+        category_feedback (created_at)
+        INCLUDE (category_id, category_name, feedback_type, user_rating, confidence_score)
+    """,
+    # interaction -> feedback join probes (analytics, low-confidence scan)
+    'idx_category_feedback_interaction_covering': """
+        category_feedback (interaction_id)
+        INCLUDE (category_id, category_name, feedback_type, confidence_score)
+    """,
+    # session -> interactions join in the analytics overview
+    'idx_user_interactions_session_created': """
+        user_interactions (session_id, created_at)
+        INCLUDE (processing_time_ms)
+    """,
+}
+
+# Single-column indexes made redundant by the prefixes above
+SUPERSEDED_INDEXES = {
+    'idx_category_feedback_category_id': "category_feedback (category_id)",
+    'idx_category_feedback_created_at': "category_feedback (created_at)",
+    'idx_category_feedback_interaction_id': "category_feedback (interaction_id)",
+    'idx_user_interactions_session_id': "user_interactions (session_id)",
+}
+
+
+def upgrade():
+    # Build without blocking writes to the feedback tables
+    with op.get_context().autocommit_block():
+        for name, definition in FEEDBACK_INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+        
+        for name in SUPERSEDED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in SUPERSEDED_INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+        
+        for name in FEEDBACK_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
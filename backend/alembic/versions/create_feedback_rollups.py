@@ -0,0 +1,110 @@
+"""daily rollups behind the feedback analytics summary
+
+Revision ID: feedback_rollups_001
+Revises: partition_events_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'feedback_rollups_001'
+down_revision = 'partition_events_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Replaces the daily_feedback_trends view: one row per day, recomputed
+    # for recent days only by app.services.analytics_rollup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_daily_rollup (
+            day DATE PRIMARY KEY,
+            total_feedback INTEGER NOT NULL DEFAULT 0,
+            accepts INTEGER NOT NULL DEFAULT 0,
+            rejects INTEGER NOT NULL DEFAULT 0,
+            maybes INTEGER NOT NULL DEFAULT 0,
+            irrelevant INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            unique_interactions INTEGER NOT NULL DEFAULT 0,
+            refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+    
+    # Replaces the session_activity_summary view (sessions by creation day)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS session_activity_daily (
+            day DATE PRIMARY KEY,
+            unique_sessions INTEGER NOT NULL DEFAULT 0,
+            total_interactions INTEGER NOT NULL DEFAULT 0,
+            session_interactions_sum BIGINT NOT NULL DEFAULT 0,
+            processing_time_sum BIGINT NOT NULL DEFAULT 0,
+            processing_time_count INTEGER NOT NULL DEFAULT 0,
+            refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+    
+    # High-water mark of the last refresh, per rollup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS analytics_rollup_state (
+            rollup VARCHAR(50) PRIMARY KEY,
+            refreshed_through TIMESTAMP NOT NULL
+        )
+    """)
+    
+    # Backfill from existing rows and mark everything up to now as refreshed
+    op.execute("""
+        INSERT INTO feedback_daily_rollup
+        (day, total_feedback, accepts, rejects, maybes, irrelevant, rating_sum, rating_count, unique_interactions)
+        SELECT
+            DATE(created_at),
+            COUNT(*),
+            COUNT(*) FILTER (WHERE feedback_type = 'accept'),
+            COUNT(*) FILTER (WHERE feedback_type = 'reject'),
+            COUNT(*) FILTER (WHERE feedback_type = 'maybe'),
+            COUNT(*) FILTER (WHERE feedback_type = 'irrelevant'),
+            COALESCE(SUM(user_rating), 0),
+            COUNT(user_rating),
+            COUNT(DISTINCT interaction_id)
+        FROM category_feedback
+        WHERE created_at IS NOT NULL
+        GROUP BY DATE(created_at)
+        ON CONFLICT (day) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO session_activity_daily
+        (day, unique_sessions, total_interactions, session_interactions_sum,
+         processing_time_sum, processing_time_count)
+        SELECT
+            DATE(us.created_at),
+            COUNT(*),
+            COALESCE(SUM(ui.interactions), 0),
+            COALESCE(SUM(us.total_interactions), 0),
+            COALESCE(SUM(ui.processing_time_sum), 0),
+            COALESCE(SUM(ui.processing_time_count), 0)
+        FROM user_sessions us
+        LEFT JOIN (
+            SELECT session_id,
+                   COUNT(*) AS interactions,
+                   SUM(processing_time_ms) AS processing_time_sum,
+                   COUNT(processing_time_ms) AS processing_time_count
+            FROM user_interactions
+            GROUP BY session_id
+        ) ui ON ui.session_id = us.session_id
+        WHERE us.created_at IS NOT NULL
+        GROUP BY DATE(us.created_at)
+        ON CONFLICT (day) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO analytics_rollup_state (rollup, refreshed_through)
+        VALUES ('feedback_daily_rollup', NOW()), ('session_activity_daily', NOW())
+        ON CONFLICT (rollup) DO NOTHING
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS analytics_rollup_state")
+    op.execute("DROP TABLE IF EXISTS session_activity_daily")
+    op.execute("DROP TABLE IF EXISTS feedback_daily_rollup")
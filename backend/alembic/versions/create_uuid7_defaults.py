@@ -0,0 +1,50 @@
+"""time-ordered uuid defaults for feedback tables
+
+Revision ID: uuid7_defaults_001
+Revises: feedback_daily_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'uuid7_defaults_001'
+down_revision = 'feedback_daily_001'
+branch_labels = None
+depends_on = None
+
+
+UUID7_TABLES = ['user_interactions', 'category_feedback', 'learning_metrics']
+
+
+def upgrade():
+    # UUIDv7 generator for rows inserted without an application-assigned id.
+    # Same layout as app.utils.ids.uuid7: 48-bit millisecond timestamp, then
+    # the random bits of a v4 UUID with the version nibble set to 7.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+        DECLARE
+            uuid_bytes bytea;
+        BEGIN
+            uuid_bytes := uuid_send(gen_random_uuid());
+            uuid_bytes := overlay(
+                uuid_bytes
+                placing substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                FROM 1 FOR 6
+            );
+            uuid_bytes := set_byte(uuid_bytes, 6, (get_byte(uuid_bytes, 6) & 15) | 112);
+            RETURN encode(uuid_bytes, 'hex')::uuid;
+        END
+        $$ LANGUAGE plpgsql VOLATILE
+    """)
+    
+    # Existing rows keep their keys; new rows append to the right of the index
+    for table in UUID7_TABLES:
+        op.execute(f"ALTER TABLE IF EXISTS {table} ALTER COLUMN id SET DEFAULT uuid_generate_v7()")
+
+
+def downgrade():
+    for table in UUID7_TABLES:
+        op.execute(f"ALTER TABLE IF EXISTS {table} ALTER COLUMN id SET DEFAULT gen_random_uuid()")
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
@@ -0,0 +1,195 @@
+"""one learning_metrics row per category, metric and day
+
+Revision ID: learning_metrics_dedup_001
+Revises: category_cooccurrence_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'learning_metrics_dedup_001'
+down_revision = 'category_cooccurrence_001'
+branch_labels = None
+depends_on = None
+
+
+MONTHS_AHEAD = 3
+
+# Moves a monthly partitioned table, its partitions and their key constraints
+# aside under a new prefix, so a replacement can be built under the original names.
+RENAME_FUNCTION = """
+CREATE OR REPLACE FUNCTION rename_partitioned_table(p_table text, p_new_name text) RETURNS void AS $$
+DECLARE
+    relations oid[];
+    rel record;
+BEGIN
+    SELECT array_agg(oid) INTO relations
+      FROM pg_class
+     WHERE oid = p_table::regclass
+        OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = p_table::regclass);
+    
+    -- Primary key / unique constraints (and their indexes) first, then the tables
+    FOR rel IN
+        SELECT conrelid::regclass::text AS relname, conname AS name
+          FROM pg_constraint
+         WHERE conrelid = ANY (relations) AND contype IN ('p', 'u') AND conname LIKE p_table || '%'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %s RENAME CONSTRAINT %I TO %I',
+            rel.relname, rel.name, p_new_name || substr(rel.name, length(p_table) + 1)
+        );
+    END LOOP;
+    
+    FOR rel IN
+        SELECT relname AS name FROM pg_class WHERE oid = ANY (relations) AND relname LIKE p_table || '%'
+    LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', rel.name, p_new_name || substr(rel.name, length(p_table) + 1));
+    END LOOP;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Copies the legacy rows one calendar month at a time (one legacy partition
+# per statement), keeping the latest row of each (category, metric, period, day)
+COMPACT_FUNCTION = """
+CREATE OR REPLACE FUNCTION compact_learning_metrics(p_source text) RETURNS void AS $$
+DECLARE
+    month_start date;
+    last_month date;
+BEGIN
+    EXECUTE format(
+        'SELECT date_trunc(''month'', min(calculated_at))::date, date_trunc(''month'', max(calculated_at))::date FROM %I',
+        p_source
+    ) INTO month_start, last_month;
+    
+    WHILE month_start <= last_month LOOP
+        EXECUTE format($q$
+            INSERT INTO learning_metrics
+            (id, category_id, metric_type, metric_value, sample_size, time_period, day, calculated_at)
+            SELECT DISTINCT ON (category_id, metric_type, time_period, calculated_at::date)
+                id, category_id, metric_type, metric_value, sample_size, time_period,
+                calculated_at::date, calculated_at
+            FROM %I
+            WHERE calculated_at >= %L AND calculated_at < %L
+            ORDER BY category_id, metric_type, time_period, calculated_at::date, calculated_at DESC
+        $q$, p_source, month_start, (month_start + interval '1 month')::date);
+        
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    # A unique key on a partitioned table must contain the partition column,
+    # so learning_metrics is rebuilt partitioned by the new `day` column
+    # (still monthly ranges, maintained by app.services.partition_maintenance).
+    op.execute(RENAME_FUNCTION)
+    op.execute(COMPACT_FUNCTION)
+    
+    op.execute("DROP INDEX IF EXISTS idx_learning_metrics_category")
+    op.execute("DROP INDEX IF EXISTS idx_learning_metrics_type")
+    op.execute("DROP INDEX IF EXISTS idx_learning_metrics_calculated")
+    op.execute("SELECT rename_partitioned_table('learning_metrics', 'learning_metrics_legacy')")
+    
+    op.execute("""
+        CREATE TABLE learning_metrics (
+            LIKE learning_metrics_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+            day DATE NOT NULL DEFAULT CURRENT_DATE
+        ) PARTITION BY RANGE (day)
+    """)
+    
+    op.execute(f"""
+        DO $$
+        DECLARE
+            partition_month date;
+            last_month date := (date_trunc('month', now()) + interval '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(calculated_at), now()))::date
+              INTO partition_month
+              FROM learning_metrics_legacy;
+            
+            WHILE partition_month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF learning_metrics FOR VALUES FROM (%L) TO (%L)',
+                    'learning_metrics_p' || to_char(partition_month, 'YYYYMM'),
+                    partition_month,
+                    (partition_month + interval '1 month')::date
+                );
+                partition_month := (partition_month + interval '1 month')::date;
+            END LOOP;
+        END
+        $$
+    """)
+    op.execute("CREATE TABLE learning_metrics_default PARTITION OF learning_metrics DEFAULT")
+    
+    op.execute("SELECT compact_learning_metrics('learning_metrics_legacy')")
+    
+    op.execute("ALTER TABLE learning_metrics ADD PRIMARY KEY (id, day)")
+    # The conflict target of the metric upsert; its (category_id, ...) prefix
+    # also serves the per-category lookups the old single-column indexes did
+    op.execute("""
+        ALTER TABLE learning_metrics
+        ADD CONSTRAINT uq_learning_metrics_category_metric_day
+        UNIQUE (category_id, metric_type, time_period, day)
+    """)
+    
+    op.execute("DROP TABLE learning_metrics_legacy")
+    op.execute("DROP FUNCTION compact_learning_metrics(text)")
+    op.execute("DROP FUNCTION rename_partitioned_table(text, text)")
+
+
+def downgrade():
+    # Compacted duplicates are not restored; the table goes back to being
+    # partitioned by calculated_at without the unique key.
+    op.execute(RENAME_FUNCTION)
+    op.execute("SELECT rename_partitioned_table('learning_metrics', 'learning_metrics_dedup')")
+    
+    op.execute("""
+        CREATE TABLE learning_metrics (
+            LIKE learning_metrics_dedup INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+        ) PARTITION BY RANGE (calculated_at)
+    """)
+    op.execute("ALTER TABLE learning_metrics DROP COLUMN day")
+    
+    op.execute(f"""
+        DO $$
+        DECLARE
+            partition_month date;
+            last_month date := (date_trunc('month', now()) + interval '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(calculated_at), now()))::date
+              INTO partition_month
+              FROM learning_metrics_dedup;
+            
+            WHILE partition_month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF learning_metrics FOR VALUES FROM (%L) TO (%L)',
+                    'learning_metrics_p' || to_char(partition_month, 'YYYYMM'),
+                    partition_month,
+                    (partition_month + interval '1 month')::date
+                );
+                partition_month := (partition_month + interval '1 month')::date;
+            END LOOP;
+        END
+        $$
+    """)
+    op.execute("CREATE TABLE learning_metrics_default PARTITION OF learning_metrics DEFAULT")
+    
+    op.execute("""
+        INSERT INTO learning_metrics
+        (id, category_id, metric_type, metric_value, sample_size, time_period, calculated_at)
+        SELECT id, category_id, metric_type, metric_value, sample_size, time_period, calculated_at
+        FROM learning_metrics_dedup
+    """)
+    
+    op.execute("ALTER TABLE learning_metrics ADD PRIMARY KEY (id, calculated_at)")
+    op.execute("CREATE INDEX idx_learning_metrics_category ON learning_metrics (category_id)")
+    op.execute("CREATE INDEX idx_learning_metrics_type ON learning_metrics (metric_type)")
+    op.execute("CREATE INDEX idx_learning_metrics_calculated ON learning_metrics (calculated_at)")
+    
+    op.execute("DROP TABLE learning_metrics_dedup")
+    op.execute("DROP FUNCTION rename_partitioned_table(text, text)")
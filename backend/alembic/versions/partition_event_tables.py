@@ -0,0 +1,218 @@
+"""monthly range partitioning for event tables
+
+Revision ID: partition_events_001
+Revises: feedback_indexes_001
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'partition_events_001'
+down_revision = 'feedback_indexes_001'
+branch_labels = None
+depends_on = None
+
+
+# table -> (partition column, primary key). Partitioned primary keys must
+# include the partition column. user_sessions stays unpartitioned: its
+# ON CONFLICT (session_id) upsert needs a global unique key, so expired
+# sessions are pruned in batches by app.services.partition_maintenance.
+PARTITIONED_TABLES = {
+    'user_interactions': ('created_at', 'id, created_at'),
+    'category_feedback': ('created_at', 'id, created_at'),
+    'learning_metrics': ('calculated_at', 'id, calculated_at'),
+    'openai_usage': ('timestamp', 'id, "timestamp"'),
+}
+
+MONTHS_AHEAD = 3
+
+# Replaces user_interactions' foreign key(s) to user_sessions with one using
+# the given ON DELETE action
+SESSION_FOREIGN_KEY = """
+DO $$
+DECLARE
+    fk_name text;
+BEGIN
+    IF to_regclass('user_interactions') IS NULL OR to_regclass('user_sessions') IS NULL THEN
+        RETURN;
+    END IF;
+    
+    FOR fk_name IN
+        SELECT conname FROM pg_constraint
+         WHERE conrelid = 'user_interactions'::regclass
+           AND confrelid = 'user_sessions'::regclass
+           AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE user_interactions DROP CONSTRAINT %I', fk_name);
+    END LOOP;
+    
+    ALTER TABLE user_interactions
+        ADD CONSTRAINT user_interactions_session_id_fkey
+        FOREIGN KEY (session_id) REFERENCES user_sessions(session_id) ON DELETE {action};
+END
+$$
+"""
+
+# Rebuilds a table in place, either as a monthly range-partitioned table or
+# (p_partition_column NULL) as a plain one. Indexes, outgoing foreign keys to
+# unpartitioned tables, serial sequences and dependent views are carried over.
+REBUILD_FUNCTION = """
+CREATE OR REPLACE FUNCTION rebuild_event_table(
+    p_table text,
+    p_partition_column text,
+    p_primary_key text,
+    p_months_ahead int DEFAULT 3
+) RETURNS void AS $$
+DECLARE
+    legacy text := p_table || '_rebuild_old';
+    legacy_pkey text;
+    index_defs text[];
+    fk_defs text[];
+    view_defs text[];
+    column_name text;
+    sequence_name text;
+    partition_month date;
+    last_month date;
+    def text;
+BEGIN
+    IF to_regclass(p_table) IS NULL THEN
+        RETURN;
+    END IF;
+    
+    -- Capture everything that hangs off the table under its original name
+    SELECT coalesce(array_agg(format('CREATE VIEW %s AS %s', v.oid::regclass, pg_get_viewdef(v.oid)) ORDER BY v.oid), '{}')
+      INTO view_defs
+      FROM pg_class v
+     WHERE v.relkind = 'v'
+       AND v.oid IN (
+           SELECT r.ev_class
+             FROM pg_depend d
+             JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.refobjid = p_table::regclass
+              AND r.ev_class <> p_table::regclass
+       );
+    
+    SELECT coalesce(array_agg(replace(pg_get_indexdef(i.indexrelid), ' ON ONLY ', ' ON ')), '{}')
+      INTO index_defs
+      FROM pg_index i
+     WHERE i.indrelid = p_table::regclass
+       AND NOT i.indisprimary;
+    
+    SELECT coalesce(array_agg(format('ALTER TABLE %I ADD CONSTRAINT %I %s', p_table, c.conname, pg_get_constraintdef(c.oid))), '{}')
+      INTO fk_defs
+      FROM pg_constraint c
+     WHERE c.conrelid = p_table::regclass
+       AND c.contype = 'f'
+       AND NOT EXISTS (SELECT 1 FROM pg_partitioned_table pt WHERE pt.partrelid = c.confrelid);
+    
+    SELECT conname INTO legacy_pkey
+      FROM pg_constraint
+     WHERE conrelid = p_table::regclass AND contype = 'p';
+    
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_table, legacy);
+    IF legacy_pkey IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I', legacy, legacy_pkey, legacy || '_pkey');
+    END IF;
+    
+    IF p_partition_column IS NULL THEN
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', p_table, legacy);
+    ELSE
+        -- The partition key is part of the primary key, so it can't be NULL.
+        -- Backfill legacy rows first; LIKE then copies the NOT NULL.
+        EXECUTE format('UPDATE %I SET %I = now() WHERE %I IS NULL', legacy, p_partition_column, p_partition_column);
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', legacy, p_partition_column);
+        
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (%I)',
+            p_table, legacy, p_partition_column
+        );
+        
+        EXECUTE format('SELECT date_trunc(''month'', coalesce(min(%I), now()))::date FROM %I', p_partition_column, legacy)
+           INTO partition_month;
+        last_month := (date_trunc('month', now()) + make_interval(months => p_months_ahead))::date;
+        
+        WHILE partition_month <= last_month LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                p_table || '_p' || to_char(partition_month, 'YYYYMM'),
+                p_table,
+                partition_month,
+                (partition_month + interval '1 month')::date
+            );
+            partition_month := (partition_month + interval '1 month')::date;
+        END LOOP;
+        
+        -- Catches rows outside the maintained range
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', p_table || '_default', p_table);
+    END IF;
+    
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', p_table, legacy);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (%s)', p_table, p_primary_key);
+    
+    -- Keep serial sequences alive when the old table is dropped
+    FOR column_name IN
+        SELECT attname FROM pg_attribute
+         WHERE attrelid = legacy::regclass AND attnum > 0 AND NOT attisdropped
+    LOOP
+        sequence_name := pg_get_serial_sequence(legacy, column_name);
+        IF sequence_name IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', sequence_name, p_table, column_name);
+        END IF;
+    END LOOP;
+    
+    -- Also drops views and inbound foreign keys that pointed at the old table
+    EXECUTE format('DROP TABLE %I CASCADE', legacy);
+    
+    FOREACH def IN ARRAY index_defs LOOP
+        EXECUTE def;
+    END LOOP;
+    FOREACH def IN ARRAY fk_defs LOOP
+        EXECUTE def;
+    END LOOP;
+    FOREACH def IN ARRAY view_defs LOOP
+        EXECUTE def;
+    END LOOP;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    op.execute(REBUILD_FUNCTION)
+    
+    # user_interactions goes first: dropping its old table also drops the
+    # category_feedback.interaction_id foreign key, which a partitioned
+    # user_interactions cannot back (id alone is no longer unique).
+    for table, (column, primary_key) in PARTITIONED_TABLES.items():
+        op.execute(f"SELECT rebuild_event_table('{table}', '{column}', '{primary_key}', {MONTHS_AHEAD})")
+    
+    op.execute("DROP FUNCTION rebuild_event_table(text, text, text, int)")
+    
+    # Expired sessions are pruned by partition maintenance; their remaining
+    # interactions keep their rows instead of being cascade-deleted one by one
+    op.execute(SESSION_FOREIGN_KEY.format(action="SET NULL"))
+
+
+def downgrade():
+    op.execute(SESSION_FOREIGN_KEY.format(action="CASCADE"))
+    op.execute(REBUILD_FUNCTION)
+    
+    for table in reversed(list(PARTITIONED_TABLES)):
+        op.execute(f"SELECT rebuild_event_table('{table}', NULL, 'id')")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN \"{PARTITIONED_TABLES[table][0]}\" DROP NOT NULL")
+    
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('category_feedback') IS NOT NULL AND to_regclass('user_interactions') IS NOT NULL THEN
+                ALTER TABLE category_feedback
+                    ADD CONSTRAINT category_feedback_interaction_id_fkey
+                    FOREIGN KEY (interaction_id) REFERENCES user_interactions(id) ON DELETE CASCADE;
+            END IF;
+        END
+        $$
+    """)
+    
+    op.execute("DROP FUNCTION rebuild_event_table(text, text, text, int)")
@@ -6,12 +6,14 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import FileResponse
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
+import asyncio
 import json
 import os
 from datetime import datetime, timedelta
 
 from ...models.category_matcher import get_category_matcher
 from ...data.category_loader import get_category_loader
+from ...services.metric_series import get_metric_series
 from ...utils.logging import structured_logger
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -33,6 +35,15 @@ class CategoryCreateRequest(BaseModel):
     keywords: List[str] = Field(..., description="Keywords for matching")
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
 
+class ShadowScoringRequest(BaseModel):
+    """Candidate matcher configuration to shadow live traffic with"""
+    label: Optional[str] = Field(None, description="Name shown in shadow scoring stats")
+    overrides: Dict[str, float] = Field(default_factory=dict, description="Matcher weights/thresholds to change")
+    categories: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Candidate catalog (default: snapshot of the live catalog); embedded on enable"
+    )
+    sample_rate: Optional[float] = Field(None, ge=0.0, le=1.0, description="Share of requests to shadow")
+
 class CategoryPerformanceResponse(BaseModel):
     """Category performance analytics"""
     category_id: int
@@ -122,6 +133,9 @@ async def get_category_performance(
         category_matcher = get_category_matcher()
         categories = category_matcher.categories
         
+        # Trend, last feedback and confidence for every category in two grouped queries
+        trends = await get_metric_series().category_trends(days=7)
+        
         performance_data = []
         
         for cat in categories:
@@ -129,8 +143,7 @@ async def get_category_performance(
             success_count = cat.get('success_count', 0)
             success_rate = success_count / total_usage if total_usage > 0 else 0
             
-            # Calculate trend (placeholder - would need historical data)
-            trend = "stable"  # TODO: Implement trend calculation
+            trend = trends.get(cat['id'], {})
             
             performance_data.append(CategoryPerformanceResponse(
                 category_id=cat['id'],
@@ -138,9 +151,9 @@ async def get_category_performance(
                 success_rate=success_rate,
                 total_usage=total_usage,
                 success_count=success_count,
-                trend_7_days=trend,
-                last_used=None,  # TODO: Track last usage timestamp
-                avg_confidence_score=0.75  # TODO: Track actual confidence scores
+                trend_7_days=trend.get("trend", "stable"),
+                last_used=trend.get("last_used"),
+                avg_confidence_score=trend.get("avg_confidence", 0.0)
             ))
         
         # Sort results
@@ -158,6 +171,32 @@ async def get_category_performance(
         logger.error(f"Failed to get category performance: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Performance data failed: {str(e)}")
 
+@router.get("/categories/timeseries")
+async def get_category_timeseries(
+    admin_auth: bool = Depends(verify_admin_token),
+    metric: str = Query("success_rate", description="Metric: success_rate, feedback_count, avg_confidence, avg_rating"),
+    bucket: str = Query("day", description="Bucket size: hour, day, week"),
+    days: int = Query(30, ge=1, le=365, description="Number of days of history"),
+    source: str = Query("feedback", description="Source: feedback (live counters) or learning_metrics (daily snapshots)"),
+    category_ids: Optional[str] = Query(None, description="Comma-separated category ids (default: all)")
+):
+    """Downsampled per-category series with a fitted trend slope (metric units per day)"""
+    try:
+        ids = [int(part) for part in category_ids.split(",") if part.strip()] if category_ids else None
+        series = get_metric_series()
+        
+        if source == "feedback":
+            return await series.feedback_series(metric, bucket, days, ids)
+        if source == "learning_metrics":
+            return await series.learning_metric_series(metric, bucket, days, ids)
+        raise ValueError("source must be feedback or learning_metrics")
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to get category time series: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Time series failed: {str(e)}")
+
 @router.get("/dashboard")
 async def admin_dashboard():
     """Serve the admin dashboard HTML page"""
@@ -346,3 +385,60 @@ async def add_keywords_to_category(
     except Exception as e:
         logger.error(f"Failed to add keywords to category {category_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Keyword addition failed: {str(e)}")
+
+@router.post("/maintenance/partitions")
+async def run_partition_maintenance(admin_auth: bool = Depends(verify_admin_token)):
+    """Create upcoming event partitions and expire ones past retention now"""
+    try:
+        from ...services.partition_maintenance import get_partition_maintenance
+        
+        report = await get_partition_maintenance().run_once()
+        
+        return {"status": "success", **report}
+    
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Partition maintenance failed: {str(e)}")
+
+@router.get("/shadow-scoring")
+async def get_shadow_scoring(admin_auth: bool = Depends(verify_admin_token)):
+    """Overlap@k, top-1 agreement and latency deltas of the shadowed candidate"""
+    from ...services.shadow_scoring import get_shadow_scorer
+    
+    return get_shadow_scorer().get_stats()
+
+@router.put("/shadow-scoring")
+async def enable_shadow_scoring(
+    shadow_request: ShadowScoringRequest,
+    admin_auth: bool = Depends(verify_admin_token)
+):
+    """Start shadowing live find-matches traffic with a candidate configuration (resets results)"""
+    try:
+        from ...services.replay_engine import configured_matcher
+        from ...services.shadow_scoring import get_shadow_scorer
+        
+        # Building the candidate embeds its categories; keep that off the event loop
+        candidate = await asyncio.to_thread(
+            configured_matcher, get_category_matcher(), shadow_request.overrides, shadow_request.categories
+        )
+        shadow_scorer = get_shadow_scorer()
+        shadow_scorer.enable(candidate, shadow_request.label, shadow_request.sample_rate)
+        
+        return {"status": "success", **shadow_scorer.get_stats()}
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to enable shadow scoring: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Shadow scoring failed: {str(e)}")
+
+@router.delete("/shadow-scoring")
+async def disable_shadow_scoring(admin_auth: bool = Depends(verify_admin_token)):
+    """Stop shadowing; the final results are returned"""
+    from ...services.shadow_scoring import get_shadow_scorer
+    
+    shadow_scorer = get_shadow_scorer()
+    stats = shadow_scorer.get_stats()
+    shadow_scorer.disable()
+    
+    return {"status": "success", **stats}
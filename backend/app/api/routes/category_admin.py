@@ -6,17 +6,21 @@ Now uses PostgreSQL database instead of JSON file
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Awaitable, Callable, Tuple
+import asyncio
 import json
 import secrets
 from pathlib import Path
-from openai import OpenAI
 from datetime import datetime
 
 from ...config import settings
 from ...utils.logging import structured_logger
 from ...db.database import database
 from ...models.category_matcher import get_category_matcher
+from ...services.openai_client import get_openai_client
+from ...services.keyword_enhancement import ProgressCallback, get_bulk_keyword_enhancer, request_new_keywords
+from ...services.job_queue import PermanentJobError, get_job_queue
+from ...services.llm_cache import catalog_version, get_llm_response_cache
 
 logger = structured_logger
 router = APIRouter(prefix="/category-admin", tags=["category-admin"])
@@ -96,12 +100,17 @@ def verify_admin(credentials: HTTPBasicCredentials = Depends(security)):
         )
     return user.username
 
+# Model and temperature of the category generation and transform prompts
+ADMIN_LLM_MODEL = "gpt-4o"
+ADMIN_LLM_TEMPERATURE = 0.3
+
 # Keep JSON file path for backward compatibility / export
 CATEGORIES_FILE = Path(__file__).parent.parent.parent / "data" / "political_categories.json"
 
 
 class CategoryRequest(BaseModel):
     description: str
+    bypass_cache: bool = False  # Force a fresh GPT response
 
 
 class SimilarityWarning(BaseModel):
@@ -118,15 +127,22 @@ class CategoryPreview(BaseModel):
     political_spectrum: str
     policy_areas: List[str]
     similarity_warnings: List[SimilarityWarning]
+    cached: bool = False
 
 
 class EnhanceRequest(BaseModel):
     additional_context: str
 
 
+class BulkEnhanceRequest(BaseModel):
+    additional_context: str
+    category_ids: Optional[List[int]] = None  # All active categories when omitted
+
+
 class TransformRequest(BaseModel):
     transform_instructions: str
     source_category_ids: List[int]  # Can be one (split) or multiple (merge)
+    bypass_cache: bool = False  # Force a fresh GPT response
 
 
 async def load_categories(sort_by: str = "created_at", sort_order: str = "desc"):
@@ -211,6 +227,60 @@ async def save_category(category_data: dict, created_by: str = "ai_admin"):
     return result["id"]
 
 
+async def complete_admin_prompt(
+    client,
+    request_key: str,
+    categories: List[dict],
+    build_prompt: Callable[[], Awaitable[str]],
+    bypass_cache: bool = False
+) -> Tuple[dict, bool]:
+    """Parsed GPT-4o JSON response for an admin request, reused while the catalog is unchanged
+    
+    The cache is keyed on the request inputs (request_key) and the catalog
+    version, and the prompt is only built on a miss, so a hit skips the
+    similarity prefilter's embedding call too.
+    
+    Returns (result, whether it came from the response cache).
+    """
+    async def compute():
+        prompt = await build_prompt()
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
+            model=ADMIN_LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            temperature=ADMIN_LLM_TEMPERATURE  # Lower temp for consistency
+        )
+        return json.loads(response.choices[0].message.content)
+    
+    return await get_llm_response_cache().get_or_compute(
+        ADMIN_LLM_MODEL, ADMIN_LLM_TEMPERATURE, request_key, catalog_version(categories), compute, bypass=bypass_cache
+    )
+
+
+async def find_similar_categories(text: str, categories: List[dict], exclude_ids: Optional[List[int]] = None) -> List[dict]:
+    """Categories most similar to a proposal, for the redundancy check in admin prompts
+    
+    Ranks the whole in-memory catalog by embedding similarity to the text and
+    returns the top ones from `categories` (the fresh database rows). Falls
+    back to the first categories if the matcher has no catalog loaded.
+    """
+    top_n = settings.category_admin_similar_categories
+    by_id = {cat["id"]: cat for cat in categories}
+    
+    try:
+        # Rank a few extra in case the matcher still holds since-removed categories
+        similar = await asyncio.to_thread(
+            get_category_matcher().find_similar_categories, text, top_n + 5, exclude_ids
+        )
+        ranked = [by_id[category["id"]] for category, _ in similar if category["id"] in by_id]
+        return ranked[:top_n]
+    except Exception as e:
+        logger.warning(f"Similarity prefilter unavailable, using catalog sample: {str(e)}")
+        excluded = set(exclude_ids or [])
+        return [cat for cat in categories if cat["id"] not in excluded][:top_n]
+
+
 async def reload_category_matcher():
     """Reload all active categories from database into the category matcher
     
@@ -246,21 +316,23 @@ async def generate_category_preview(request: CategoryRequest, admin: str = Depen
                 detail="OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
             )
         
-        client = OpenAI(api_key=settings.openai_api_key)
+        client = get_openai_client()
         
         # Load existing categories
         data = await load_categories()
         existing_categories = data["categories"]
         
-        # Create context for AI - show existing categories
-        existing_summary = "\n".join([
-            f"- ID {cat['id']}: {cat['name']} - {cat['description'][:80]}..."
-            for cat in existing_categories[:15]  # Show sample
-        ])
-        
-        prompt = f"""You are a political category expert for a voter recommendation system. Generate a new political category definition.
+        async def build_prompt() -> str:
+            # Create context for AI - only the existing categories closest to the request
+            similar_categories = await find_similar_categories(request.description, existing_categories)
+            existing_summary = "\n".join([
+                f"- ID {cat['id']}: {cat['name']} - {cat['description'][:80]}..."
+                for cat in similar_categories
+            ])
+            
+            return f"""You are a political category expert for a voter recommendation system. Generate a new political category definition.
 
-EXISTING CATEGORIES (sample):
+MOST SIMILAR EXISTING CATEGORIES (out of {len(existing_categories)}):
 {existing_summary}
 
 USER REQUEST: "{request.description}"
@@ -302,15 +374,10 @@ Example good keywords for "Climate & Environment":
 ["climate change", "global warming", "renewable energy", "carbon emissions", "green energy", "climate denial", "climate hoax", "paris agreement", "solar", "wind", "electric vehicles"]
 """
         
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.3  # Lower temp for consistency
+        result, cached = await complete_admin_prompt(
+            client, f"generate_preview:{request.description}", existing_categories, build_prompt, request.bypass_cache
         )
         
-        result = json.loads(response.choices[0].message.content)
-        
         # Build similarity warnings
         warnings = []
         if result.get("is_redundant"):
@@ -331,7 +398,8 @@ Example good keywords for "Climate & Environment":
             type=category_data["type"],
             political_spectrum=category_data["political_spectrum"],
             policy_areas=category_data["policy_areas"],
-            similarity_warnings=warnings
+            similarity_warnings=warnings,
+            cached=cached
         )
         
     except Exception as e:
@@ -508,63 +576,24 @@ async def enhance_category_keywords(category_id: int, request: EnhanceRequest, a
                 detail="OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
             )
         
-        client = OpenAI(api_key=settings.openai_api_key)
-        
         if database is None:
             raise HTTPException(status_code=503, detail="Database not available")
         
         # Get category from database
-        query = "SELECT id, name, description, keywords FROM political_categories WHERE id = :category_id AND is_active = true"
-        category = await database.fetch_one(query, {"category_id": category_id})
+        enhancer = get_bulk_keyword_enhancer()
+        targets = await enhancer.load_targets([category_id])
         
-        if not category:
+        if not targets:
             raise HTTPException(status_code=404, detail=f"Category {category_id} not found")
         
-        current_keywords = category["keywords"] or []
-        
-        prompt = f"""Enhance this political category with better keywords based on additional context.
-
-CATEGORY: {category['name']}
-DESCRIPTION: {category['description']}
-CURRENT KEYWORDS: {', '.join(current_keywords)}
-
-ADDITIONAL CONTEXT: "{request.additional_context}"
-
-Generate 10-20 NEW keywords that:
-1. Aren't already in the current keyword list
-2. Capture how people actually talk about this issue
-3. Include both progressive and conservative terminology
-4. Cover common phrases, synonyms, and related concepts
-5. Consider the additional context provided
-
-Return JSON: {{"new_keywords": ["keyword1", "keyword2", ...]}}
-"""
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.3
-        )
+        category = targets[0]
         
-        result = json.loads(response.choices[0].message.content)
-        new_keywords = result["new_keywords"]
+        new_keywords = await asyncio.to_thread(request_new_keywords, category, request.additional_context)
         
-        # Add to category (avoid duplicates)
-        existing = set(k.lower() for k in current_keywords)
-        added_keywords = [k for k in new_keywords if k.lower() not in existing]
-        
-        # Update database
-        updated_keywords = current_keywords + added_keywords
-        update_query = """
-            UPDATE political_categories 
-            SET keywords = :keywords, updated_at = NOW(), updated_by = 'ai_admin'
-            WHERE id = :category_id
-        """
-        await database.execute(update_query, {
-            "keywords": json.dumps(updated_keywords),
-            "category_id": category_id
-        })
+        # Add to category (avoid duplicates), merged with the row's current keywords
+        written = (await enhancer.write_updates({category_id: new_keywords})).get(category_id)
+        added_keywords = written["added"] if written else []
+        updated_keywords = written["keywords"] if written else category["keywords"]
         
         # Reload category matcher so live site sees the enhanced keywords immediately
         await reload_category_matcher()
@@ -598,7 +627,7 @@ async def transform_categories(request: TransformRequest, admin: str = Depends(v
                 detail="OpenAI API key not configured"
             )
         
-        client = OpenAI(api_key=settings.openai_api_key)
+        client = get_openai_client()
         
         if database is None:
             raise HTTPException(status_code=503, detail="Database not available")
@@ -635,21 +664,30 @@ async def transform_categories(request: TransformRequest, admin: str = Depends(v
             for cat in source_categories
         ])
         
-        # Load existing categories for similarity checking
+        # Load existing categories for similarity checking; only the ones closest
+        # to the instructions and sources go in the prompt
         all_categories = await load_categories()
-        existing_summary = "\n".join([
-            f"- ID {cat['id']}: {cat['name']}"
-            for cat in all_categories["categories"][:20]
-        ])
         
-        prompt = f"""You are transforming political categories based on natural language instructions.
+        async def build_prompt() -> str:
+            proposal = " ".join(
+                [request.transform_instructions] + [f"{cat['name']} {cat['description']}" for cat in source_categories]
+            )
+            similar_categories = await find_similar_categories(
+                proposal, all_categories["categories"], exclude_ids=request.source_category_ids
+            )
+            existing_summary = "\n".join([
+                f"- ID {cat['id']}: {cat['name']}"
+                for cat in similar_categories
+            ])
+            
+            return f"""You are transforming political categories based on natural language instructions.
 
 SOURCE CATEGORIES TO TRANSFORM:
 {source_context}
 
 USER INSTRUCTIONS: "{request.transform_instructions}"
 
-EXISTING CATEGORIES (for similarity checking):
+MOST SIMILAR EXISTING CATEGORIES (for similarity checking):
 {existing_summary}
 
 TASK:
@@ -696,15 +734,12 @@ GUIDELINES:
 - Consider both progressive and conservative terminology
 """
         
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.3
+        # Source categories are part of the catalog, so their edits change its version
+        request_key = f"transform:{request.source_category_ids}:{request.transform_instructions}"
+        result, cached = await complete_admin_prompt(
+            client, request_key, all_categories["categories"], build_prompt, request.bypass_cache
         )
         
-        result = json.loads(response.choices[0].message.content)
-        
         logger.info(f"Transform operation '{result['operation_type']}' generated {len(result['new_categories'])} categories")
         
         # Format response for frontend
@@ -713,7 +748,8 @@ GUIDELINES:
             "operation_type": result["operation_type"],
             "source_category_ids": request.source_category_ids,
             "new_categories": result["new_categories"],
-            "similarity_warnings": result.get("similarity_warnings", [])
+            "similarity_warnings": result.get("similarity_warnings", []),
+            "cached": cached
         }
         
     except HTTPException:
@@ -833,3 +869,135 @@ async def delete_category(category_id: int, admin: str = Depends(verify_admin)):
     except Exception as e:
         logger.error(f"Error deleting category: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to delete category: {str(e)}")
+
+
+# Long-running AI operations as durable jobs: the routes above hold the request
+# open for the whole GPT call, these return a job id at once and a queue
+# worker runs the same route function.
+
+async def _run_as_job(operation) -> Dict[str, Any]:
+    """Await a route coroutine inside a job; client errors are not worth retrying"""
+    try:
+        return await operation
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise PermanentJobError(str(e.detail))
+        raise RuntimeError(str(e.detail))
+
+
+async def _generate_preview_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    preview = await _run_as_job(
+        generate_category_preview(CategoryRequest(**payload["request"]), admin=payload["admin"])
+    )
+    return preview.model_dump()
+
+
+async def _transform_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await _run_as_job(
+        transform_categories(TransformRequest(**payload["request"]), admin=payload["admin"])
+    )
+
+
+async def _enhance_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await _run_as_job(
+        enhance_category_keywords(payload["category_id"], EnhanceRequest(**payload["request"]), admin=payload["admin"])
+    )
+
+
+async def _enhance_bulk_job(payload: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    if not settings.openai_api_key:
+        raise PermanentJobError("OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.")
+    
+    request = BulkEnhanceRequest(**payload["request"])
+    enhancer = get_bulk_keyword_enhancer()
+    categories = await enhancer.load_targets(request.category_ids)
+    
+    if not categories:
+        raise PermanentJobError("No matching active categories")
+    
+    return await enhancer.run(categories, request.additional_context, progress=progress)
+
+
+job_queue = get_job_queue()
+job_queue.register("generate_preview", _generate_preview_job)
+job_queue.register("transform", _transform_job)
+# Not idempotent (keywords are appended), so a failed enhance is not retried
+job_queue.register("enhance", _enhance_job, max_attempts=1)
+# A retry would repeat every GPT call; resubmit instead
+job_queue.register("enhance_bulk", _enhance_bulk_job, max_attempts=1, reports_progress=True)
+
+
+async def submit_job(job_type: str, payload: Dict[str, Any], admin: str) -> Dict[str, Any]:
+    """Queue an admin job and return its id for polling"""
+    if database is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    
+    try:
+        job_id = await job_queue.enqueue(job_type, {**payload, "admin": admin}, created_by=admin)
+    except Exception as e:
+        logger.error(f"Error queueing {job_type} job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue job: {str(e)}")
+    
+    logger.info(f"Queued {job_type} job {job_id}")
+    
+    return {
+        "status": "queued",
+        "job_id": job_id,
+        "job_type": job_type
+    }
+
+
+@router.post("/jobs/generate-preview", status_code=202)
+async def submit_generate_preview(request: CategoryRequest, admin: str = Depends(verify_admin)):
+    """
+    Queue a category preview; the finished job's result is the CategoryPreview.
+    """
+    return await submit_job("generate_preview", {"request": request.model_dump()}, admin)
+
+
+@router.post("/jobs/transform", status_code=202)
+async def submit_transform(request: TransformRequest, admin: str = Depends(verify_admin)):
+    """
+    Queue a split/merge transform; the finished job's result is the transform proposal.
+    """
+    return await submit_job("transform", {"request": request.model_dump()}, admin)
+
+
+@router.post("/jobs/categories/{category_id}/enhance", status_code=202)
+async def submit_enhance(category_id: int, request: EnhanceRequest, admin: str = Depends(verify_admin)):
+    """
+    Queue keyword enhancement for one category.
+    """
+    return await submit_job("enhance", {"category_id": category_id, "request": request.model_dump()}, admin)
+
+
+@router.post("/jobs/categories/enhance-bulk", status_code=202)
+async def submit_enhance_bulk(request: BulkEnhanceRequest, admin: str = Depends(verify_admin)):
+    """
+    Queue keyword enhancement for many categories at once.
+    GPT calls run concurrently; all updates are written in one transaction and
+    only the changed categories are re-embedded. The job's progress holds
+    running counts; its result is the final summary.
+    """
+    return await submit_job("enhance_bulk", {"request": request.model_dump()}, admin)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, admin: str = Depends(verify_admin)):
+    """
+    Status of a queued job: queued, running (with progress, for jobs that report it),
+    succeeded (with result) or failed (with error)
+    """
+    if database is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    
+    try:
+        job = await job_queue.get_job(job_id)
+    except Exception as e:
+        logger.error(f"Error getting job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get job: {str(e)}")
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    return job
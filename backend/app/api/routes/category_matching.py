@@ -1,7 +1,7 @@
 """
 Category matching API routes for VoterPrime political recommendations
 """
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 import time
@@ -9,6 +9,7 @@ import time
 from ...models.category_matcher import get_category_matcher, CategoryMatch
 from ...data.category_loader import get_category_loader
 from ...services.feedback_service import UserSession, get_interaction_tracker
+from ...services.shadow_scoring import get_shadow_scorer
 from ...utils.logging import structured_logger
 
 router = APIRouter(prefix="/category-matching", tags=["Category Matching"])
@@ -69,7 +70,7 @@ class CategoryInfoResponse(BaseModel):
 
 
 @router.post("/find-matches", response_model=CategoryMatchingResult)
-async def find_category_matches(request: CategoryMatchRequest, http_request: Request):
+async def find_category_matches(request: CategoryMatchRequest, http_request: Request, background_tasks: BackgroundTasks):
     """
     Find political categories that match user's priorities
     
@@ -89,12 +90,18 @@ async def find_category_matches(request: CategoryMatchRequest, http_request: Req
         
         category_matcher = get_category_matcher()
         
+        # Embed once: the vector is used for matching and stored with the interaction
+        user_embedding = category_matcher.encode_input(request.user_input)
+        
         # Find matches
+        matching_start = time.perf_counter()
         matches = category_matcher.find_matches(
             user_input=request.user_input,
             category_types=request.category_types,
-            top_k=request.top_k
+            top_k=request.top_k,
+            user_embedding=user_embedding
         )
+        matching_ms = (time.perf_counter() - matching_start) * 1000
         
         # Convert to response format
         match_responses = [
@@ -112,7 +119,7 @@ async def find_category_matches(request: CategoryMatchRequest, http_request: Req
         
         processing_time = int((time.time() - start_time) * 1000)
         
-        # Track interaction asynchronously (non-blocking with graceful degradation)
+        # Track interaction: the id is assigned now, the row is written in the background
         interaction_id = "unknown"
         tracking_warning = None
         
@@ -127,7 +134,9 @@ async def find_category_matches(request: CategoryMatchRequest, http_request: Req
                     'confidence_score': match.confidence_score,
                     'similarity_score': match.similarity_score
                 } for match in matches],
-                processing_time=processing_time
+                processing_time=processing_time,
+                input_embedding=user_embedding,
+                embedding_model=category_matcher.text_encoder.model_name
             )
             logger.info(f"Tracked interaction: {interaction_id}")
         except Exception as tracking_error:
@@ -147,6 +156,19 @@ async def find_category_matches(request: CategoryMatchRequest, http_request: Req
         
         logger.info(f"Found {len(matches)} matches in {processing_time}ms, interaction_id: {interaction_id}")
         
+        # Score a candidate configuration with the same embedding once the response is sent
+        shadow_scorer = get_shadow_scorer()
+        if shadow_scorer.is_enabled:
+            background_tasks.add_task(
+                shadow_scorer.submit,
+                request.user_input,
+                user_embedding,
+                [match.category_id for match in matches],
+                matching_ms,
+                request.category_types,
+                request.top_k
+            )
+        
         # Add warning to response if tracking failed
         if tracking_warning:
             logger.info(f"Returning results with warning: {tracking_warning}")
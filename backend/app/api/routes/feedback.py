@@ -3,7 +3,9 @@ Feedback Collection API Routes
 Handles user feedback submission and learning analytics
 """
 from fastapi import APIRouter, HTTPException, Request, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
+from datetime import datetime
 from pydantic import BaseModel, Field
 import time
 
@@ -13,6 +15,16 @@ from ...services.feedback_service import (
     get_interaction_tracker,
     get_feedback_analytics
 )
+from ...services.learning_worker import get_learning_worker
+from ...services.session_tracker import get_session_tracker
+from ...services.interaction_writer import get_interaction_writer
+from ...services.partition_maintenance import get_partition_maintenance
+from ...services.analytics_rollup import get_analytics_rollup
+from ...services.shadow_scoring import get_shadow_scorer
+from ...services.job_queue import get_job_queue
+from ...services.feedback_export import EXPORT_FORMATS, EXPORT_EXTENSIONS, get_feedback_exporter
+from ...models.category_cooccurrence import get_category_cooccurrence
+from ...middleware.rate_limit import get_rate_limiter
 from ...utils.logging import structured_logger
 from ..routes.admin import verify_admin_token
 
@@ -178,27 +190,8 @@ async def get_feedback_summary(
     and learning system effectiveness.
     """
     try:
-        analytics = get_feedback_analytics()
-        
-        # Get comprehensive analytics
-        category_performance = await analytics.get_category_performance_summary(days)
-        feedback_trends = await analytics.get_feedback_trends(days)
-        session_activity = await analytics.get_session_activity(days)
-        learning_insights = await analytics.get_learning_insights()
-        
-        return {
-            "period_days": days,
-            "category_performance": category_performance,
-            "feedback_trends": feedback_trends,
-            "session_activity": session_activity,
-            "learning_insights": learning_insights,
-            "summary": {
-                "total_categories_with_feedback": len([c for c in category_performance if c['total_feedback'] > 0]),
-                "avg_acceptance_rate": sum(c['acceptance_rate'] for c in category_performance if c['total_feedback'] > 0) / max(len([c for c in category_performance if c['total_feedback'] > 0]), 1),
-                "total_feedback_items": sum(c['total_feedback'] for c in category_performance),
-                "categories_needing_attention": len([c for c in category_performance if c['acceptance_rate'] < 50 and c['total_feedback'] >= 5])
-            }
-        }
+        # Served from the rollup tables, cached briefly (see FeedbackAnalytics)
+        return await get_feedback_analytics().get_summary(days)
         
     except Exception as e:
         logger.error(f"Analytics retrieval failed: {str(e)}")
@@ -208,6 +201,34 @@ async def get_feedback_summary(
         )
 
 
+@router.get("/export")
+async def export_feedback(
+    format: str = Query("csv", description="Output format: csv (gzip), parquet, arrow (IPC stream)"),
+    since: Optional[datetime] = Query(None, description="Only feedback created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only feedback created before this time"),
+    cursor: Optional[str] = Query(None, description="Resume after this row: '<feedback_created_at>|<feedback_id>'"),
+    max_rows: Optional[int] = Query(None, ge=1, description="Stop after this many rows"),
+    token: str = Depends(verify_admin_token)
+):
+    """
+    Stream category feedback joined with its interaction (Admin only).
+    
+    Rows are ordered by (feedback_created_at, feedback_id); to resume an
+    interrupted export pass the last received row's values as the cursor.
+    """
+    try:
+        chunks = get_feedback_exporter().stream(format, since, until, cursor, max_rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = f"feedback-export.{EXPORT_EXTENSIONS[format]}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/analytics/category/{category_id}")
 async def get_category_feedback_details(
     category_id: int,
@@ -333,7 +354,16 @@ async def feedback_system_health():
                 "feedback_collection": "active",
                 "learning_system": "active",
                 "analytics": "active"
-            }
+            },
+            "learning_worker": get_learning_worker().get_stats(),
+            "session_tracker": get_session_tracker().get_stats(),
+            "interaction_writer": get_interaction_writer().get_stats(),
+            "partition_maintenance": get_partition_maintenance().get_stats(),
+            "analytics_rollup": get_analytics_rollup().get_stats(),
+            "category_cooccurrence": get_category_cooccurrence().get_stats(),
+            "shadow_scoring": get_shadow_scorer().get_stats(),
+            "rate_limiter": get_rate_limiter().get_stats(),
+            "job_queue": get_job_queue().get_stats()
         }
         
     except Exception as e:
@@ -144,13 +144,16 @@ async def get_rejection_patterns(
 async def identify_missing_categories(
     confidence_threshold: float = Query(default=0.5, ge=0.0, le=1.0, description="Max confidence for 'low' matches"),
     frequency_threshold: int = Query(default=5, ge=1, description="Min occurrences to suggest new category"),
-    days: int = Query(default=30, ge=1, le=365, description="Time window in days")
+    days: int = Query(default=30, ge=1, le=365, description="Time window in days"),
+    clusters: int = Query(default=8, ge=1, le=50, description="Number of input clusters to fit")
 ):
     """
     Identify potential missing categories based on low-confidence match patterns.
     
-    Analyzes user inputs that consistently get low-confidence matches
-    to suggest new categories that might be needed.
+    Clusters the embeddings of user inputs that got low-confidence matches
+    to suggest new categories that might be needed. Each suggestion reports
+    the cluster size, centroid, representative inputs and the distance to
+    the nearest existing category.
     
     Returns:
         Suggested new categories with supporting data
@@ -161,7 +164,8 @@ async def identify_missing_categories(
         suggestions = await analyzer.identify_missing_categories(
             confidence_threshold=confidence_threshold,
             frequency_threshold=frequency_threshold,
-            days=days
+            days=days,
+            n_clusters=clusters
         )
         
         return {
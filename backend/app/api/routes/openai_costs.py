@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from ...services.openai_cost_tracker import get_cost_tracker
+from ...services.openai_client import get_openai_pool_stats
+from ...services.llm_cache import get_llm_response_cache
 from ...utils.logging import structured_logger
 
 router = APIRouter(prefix="/admin/openai-costs", tags=["OpenAI Costs"])
@@ -212,3 +214,36 @@ async def get_pricing_info(admin_auth: bool = Depends(verify_admin_token)):
         "note": "Prices in USD per token. Multiply by 1M for per-million-token pricing.",
         "last_updated": "2025-11-30"
     }
+
+
+@router.get("/connection-pool")
+async def get_connection_pool(admin_auth: bool = Depends(verify_admin_token)):
+    """
+    Connection pool usage of the shared OpenAI client
+    
+    Example:
+    - /admin/openai-costs/connection-pool?token=xxx
+    """
+    return get_openai_pool_stats()
+
+
+@router.get("/response-cache")
+async def get_response_cache(admin_auth: bool = Depends(verify_admin_token)):
+    """
+    Hit rate and size of the admin LLM response cache
+    
+    Example:
+    - /admin/openai-costs/response-cache?token=xxx
+    """
+    return get_llm_response_cache().get_stats()
+
+
+@router.delete("/response-cache")
+async def clear_response_cache(admin_auth: bool = Depends(verify_admin_token)):
+    """
+    Drop every cached admin LLM response
+    
+    Example:
+    - DELETE /admin/openai-costs/response-cache?token=xxx
+    """
+    return {"status": "success", "cleared": get_llm_response_cache().clear()}
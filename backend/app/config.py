@@ -32,6 +32,38 @@ class Settings(BaseSettings):
     confidence_threshold: float = float(os.getenv("CONFIDENCE_THRESHOLD", "0.7"))
     max_categories: int = int(os.getenv("MAX_CATEGORIES", "5"))
     
+    # Learning pipeline settings
+    learning_coalesce_window_seconds: float = float(os.getenv("LEARNING_COALESCE_WINDOW_SECONDS", "2.0"))
+    session_flush_interval_seconds: float = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "5.0"))
+    interaction_flush_interval_seconds: float = float(os.getenv("INTERACTION_FLUSH_INTERVAL_SECONDS", "1.0"))
+    interaction_flush_batch_size: int = int(os.getenv("INTERACTION_FLUSH_BATCH_SIZE", "200"))
+    missing_categories_max_inputs: int = int(os.getenv("MISSING_CATEGORIES_MAX_INPUTS", "20000"))
+    
+    # Event table partition retention
+    partition_maintenance_enabled: bool = os.getenv("PARTITION_MAINTENANCE_ENABLED", "false").lower() in ("true", "1", "yes", "on")
+    partition_retention_months: int = int(os.getenv("PARTITION_RETENTION_MONTHS", "12"))
+    partition_months_ahead: int = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+    partition_archive_schema: Optional[str] = os.getenv("PARTITION_ARCHIVE_SCHEMA")
+    
+    # Feedback analytics rollups
+    analytics_refresh_interval_seconds: float = float(os.getenv("ANALYTICS_REFRESH_INTERVAL_SECONDS", "60.0"))
+    analytics_cache_ttl_seconds: float = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "30.0"))
+    
+    # Shadow scoring of candidate matcher configurations
+    shadow_cpu_budget: float = float(os.getenv("SHADOW_CPU_BUDGET", "0.05"))
+    shadow_queue_size: int = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+    shadow_sample_rate: float = float(os.getenv("SHADOW_SAMPLE_RATE", "1.0"))
+    
+    # Per-client rate limits (requests per minute, burst size, daily quota) by route class
+    rate_limit_enabled: bool = os.getenv("RATE_LIMIT_ENABLED", "false").lower() in ("true", "1", "yes", "on")
+    rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    rate_limit_trusted_proxy_hops: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXY_HOPS", "1"))
+    rate_limit_inference_per_minute: float = float(os.getenv("RATE_LIMIT_INFERENCE_PER_MINUTE", "20"))
+    rate_limit_inference_burst: int = int(os.getenv("RATE_LIMIT_INFERENCE_BURST", "10"))
+    rate_limit_inference_per_day: int = int(os.getenv("RATE_LIMIT_INFERENCE_PER_DAY", "1000"))
+    rate_limit_feedback_per_minute: float = float(os.getenv("RATE_LIMIT_FEEDBACK_PER_MINUTE", "60"))
+    rate_limit_feedback_burst: int = int(os.getenv("RATE_LIMIT_FEEDBACK_BURST", "30"))
+    
     # Redis settings (for session management)
     redis_url: Optional[str] = os.getenv("REDIS_URL")
     
@@ -45,6 +77,31 @@ class Settings(BaseSettings):
     # External API settings
     openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
     
+    # Shared OpenAI client connection pool
+    openai_max_connections: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    openai_max_keepalive_connections: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    openai_keepalive_expiry_seconds: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    openai_timeout_seconds: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+    openai_connect_timeout_seconds: float = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+    openai_max_retries: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    
+    # Bulk keyword enhancement
+    keyword_enhancement_concurrency: int = int(os.getenv("KEYWORD_ENHANCEMENT_CONCURRENCY", "4"))
+    
+    # Durable admin job queue (admin_jobs table)
+    job_queue_workers: int = int(os.getenv("JOB_QUEUE_WORKERS", "2"))
+    job_queue_poll_interval_seconds: float = float(os.getenv("JOB_QUEUE_POLL_INTERVAL_SECONDS", "2"))
+    job_queue_job_timeout_seconds: float = float(os.getenv("JOB_QUEUE_JOB_TIMEOUT_SECONDS", "300"))
+    job_queue_retry_base_seconds: float = float(os.getenv("JOB_QUEUE_RETRY_BASE_SECONDS", "10"))
+    job_queue_retention_days: int = int(os.getenv("JOB_QUEUE_RETENTION_DAYS", "7"))
+    
+    # Admin LLM response cache (category previews and transforms)
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+    llm_cache_ttl_seconds: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    
+    # Existing categories shown to GPT for redundancy checks, ranked by embedding similarity
+    category_admin_similar_categories: int = int(os.getenv("CATEGORY_ADMIN_SIMILAR_CATEGORIES", "10"))
+    
     # Logging settings
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     
@@ -49,7 +49,7 @@ async def init_feedback_system():
         # Just run the health check without connecting/disconnecting
         
         # Check if all required tables exist
-        required_tables = ['user_sessions', 'user_interactions', 'category_feedback', 'learning_metrics']
+        required_tables = ['user_sessions', 'user_interactions', 'category_feedback', 'learning_metrics', 'category_feedback_daily', 'feedback_daily_rollup', 'session_activity_daily', 'category_cooccurrence']
         
         for table in required_tables:
             result = await database.fetch_one(f"SELECT COUNT(*) as count FROM {table}")
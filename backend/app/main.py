@@ -46,6 +46,21 @@ async def Lifecycle(app: FastAPI):
             from .db.init_feedback_system import init_feedback_system
             await init_feedback_system()
             logger.info("Feedback system database initialized successfully")
+            
+            from .services.learning_worker import get_learning_worker
+            from .services.session_tracker import get_session_tracker
+            from .services.interaction_writer import get_interaction_writer
+            from .services.partition_maintenance import get_partition_maintenance
+            from .services.analytics_rollup import get_analytics_rollup
+            get_learning_worker().start()
+            get_session_tracker().start()
+            get_interaction_writer().start()
+            if settings.partition_maintenance_enabled:
+                get_partition_maintenance().start()
+            get_analytics_rollup().start()
+            
+            from .services.job_queue import get_job_queue
+            get_job_queue().start()
         else:
             logger.warning("DATABASE_URL not available - skipping feedback system initialization")
     except Exception as e:
@@ -89,6 +104,23 @@ async def Lifecycle(app: FastAPI):
             category_matcher.load_categories(categories)
             
             logger.info(f"Loaded {len(categories)} political categories from database for matching")
+            
+            # Seed live success rates from recent feedback (non-critical)
+            try:
+                from .services.learning_service import get_learning_service
+                success_stats = await get_learning_service().get_success_stats()
+                category_matcher.update_success_rates(success_stats)
+            except Exception as e:
+                logger.warning(f"Failed to seed live success rates: {str(e)}")
+            
+            # Load learned category co-occurrence for refinement penalties (non-critical)
+            try:
+                from .models.category_cooccurrence import get_category_cooccurrence
+                from .services.learning_service import get_feedback_analyzer
+                cooccurrence_rows = await get_feedback_analyzer().get_cooccurrence_counts()
+                get_category_cooccurrence().load(cooccurrence_rows)
+            except Exception as e:
+                logger.warning(f"Failed to load category co-occurrence: {str(e)}")
         else:
             logger.warning("Database not available, skipping category initialization")
         
@@ -109,6 +141,59 @@ async def Lifecycle(app: FastAPI):
     )
     logger.info("Application shutting down...")
     
+    # Stop partition maintenance before anything else touches the database
+    try:
+        from .services.partition_maintenance import get_partition_maintenance
+        await get_partition_maintenance().stop()
+    except Exception as e:
+        logger.error(f"Error stopping partition maintenance: {str(e)}")
+    
+    # Interrupted admin jobs are picked up again once their lease expires
+    try:
+        from .services.job_queue import get_job_queue
+        await get_job_queue().stop()
+    except Exception as e:
+        logger.error(f"Error stopping job queue: {str(e)}")
+    
+    try:
+        from .services.analytics_rollup import get_analytics_rollup
+        await get_analytics_rollup().stop()
+    except Exception as e:
+        logger.error(f"Error stopping analytics rollup refresher: {str(e)}")
+    
+    try:
+        from .services.shadow_scoring import get_shadow_scorer
+        await get_shadow_scorer().stop()
+    except Exception as e:
+        logger.error(f"Error stopping shadow scorer: {str(e)}")
+    
+    # Write queued interactions while the database is still connected
+    try:
+        from .services.interaction_writer import get_interaction_writer
+        await get_interaction_writer().stop()
+    except Exception as e:
+        logger.error(f"Error stopping interaction writer: {str(e)}")
+    
+    # Drain pending learning updates while the database is still connected
+    try:
+        from .services.learning_worker import get_learning_worker
+        await get_learning_worker().stop()
+    except Exception as e:
+        logger.error(f"Error stopping learning worker: {str(e)}")
+    
+    # Flush pending session activity
+    try:
+        from .services.session_tracker import get_session_tracker
+        await get_session_tracker().stop()
+    except Exception as e:
+        logger.error(f"Error stopping session tracker: {str(e)}")
+    
+    try:
+        from .services.openai_client import close_openai_client
+        close_openai_client()
+    except Exception as e:
+        logger.error(f"Error closing OpenAI client: {str(e)}")
+    
     # Disconnect from database
     try:
         from .db.database import database
@@ -129,6 +214,11 @@ app = FastAPI(
     redoc_url="/redoc" if settings.enable_docs else None,
 )
 
+# Per-client rate limits on the expensive anonymous routes
+if settings.rate_limit_enabled:
+    from .middleware.rate_limit import RateLimitMiddleware
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
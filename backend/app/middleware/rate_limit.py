@@ -0,0 +1,333 @@
+"""
+Rate Limiting - Per-client token buckets for the expensive anonymous routes
+
+An ASGI middleware (no request/response wrapping) looks the request's method
+and path up in ROUTE_COSTS. Unlisted routes pass straight through. Listed
+routes take their cost from two buckets of the client's route class: a burst
+bucket (steady per-minute rate, small capacity) and a daily quota bucket. A
+request is admitted only when both have enough tokens; otherwise it gets a
+429 with Retry-After.
+
+Clients are keyed by IP address (sessions are derived from IP as well). Behind
+a proxy, set trusted_proxy_hops so the address is read from X-Forwarded-For.
+With no trusted hops, a request that arrived through a proxy (it carries
+X-Forwarded-For) is not limited: its key would be the proxy's address, and
+every client behind it would share one bucket.
+
+Buckets live in process memory. With the redis backend every worker shares
+them through one atomic script call; if Redis is unreachable the middleware
+falls back to the in-process buckets rather than failing requests.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
+import json
+import logging
+import math
+import time
+
+from ..config import settings
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RouteClassLimit:
+    """Limits shared by every route of a class, per client."""
+    per_minute: float
+    burst: int
+    per_day: Optional[int] = None
+    
+    def buckets(self) -> List[Tuple[str, float, float]]:
+        """(bucket suffix, refill per second, capacity) for each bucket of the class."""
+        buckets = [("burst", self.per_minute / 60.0, float(self.burst))]
+        if self.per_day:
+            buckets.append(("day", self.per_day / 86400.0, float(self.per_day)))
+        return buckets
+
+
+# (method, path) -> (route class, tokens per request)
+ROUTE_COSTS: Dict[Tuple[str, str], Tuple[str, int]] = {
+    # OpenAI-backed
+    ("POST", "/category-matching/find-matches"): ("inference", 1),
+    ("POST", "/category-matching/refine-matches"): ("inference", 1),
+    ("POST", "/sentiment-analysis/analyze"): ("inference", 1),
+    ("POST", "/sentiment-analysis/batch-analyze"): ("inference", 5),
+    ("POST", "/text-analysis/encode"): ("inference", 1),
+    ("POST", "/text-analysis/similarity"): ("inference", 1),
+    # Embeds and clusters up to MISSING_CATEGORIES_MAX_INPUTS inputs
+    ("GET", "/learning/missing-categories"): ("inference", 5),
+    # Database writes
+    ("POST", "/feedback/session/create"): ("feedback", 1),
+    ("POST", "/feedback/submit"): ("feedback", 1),
+}
+
+
+class InMemoryBuckets:
+    """
+    Token buckets in a dict: bucket key -> [tokens, last refill time].
+    
+    Buckets idle long enough to have refilled completely are evicted, since a
+    missing bucket is read as full.
+    """
+    
+    def __init__(self, sweep_interval: float = 60.0):
+        self._buckets: Dict[str, List[float]] = {}
+        self._refill_seconds: Dict[str, float] = {}
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+    
+    def take(self, buckets: List[Tuple[str, float, float]], cost: float, now: Optional[float] = None) -> float:
+        """
+        Take `cost` tokens from every bucket, or from none of them
+        
+        buckets are (key, refill per second, capacity). Returns 0 when the
+        tokens were taken, otherwise the seconds until they would be available.
+        """
+        if now is None:
+            now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        
+        states = []
+        retry_after = 0.0
+        for key, rate, capacity in buckets:
+            state = self._buckets.get(key)
+            if state is None:
+                state = [capacity, now]
+                self._buckets[key] = state
+                self._refill_seconds[key] = capacity / rate
+            else:
+                state[0] = min(capacity, state[0] + (now - state[1]) * rate)
+                state[1] = now
+            
+            if state[0] < cost:
+                retry_after = max(retry_after, (cost - state[0]) / rate)
+            states.append(state)
+        
+        if retry_after:
+            return retry_after
+        
+        for state in states:
+            state[0] -= cost
+        return 0.0
+    
+    def _sweep(self, now: float) -> None:
+        idle = [key for key, (_, last) in self._buckets.items() if now - last >= self._refill_seconds[key]]
+        for key in idle:
+            del self._buckets[key]
+            del self._refill_seconds[key]
+        self._next_sweep = now + self.sweep_interval
+    
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Same all-or-nothing take as InMemoryBuckets, on Redis server time.
+# KEYS: bucket keys; ARGV: cost, then (refill per second, capacity) per key.
+REDIS_TAKE_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local retry_after = 0
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local last = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - last) * rate)
+    tokens[i] = available
+    if available < cost then
+        retry_after = math.max(retry_after, (cost - available) / rate)
+    end
+end
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local capacity = tonumber(ARGV[i * 2 + 1])
+    if retry_after == 0 then
+        tokens[i] = tokens[i] - cost
+    end
+    redis.call('HSET', key, 'tokens', tokens[i], 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+
+return tostring(retry_after)
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared by all workers through Redis (needs the redis package)."""
+    
+    def __init__(self, redis_url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio
+        
+        self.prefix = prefix
+        self._client = redis.asyncio.from_url(redis_url)
+        self._script = self._client.register_script(REDIS_TAKE_SCRIPT)
+    
+    async def take(self, buckets: List[Tuple[str, float, float]], cost: float) -> float:
+        keys = [self.prefix + key for key, _, _ in buckets]
+        args: List[Any] = [cost]
+        for _, rate, capacity in buckets:
+            args.extend((rate, capacity))
+        return float(await self._script(keys=keys, args=args))
+
+
+class RateLimiter:
+    """Per-client, per-route-class limits for the routes in ROUTE_COSTS."""
+    
+    def __init__(
+        self,
+        limits: Dict[str, RouteClassLimit],
+        route_costs: Dict[Tuple[str, str], Tuple[str, int]] = ROUTE_COSTS,
+        trusted_proxy_hops: int = 0,
+        redis_url: Optional[str] = None
+    ):
+        self.trusted_proxy_hops = trusted_proxy_hops
+        self.local = InMemoryBuckets()
+        self.shared: Optional[RedisBuckets] = None
+        if redis_url:
+            try:
+                self.shared = RedisBuckets(redis_url)
+            except ImportError:
+                logger.warning("redis package not installed - rate limit buckets are per process")
+        
+        # Resolve every limited route to its class, cost and bucket specs once
+        self._routes: Dict[Tuple[str, str], Tuple[str, int, List[Tuple[str, float, float]]]] = {
+            route: (route_class, cost, limits[route_class].buckets())
+            for route, (route_class, cost) in route_costs.items()
+            if route_class in limits
+        }
+        
+        # Performance tracking
+        self.admitted = 0
+        self.limited: Dict[str, int] = {route_class: 0 for route_class in limits}
+        self.shared_failures = 0
+        self.unkeyed = 0
+    
+    async def check(self, scope) -> Optional[Tuple[str, float]]:
+        """None when the request may proceed, else (route class, seconds until it may retry)."""
+        route = self._routes.get((scope["method"], scope["path"]))
+        if route is None:
+            return None
+        
+        route_class, cost, specs = route
+        client = self.client_key(scope)
+        if client is None:
+            self.unkeyed += 1
+            if self.unkeyed == 1:
+                logger.warning(
+                    "Request came through a proxy but RATE_LIMIT_TRUSTED_PROXY_HOPS is 0 - "
+                    "not rate limiting rather than sharing one bucket across all clients"
+                )
+            return None
+        buckets = [(f"{route_class}:{suffix}:{client}", rate, capacity) for suffix, rate, capacity in specs]
+        
+        retry_after = await self._take(buckets, cost)
+        if retry_after:
+            self.limited[route_class] += 1
+            return route_class, retry_after
+        
+        self.admitted += 1
+        return None
+    
+    async def _take(self, buckets: List[Tuple[str, float, float]], cost: int) -> float:
+        if self.shared is not None:
+            try:
+                return await self.shared.take(buckets, cost)
+            except Exception as e:
+                self.shared_failures += 1
+                if self.shared_failures == 1 or self.shared_failures % 1000 == 0:
+                    logger.warning(f"Shared rate limit buckets unavailable, using in-process buckets: {str(e)}")
+        return self.local.take(buckets, cost)
+    
+    def client_key(self, scope) -> Optional[str]:
+        """Client address, or None when the only address known is a proxy's"""
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                if not self.trusted_proxy_hops:
+                    return None
+                # Each trusted proxy appends the address it was called from, so the
+                # entry `hops` from the end is the client our outermost proxy saw
+                addresses = [address.strip() for address in value.decode("latin-1").split(",")]
+                return addresses[max(0, len(addresses) - self.trusted_proxy_hops)]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admitted/limited counts and bucket usage."""
+        return {
+            "backend": "redis" if self.shared is not None else "memory",
+            "admitted": self.admitted,
+            "limited": dict(self.limited),
+            "local_buckets": len(self.local),
+            "shared_failures": self.shared_failures,
+            "unkeyed": self.unkeyed
+        }
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware answering 429 for requests the rate limiter turns away."""
+    
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or get_rate_limiter()
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            rejection = await self.limiter.check(scope)
+            if rejection is not None:
+                await self._reject(send, *rejection)
+                return
+        
+        await self.app(scope, receive, send)
+    
+    async def _reject(self, send, route_class: str, retry_after: float) -> None:
+        seconds = max(1, math.ceil(retry_after))
+        body = json.dumps({
+            "detail": f"Rate limit exceeded for {route_class} requests, retry in {seconds}s",
+            "retry_after": seconds
+        }).encode()
+        
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(seconds).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Global rate limiter instance (singleton pattern)
+_rate_limiter_instance: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the global rate limiter instance"""
+    global _rate_limiter_instance
+    
+    if _rate_limiter_instance is None:
+        _rate_limiter_instance = RateLimiter(
+            limits={
+                "inference": RouteClassLimit(
+                    per_minute=settings.rate_limit_inference_per_minute,
+                    burst=settings.rate_limit_inference_burst,
+                    per_day=settings.rate_limit_inference_per_day
+                ),
+                "feedback": RouteClassLimit(
+                    per_minute=settings.rate_limit_feedback_per_minute,
+                    burst=settings.rate_limit_feedback_burst
+                ),
+            },
+            trusted_proxy_hops=settings.rate_limit_trusted_proxy_hops,
+            redis_url=settings.redis_url if settings.rate_limit_backend == "redis" else None
+        )
+    
+    return _rate_limiter_instance
@@ -0,0 +1,254 @@
+"""
+Category co-occurrence counts learned from feedback
+
+For every feedback submission, each ordered pair of categories judged in the
+same interaction adds to three sparse category x category matrices:
+
+- co_accepts[a, b]: both accepted (accept/maybe)
+- co_rejects[a, b]: both rejected (reject/irrelevant)
+- substitutions[a, b]: a rejected while b was accepted ("a is confused with b")
+
+The diagonals of co_accepts and co_rejects hold each category's own accept
+and reject totals, which normalize the pair counts.
+"""
+import numpy as np
+from scipy import sparse
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from ..utils.logging import structured_logger
+
+POSITIVE_FEEDBACK = ('accept', 'maybe')
+NEGATIVE_FEEDBACK = ('reject', 'irrelevant')
+
+# (category_a, category_b) -> (co_accepts, co_rejects, substitutions)
+PairCounts = Dict[Tuple[int, int], Tuple[int, int, int]]
+
+
+def feedback_pair_counts(category_feedbacks: List[Dict[str, Any]]) -> PairCounts:
+    """Increments contributed by one interaction's feedback (last verdict per category wins)."""
+    verdicts: Dict[int, bool] = {}
+    for feedback in category_feedbacks:
+        if feedback['feedback_type'] in POSITIVE_FEEDBACK:
+            verdicts[feedback['category_id']] = True
+        elif feedback['feedback_type'] in NEGATIVE_FEEDBACK:
+            verdicts[feedback['category_id']] = False
+    
+    counts: PairCounts = {}
+    for a, a_accepted in verdicts.items():
+        for b, b_accepted in verdicts.items():
+            if a == b:
+                counts[(a, a)] = (int(a_accepted), int(not a_accepted), 0)
+                continue
+            
+            pair = (int(a_accepted and b_accepted), int(not a_accepted and not b_accepted), int(not a_accepted and b_accepted))
+            if any(pair):
+                counts[(a, b)] = pair
+    
+    return counts
+
+
+class CategoryCooccurrence:
+    """
+    Sparse co-acceptance / co-rejection / substitution matrices
+    
+    Matrices are CSR over a compact index of the category ids seen so far.
+    Increments are buffered and merged into the CSR matrices on the next
+    read, so recording feedback never reallocates on the request path and
+    row lookups stay O(nnz) in the row.
+    """
+    
+    def __init__(self):
+        self.logger = structured_logger
+        
+        self._index: Dict[int, int] = {}
+        self._category_ids: List[int] = []
+        self._ids_array = np.zeros(0, dtype=np.int64)
+        self.co_accepts = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self.co_rejects = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self.substitutions = sparse.csr_matrix((0, 0), dtype=np.int64)
+        
+        self._pending: Dict[Tuple[int, int], List[int]] = {}
+        self.loaded = False
+        
+        # Pseudo-count of rejections before pair rates carry full weight
+        self.prior_weight = 5
+    
+    def load(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Replace the matrices with persisted counts (category_cooccurrence rows)."""
+        self._index, self._category_ids = {}, []
+        self._ids_array = np.zeros(0, dtype=np.int64)
+        self.co_accepts = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self.co_rejects = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self.substitutions = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self._pending = {}
+        
+        self.record({
+            (row['category_a'], row['category_b']): (row['co_accepts'], row['co_rejects'], row['substitutions'])
+            for row in rows
+        })
+        self._materialize()
+        self.loaded = True
+        
+        self.logger.info(
+            f"Loaded category co-occurrence for {len(self._category_ids)} categories "
+            f"({self.co_rejects.nnz + self.co_accepts.nnz + self.substitutions.nnz} non-zeros)"
+        )
+    
+    def record(self, counts: PairCounts) -> None:
+        """Buffer increments from feedback_pair_counts; merged on the next read."""
+        for pair, increments in counts.items():
+            pending = self._pending.setdefault(pair, [0, 0, 0])
+            for i, increment in enumerate(increments):
+                pending[i] += increment
+    
+    def _row(self, category_id: int) -> int:
+        if category_id not in self._index:
+            self._index[category_id] = len(self._category_ids)
+            self._category_ids.append(category_id)
+        return self._index[category_id]
+    
+    def _materialize(self) -> None:
+        """Fold buffered increments into the CSR matrices."""
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, {}
+        rows = np.array([self._row(a) for a, _ in pending], dtype=np.int64)
+        cols = np.array([self._row(b) for _, b in pending], dtype=np.int64)
+        increments = np.array(list(pending.values()), dtype=np.int64)
+        
+        size = len(self._category_ids)
+        merged = []
+        for column, matrix in enumerate((self.co_accepts, self.co_rejects, self.substitutions)):
+            matrix = matrix.copy()
+            matrix.resize((size, size))
+            delta = sparse.coo_matrix((increments[:, column], (rows, cols)), shape=(size, size)).tocsr()
+            merged.append((matrix + delta).tocsr())
+        
+        self.co_accepts, self.co_rejects, self.substitutions = merged
+        for matrix in merged:
+            matrix.eliminate_zeros()
+        self._ids_array = np.asarray(self._category_ids, dtype=np.int64)
+    
+    def _row_items(self, matrix: sparse.csr_matrix, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(category ids, counts) of the non-zeros in one row."""
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        columns = matrix.indices[start:end]
+        return self._ids_array[columns], matrix.data[start:end]
+    
+    def rejection_penalties(self, rejected_category_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Learned penalty per category given the categories a user just rejected
+        
+        Positive when users who reject those categories tend to reject this one
+        too; negative when they tend to accept it instead. Each term is a rate
+        over the rejected category's own rejections, shrunk toward zero by
+        prior_weight on small samples.
+        """
+        self._materialize()
+        
+        penalties: Dict[int, float] = {}
+        for rejected_id in rejected_category_ids:
+            row = self._index.get(rejected_id)
+            if row is None:
+                continue
+            
+            denominator = self.co_rejects[row, row] + self.prior_weight
+            
+            for matrix, sign in ((self.co_rejects, 1.0), (self.substitutions, -1.0)):
+                categories, counts = self._row_items(matrix, row)
+                for category_id, count in zip(categories, counts):
+                    if category_id != rejected_id:
+                        penalties[int(category_id)] = penalties.get(int(category_id), 0.0) + sign * count / denominator
+        
+        return penalties
+    
+    def confused_with(self, category_id: int, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Categories most often accepted when this one was rejected."""
+        self._materialize()
+        
+        row = self._index.get(category_id)
+        if row is None:
+            return []
+        
+        return self._top_partners(self.substitutions, row, top_k, "substitutions", "substitution_rate")
+    
+    def rejection_ranking(
+        self,
+        category_id: Optional[int] = None,
+        top_k: int = 10,
+        partners: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Most-rejected categories (or just category_id), read off the diagonal
+        of co_rejects, each with the categories most often rejected alongside
+        it and most often accepted instead. Counts are all time.
+        """
+        self._materialize()
+        
+        rejections = self.co_rejects.diagonal()
+        if category_id is not None:
+            rows = [self._index[category_id]] if category_id in self._index else []
+        else:
+            rows = np.argsort(-rejections, kind="stable")[:top_k]
+        
+        return [
+            {
+                "category_id": int(self._ids_array[row]),
+                "rejection_count": int(rejections[row]),
+                "co_rejected_with": self._top_partners(self.co_rejects, row, partners, "co_rejects", "co_rejection_rate"),
+                "commonly_confused_with": self._top_partners(
+                    self.substitutions, row, partners, "substitutions", "substitution_rate"
+                )
+            }
+            for row in rows
+            if rejections[row] > 0
+        ]
+    
+    def _top_partners(
+        self,
+        matrix: sparse.csr_matrix,
+        row: int,
+        top_k: int,
+        count_key: str,
+        rate_key: str
+    ) -> List[Dict[str, Any]]:
+        """Largest off-diagonal counts in a row, as a rate over the row's rejections."""
+        categories, counts = self._row_items(matrix, row)
+        partners = categories != self._ids_array[row]
+        categories, counts = categories[partners], counts[partners]
+        rejections = max(int(self.co_rejects[row, row]), 1)
+        order = np.argsort(-counts, kind="stable")[:top_k]
+        
+        return [
+            {
+                "category_id": int(categories[i]),
+                count_key: int(counts[i]),
+                rate_key: round(int(counts[i]) / rejections, 3)
+            }
+            for i in order
+        ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "categories": len(self._category_ids),
+            "co_accept_nnz": int(self.co_accepts.nnz),
+            "co_reject_nnz": int(self.co_rejects.nnz),
+            "substitution_nnz": int(self.substitutions.nnz),
+            "pending_pairs": len(self._pending)
+        }
+
+
+# Global co-occurrence instance (singleton pattern)
+_category_cooccurrence_instance: Optional[CategoryCooccurrence] = None
+
+
+def get_category_cooccurrence() -> CategoryCooccurrence:
+    """Get or create the global category co-occurrence instance"""
+    global _category_cooccurrence_instance
+    
+    if _category_cooccurrence_instance is None:
+        _category_cooccurrence_instance = CategoryCooccurrence()
+    
+    return _category_cooccurrence_instance
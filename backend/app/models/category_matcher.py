@@ -5,10 +5,12 @@ Handles semantic matching between user priorities and political categories
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
 import json
 from pathlib import Path
 
+from .category_cooccurrence import get_category_cooccurrence
 from .text_encoder import get_text_encoder
 from ..utils.logging import structured_logger
 
@@ -37,6 +39,12 @@ class CategoryMatcher:
         self.category_embeddings: Optional[np.ndarray] = None
         self.logger = structured_logger
         
+        # Success rate per catalog row, updated in place from live feedback
+        self.success_rates: np.ndarray = np.zeros(0)
+        self._category_rows: Dict[int, int] = {}
+        self._live_success_stats: Dict[int, Tuple[int, int]] = {}
+        self.success_rate_updates = 0
+        
         # Confidence scoring weights
         self.similarity_weight = 0.6
         self.keyword_weight = 0.2
@@ -45,6 +53,12 @@ class CategoryMatcher:
         # Minimum thresholds
         self.min_similarity_threshold = 0.15
         self.min_confidence_threshold = 0.25
+        
+        # Pseudo-count pulling live success rates toward neutral (0.5) on small samples
+        self.success_rate_prior_weight = 5
+        
+        # (categories list it was built from, unique keywords, keyword x category counts)
+        self._keyword_index: Optional[Tuple[List[Dict[str, Any]], List[str], sparse.csr_matrix]] = None
     
     def load_categories(self, categories: List[Dict[str, Any]]) -> None:
         """
@@ -68,32 +82,79 @@ class CategoryMatcher:
             self.logger.info(f"Loading {len(categories)} political categories")
             
             # Create text representations for embedding
-            category_texts = []
-            for category in categories:
-                # Combine name, description, and keywords for rich semantic representation
-                text_parts = [
-                    category['name'],
-                    category.get('description', ''),
-                    ' '.join(category.get('keywords', []))
-                ]
-                category_text = ' '.join(filter(None, text_parts))
-                category_texts.append(category_text)
+            category_texts = [self._category_text(category) for category in categories]
             
             # Generate embeddings for all categories
             self.logger.info("Generating OpenAI embeddings for categories")
             self.category_embeddings = self.text_encoder.encode_batch(category_texts)
             
+            # Build the success rate vector, keeping any live stats already pushed
+            self._category_rows = {category['id']: row for row, category in enumerate(categories)}
+            self.success_rates = np.array([
+                self._smoothed_success_rate(*self._live_success_stats[category['id']])
+                if category['id'] in self._live_success_stats
+                else self._calculate_success_rate(category)
+                for category in categories
+            ], dtype=float)
+            
             self.logger.info(f"Category embeddings shape: {self.category_embeddings.shape}")
             
         except Exception as e:
             self.logger.error(f"Failed to load categories: {str(e)}")
             raise RuntimeError(f"Category loading failed: {str(e)}")
     
+    def update_categories(self, updated: List[Dict[str, Any]]) -> int:
+        """
+        Replace already-loaded categories and re-embed only those
+        
+        Categories are matched by id; ids not currently loaded are ignored
+        (new categories need load_categories). The catalog list and embedding
+        matrix are swapped in whole, so concurrent matching sees either the
+        old or the new catalog. Returns the number of categories replaced.
+        """
+        if not self.categories or self.category_embeddings is None:
+            raise RuntimeError("Categories not loaded. Call load_categories() first.")
+        
+        replacements = [
+            (self._category_rows[category['id']], category)
+            for category in updated
+            if category['id'] in self._category_rows
+        ]
+        if not replacements:
+            return 0
+        
+        embeddings = self.text_encoder.encode_batch([self._category_text(category) for _, category in replacements])
+        
+        categories = list(self.categories)
+        category_embeddings = self.category_embeddings.copy()
+        for (row, category), embedding in zip(replacements, embeddings):
+            categories[row] = category
+            category_embeddings[row] = embedding
+        
+        self.categories, self.category_embeddings = categories, category_embeddings
+        self.logger.info(f"Re-embedded {len(replacements)} updated categories")
+        
+        return len(replacements)
+    
+    def _category_text(self, category: Dict[str, Any]) -> str:
+        """Name, description and keywords combined for a rich semantic representation"""
+        text_parts = [
+            category['name'],
+            category.get('description', ''),
+            ' '.join(category.get('keywords', []))
+        ]
+        return ' '.join(filter(None, text_parts))
+    
+    def encode_input(self, user_input: str) -> np.ndarray:
+        """Embed user input once so callers can both match and store the vector"""
+        return self.text_encoder.encode_text(user_input)
+    
     def find_matches(
         self, 
         user_input: str, 
         category_types: Optional[List[str]] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        user_embedding: Optional[np.ndarray] = None
     ) -> List[CategoryMatch]:
         """
         Find matching categories for user political priorities
@@ -102,6 +163,7 @@ class CategoryMatcher:
             user_input: User's political priority text (e.g., "I care about climate change")
             category_types: Filter by category types ['issue', 'candidate', 'policy']
             top_k: Number of top matches to return
+            user_embedding: Embedding of user_input from encode_input, if already computed
             
         Returns:
             List of CategoryMatch objects sorted by confidence score
@@ -113,7 +175,8 @@ class CategoryMatcher:
             self.logger.info(f"Finding matches for: '{user_input[:50]}...'")
             
             # Encode user input
-            user_embedding = self.text_encoder.encode_text(user_input)
+            if user_embedding is None:
+                user_embedding = self.encode_input(user_input)
             
             # Calculate similarities with all categories
             similarities = cosine_similarity(
@@ -135,7 +198,9 @@ class CategoryMatcher:
                     continue
                 
                 # Calculate confidence score
-                confidence = self._calculate_confidence(similarity, category, user_input)
+                confidence = self._calculate_confidence(
+                    similarity, category, user_input, success_rate=self.success_rates[i]
+                )
                 
                 # Skip if below minimum confidence threshold
                 if confidence < self.min_confidence_threshold:
@@ -166,6 +231,117 @@ class CategoryMatcher:
             self.logger.error(f"Failed to find matches: {str(e)}")
             raise RuntimeError(f"Category matching failed: {str(e)}")
     
+    def find_similar_categories(
+        self,
+        text: str,
+        top_n: int = 10,
+        exclude_ids: Optional[List[int]] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Categories most similar to a piece of text, by embedding similarity alone
+        
+        Unlike find_matches there are no thresholds, keyword bonuses or success
+        rates: this is for redundancy checks against the whole catalog.
+        
+        Returns:
+            Up to top_n (category, similarity) pairs, most similar first
+        """
+        if not self.categories or self.category_embeddings is None:
+            raise RuntimeError("Categories not loaded. Call load_categories() first.")
+        
+        categories, category_embeddings = self.categories, self.category_embeddings
+        similarities = cosine_similarity(self.encode_input(text).reshape(1, -1), category_embeddings)[0]
+        
+        excluded = set(exclude_ids or [])
+        similar = []
+        for row in np.argsort(-similarities, kind='stable'):
+            if categories[row]['id'] in excluded:
+                continue
+            similar.append((categories[row], float(similarities[row])))
+            if len(similar) == top_n:
+                break
+        
+        return similar
+    
+    def score_batch(
+        self,
+        user_inputs: List[str],
+        user_embeddings: np.ndarray,
+        category_types: Optional[List[str]] = None,
+        top_k: int = 5
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        find_matches for many inputs at once, as matrix operations
+        
+        Applies the same weights, thresholds and ordering as find_matches
+        (ties keep catalog order), but scores the whole batch against the
+        catalog in one pass and returns positions rather than CategoryMatch
+        objects.
+        
+        Args:
+            user_inputs: Input texts (for keyword bonuses)
+            user_embeddings: One embedding row per input
+            category_types: Filter by category types
+            top_k: Number of matches per input
+        
+        Returns:
+            (rows, confidences), both shaped (len(user_inputs), top_k): catalog
+            positions (index into self.categories) by descending confidence,
+            -1 where an input has fewer than top_k matches
+        """
+        if not self.categories or self.category_embeddings is None:
+            raise RuntimeError("Categories not loaded. Call load_categories() first.")
+        
+        similarities = cosine_similarity(np.asarray(user_embeddings, dtype=float), self.category_embeddings)
+        
+        confidence = (
+            similarities * self.similarity_weight
+            + self._keyword_bonuses(user_inputs) * self.keyword_weight
+            + self.success_rates[None, :] * self.success_rate_weight
+        )
+        confidence = np.clip(confidence, 0.0, 1.0)
+        
+        eligible = (similarities >= self.min_similarity_threshold) & (confidence >= self.min_confidence_threshold)
+        if category_types:
+            eligible &= np.array([category.get('type') in category_types for category in self.categories])[None, :]
+        
+        ranked = np.where(eligible, confidence, -np.inf)
+        rows = np.argsort(-ranked, axis=1, kind="stable")[:, :top_k]
+        confidences = np.take_along_axis(ranked, rows, axis=1)
+        
+        rows = np.where(np.isfinite(confidences), rows, -1)
+        confidences = np.where(np.isfinite(confidences), confidences, 0.0)
+        
+        return rows, confidences
+    
+    def _keyword_bonuses(self, user_inputs: List[str]) -> np.ndarray:
+        """_calculate_keyword_bonus for every (input, category) pair, shaped (inputs, categories)."""
+        if self._keyword_index is None or self._keyword_index[0] is not self.categories:
+            keywords: Dict[str, int] = {}
+            entries, columns = [], []
+            for column, category in enumerate(self.categories):
+                for keyword in category.get('keywords', []):
+                    entries.append(keywords.setdefault(keyword.lower(), len(keywords)))
+                    columns.append(column)
+            
+            # keyword x category occurrence counts (a repeated keyword counts twice, as in the scalar path)
+            matrix = sparse.csr_matrix(
+                (np.ones(len(entries)), (entries, columns)), shape=(len(keywords), len(self.categories))
+            )
+            self._keyword_index = (self.categories, list(keywords), matrix)
+        
+        _, keywords, matrix = self._keyword_index
+        if not keywords:
+            return np.zeros((len(user_inputs), len(self.categories)))
+        
+        lowered = [user_input.lower() for user_input in user_inputs]
+        hits = sparse.csr_matrix(np.array([[keyword in text for keyword in keywords] for text in lowered], dtype=float))
+        
+        keyword_counts = np.array([len(category.get('keywords', [])) for category in self.categories], dtype=float)
+        matched = (hits @ matrix).toarray()
+        
+        return np.minimum(1.0, matched / np.where(keyword_counts > 0, keyword_counts, 1.0))
+    
     def refine_matches(
         self, 
         user_input: str, 
@@ -197,9 +373,15 @@ class CategoryMatcher:
                 if match.category_id not in rejected_category_ids
             ]
             
-            # Apply penalty to similar categories (same type, overlapping keywords)
+            # Categories other users rejected (or accepted) alongside these ones
+            cooccurrence = get_category_cooccurrence()
+            learned_penalties = (
+                cooccurrence.rejection_penalties(rejected_category_ids) if cooccurrence.loaded else None
+            )
+            
+            # Apply penalty to similar categories (same type, overlapping keywords, co-rejections)
             for match in refined_matches:
-                penalty = self._calculate_rejection_penalty(match, rejected_category_ids)
+                penalty = self._calculate_rejection_penalty(match, rejected_category_ids, learned_penalties)
                 match.confidence_score *= (1.0 - penalty)
             
             # Re-sort and return top_k
@@ -217,7 +399,8 @@ class CategoryMatcher:
         self, 
         similarity_score: float, 
         category: Dict[str, Any], 
-        user_input: str
+        user_input: str,
+        success_rate: Optional[float] = None
     ) -> float:
         """
         Calculate confidence score combining similarity, keyword matches, and success rate
@@ -226,6 +409,7 @@ class CategoryMatcher:
             similarity_score: Cosine similarity score
             category: Category dictionary
             user_input: User's input text
+            success_rate: Live success rate for the category (defaults to its stored counters)
             
         Returns:
             Confidence score between 0 and 1
@@ -238,7 +422,8 @@ class CategoryMatcher:
         keyword_component = keyword_bonus * self.keyword_weight
         
         # Historical success rate component
-        success_rate = self._calculate_success_rate(category)
+        if success_rate is None:
+            success_rate = self._calculate_success_rate(category)
         success_component = success_rate * self.success_rate_weight
         
         # Combine components
@@ -270,14 +455,52 @@ class CategoryMatcher:
         
         return success_count / total_count
     
+    def _smoothed_success_rate(self, successful: int, total: int) -> float:
+        """Success rate from live feedback counts, smoothed toward neutral on small samples"""
+        prior = self.success_rate_prior_weight
+        return (successful + 0.5 * prior) / (total + prior)
+    
+    def update_success_rates(self, category_stats: Dict[int, Tuple[int, int]]) -> int:
+        """
+        Update success rates in place from live feedback counts
+        
+        Writes straight into the current catalog's success rate vector; never
+        reloads categories or calls the embedding API. Stats for categories
+        not in the current catalog are kept and applied on the next load.
+        
+        Args:
+            category_stats: Mapping of category_id -> (successful, total) feedback counts
+        
+        Returns:
+            Number of categories updated in the current catalog
+        """
+        updated = 0
+        
+        for category_id, (successful, total) in category_stats.items():
+            self._live_success_stats[category_id] = (int(successful), int(total))
+            
+            row = self._category_rows.get(category_id)
+            if row is not None and row < len(self.success_rates):
+                self.success_rates[row] = self._smoothed_success_rate(successful, total)
+                updated += 1
+        
+        self.success_rate_updates += updated
+        
+        return updated
+    
     def _calculate_rejection_penalty(
         self, 
         match: CategoryMatch, 
-        rejected_category_ids: List[int]
+        rejected_category_ids: List[int],
+        learned_penalties: Optional[Dict[int, float]] = None
     ) -> float:
         """
         Calculate penalty for categories similar to rejected ones
         
+        learned_penalties (from CategoryCooccurrence.rejection_penalties) raise
+        the penalty for categories users tend to reject together with the
+        rejected ones and lower it for their usual substitutes.
+        
         Returns:
             Penalty factor between 0 and 0.5 (reduces confidence)
         """
@@ -302,7 +525,10 @@ class CategoryMatcher:
                 overlap = len(rejected_keywords & match_keywords) / len(rejected_keywords | match_keywords)
                 penalty += overlap * 0.2
         
-        return min(0.5, penalty)  # Cap penalty at 50%
+        if learned_penalties:
+            penalty += learned_penalties.get(match.category_id, 0.0) * 0.3
+        
+        return max(0.0, min(0.5, penalty))  # Cap penalty at 50%
     
     def get_category_by_id(self, category_id: int) -> Optional[Dict[str, Any]]:
         """Get category by ID"""
@@ -332,6 +558,11 @@ class CategoryMatcher:
             'thresholds': {
                 'min_similarity': self.min_similarity_threshold,
                 'min_confidence': self.min_confidence_threshold
+            },
+            'live_success_rates': {
+                'categories_with_feedback': len(self._live_success_stats),
+                'total_updates': self.success_rate_updates,
+                'prior_weight': self.success_rate_prior_weight
             }
         }
 
@@ -0,0 +1,180 @@
+"""
+Streaming mini-batch k-means over user input embeddings
+
+Used to find groups of user inputs that no existing category covers well.
+Embeddings arrive in batches and are folded into running centroids, so memory
+is bounded by the seeding buffer, the clusters and their kept representatives,
+not by how many inputs are streamed through.
+"""
+import heapq
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so dot products are cosine similarities."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class InputClusterer:
+    """
+    Online k-means with cosine similarity (spherical mini-batch k-means)
+    
+    The first init_size inputs are buffered and used to seed centroids with
+    k-means++ plus a few Lloyd iterations. After that each centroid is the
+    running mean of the inputs assigned to it, updated per batch with
+    per-cluster counts (Sculley, "Web-scale k-means clustering"). For every
+    cluster the few inputs closest to the centroid at the time they were seen
+    are kept as representatives.
+    """
+    
+    def __init__(
+        self,
+        n_clusters: int = 8,
+        representatives: int = 3,
+        init_size: int = 1000,
+        init_iterations: int = 5,
+        seed: int = 0
+    ):
+        if n_clusters < 1:
+            raise ValueError("n_clusters must be at least 1")
+        
+        self.n_clusters = n_clusters
+        self.representatives = representatives
+        self.init_size = max(init_size, n_clusters)
+        self.init_iterations = init_iterations
+        self._rng = np.random.default_rng(seed)
+        
+        self.centroids: Optional[np.ndarray] = None
+        self.counts: np.ndarray = np.zeros(0, dtype=np.int64)
+        
+        # Inputs held back until there are enough to seed from
+        self._buffer: List[np.ndarray] = []
+        self._buffer_texts: List[str] = []
+        
+        # cluster -> min-heap of (similarity, text); keeps the closest inputs
+        self._representatives: List[List[Tuple[float, str]]] = []
+        self.inputs_seen = 0
+    
+    def partial_fit(self, embeddings: np.ndarray, texts: List[str]) -> None:
+        """Fold one batch of input embeddings (one row per text) into the clusters."""
+        if len(embeddings) == 0:
+            return
+        if len(embeddings) != len(texts):
+            raise ValueError("embeddings and texts must have the same length")
+        
+        batch = _normalize(np.asarray(embeddings, dtype=float))
+        self.inputs_seen += len(batch)
+        
+        if self.centroids is not None:
+            self._update(batch, texts)
+            return
+        
+        self._buffer.append(batch)
+        self._buffer_texts.extend(texts)
+        if len(self._buffer_texts) >= self.init_size:
+            self._initialize()
+    
+    def _initialize(self) -> None:
+        """Seed centroids from the buffered inputs, then fold those inputs in."""
+        data = np.vstack(self._buffer)
+        texts = self._buffer_texts
+        self._buffer, self._buffer_texts = [], []
+        
+        # k-means++: each new seed drawn with probability ~ squared distance to the nearest seed
+        centroids = data[self._rng.integers(len(data))][None, :]
+        while len(centroids) < self.n_clusters:
+            distance = 1.0 - (data @ centroids.T).max(axis=1)
+            weights = np.clip(distance, 0.0, None) ** 2
+            if weights.sum() <= 1e-12:
+                # Fewer distinct inputs than clusters
+                break
+            choice = self._rng.choice(len(data), p=weights / weights.sum())
+            centroids = np.vstack([centroids, data[choice]])
+        
+        for _ in range(self.init_iterations):
+            assignments = (data @ centroids.T).argmax(axis=1)
+            for cluster in range(len(centroids)):
+                members = data[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = _normalize(members.mean(axis=0, keepdims=True))[0]
+        
+        self.centroids = centroids
+        self.counts = np.zeros(len(centroids), dtype=np.int64)
+        self._representatives = [[] for _ in range(len(centroids))]
+        self._update(data, texts)
+    
+    def _update(self, batch: np.ndarray, texts: List[str]) -> None:
+        similarities = batch @ self.centroids.T
+        assignments = similarities.argmax(axis=1)
+        assigned_similarity = similarities[np.arange(len(batch)), assignments]
+        
+        # Running mean: c <- (c * n + sum(batch rows in c)) / (n + m)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, assignments, batch)
+        batch_counts = np.bincount(assignments, minlength=len(self.centroids))
+        new_counts = self.counts + batch_counts
+        
+        updated = batch_counts > 0
+        self.centroids[updated] = (
+            self.centroids[updated] * self.counts[updated, None] + sums[updated]
+        ) / new_counts[updated, None]
+        self.counts = new_counts
+        
+        for cluster, similarity, text in zip(assignments, assigned_similarity, texts):
+            heap = self._representatives[cluster]
+            entry = (float(similarity), text)
+            if len(heap) < self.representatives:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+    
+    def clusters(
+        self,
+        min_size: int = 1,
+        category_embeddings: Optional[np.ndarray] = None,
+        category_names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Clusters with at least min_size inputs, largest first
+        
+        When category embeddings are given, each cluster also reports its
+        nearest existing category and the cosine distance to it.
+        """
+        if self.centroids is None:
+            if not self._buffer_texts:
+                return []
+            # Fewer inputs than init_size: cluster what there is
+            self._initialize()
+        
+        centroids = _normalize(self.centroids)
+        
+        nearest = None
+        if category_embeddings is not None and len(category_embeddings) > 0:
+            category_similarity = centroids @ _normalize(np.asarray(category_embeddings, dtype=float)).T
+            nearest = category_similarity.argmax(axis=1)
+            nearest_similarity = category_similarity[np.arange(len(centroids)), nearest]
+        
+        results = []
+        for cluster in np.argsort(-self.counts, kind="stable"):
+            size = int(self.counts[cluster])
+            if size < min_size:
+                continue
+            
+            representatives = [text for _, text in sorted(self._representatives[cluster], reverse=True)]
+            result = {
+                "size": size,
+                "centroid": np.round(centroids[cluster], 6).tolist(),
+                "representative_inputs": representatives,
+                "nearest_category": None,
+                "nearest_category_distance": None
+            }
+            if nearest is not None:
+                index = int(nearest[cluster])
+                result["nearest_category"] = category_names[index] if category_names else index
+                result["nearest_category_distance"] = round(1.0 - float(nearest_similarity[cluster]), 4)
+            
+            results.append(result)
+        
+        return results
@@ -11,9 +11,9 @@ from dataclasses import dataclass, asdict
 from functools import lru_cache
 from openai import OpenAI
 
-from ..config import settings
 from ..utils.logging import structured_logger
 from ..services.openai_cost_tracker import get_cost_tracker
+from ..services.openai_client import get_openai_client
 
 
 @dataclass
@@ -44,12 +44,9 @@ class SentimentAnalyzer:
         self.api_calls = 0
     
     def _initialize_client(self) -> None:
-        """Initialize OpenAI client"""
+        """Attach the shared, pooled OpenAI client"""
         try:
-            if not settings.openai_api_key:
-                raise ValueError("OpenAI API key not found")
-            
-            self.client = OpenAI(api_key=settings.openai_api_key)
+            self.client = get_openai_client()
             self.logger.info("Sentiment analyzer OpenAI client initialized")
             
         except Exception as e:
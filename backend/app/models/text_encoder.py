@@ -7,9 +7,12 @@ from openai import OpenAI
 from sklearn.metrics.pairwise import cosine_similarity
 import logging
 import asyncio
-from ..config import settings
 from ..utils.logging import structured_logger
 from ..services.openai_cost_tracker import get_cost_tracker
+from ..services.openai_client import get_openai_client
+
+# Recorded next to stored embeddings; vectors from different models aren't comparable
+EMBEDDING_MODEL = "text-embedding-3-small"
 
 
 class TextEncoder:
@@ -19,19 +22,16 @@ class TextEncoder:
     
     def __init__(self):
         self.client: Optional[OpenAI] = None
-        self.model_name = "text-embedding-3-small"  # OpenAI's efficient embedding model
+        self.model_name = EMBEDDING_MODEL  # OpenAI's efficient embedding model
         self.vector_dimension = 1536  # OpenAI embedding dimension
         self.logger = structured_logger
         # Initialize OpenAI client immediately since it's lightweight
         self._initialize_client()
     
     def _initialize_client(self) -> None:
-        """Initialize the OpenAI client"""
+        """Attach the shared, pooled OpenAI client"""
         try:
-            if not settings.openai_api_key:
-                raise ValueError("OpenAI API key not found in environment variables")
-            
-            self.client = OpenAI(api_key=settings.openai_api_key)
+            self.client = get_openai_client()
             self.logger.info("OpenAI client initialized successfully")
             
         except Exception as e:
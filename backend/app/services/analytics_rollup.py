@@ -0,0 +1,219 @@
+"""
+Analytics Rollup - Incrementally refreshes the daily tables behind the analytics summary
+
+feedback_daily_rollup and session_activity_daily (alembic revision
+feedback_rollups_001) hold one row per day. Each refresh recomputes only the
+days touched since the previous refresh's high-water mark, so its cost follows
+recent write volume rather than the size of the 30-90 day window the summary
+reports on.
+"""
+from typing import Dict, Any, Optional
+from datetime import timedelta
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from ..db.database import database
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+# Rows written shortly before a refresh can still be in flight (batched
+# interaction writes, open transactions); reopen this much of the past.
+WRITE_LAG = timedelta(minutes=5)
+
+# Sessions are bucketed by the day they started, but their interactions keep
+# arriving afterwards, so session days stay open a day longer.
+SESSION_LAG = timedelta(days=1)
+
+REFRESH_FEEDBACK_QUERY = """
+INSERT INTO feedback_daily_rollup
+(day, total_feedback, accepts, rejects, maybes, irrelevant, rating_sum, rating_count, unique_interactions, refreshed_at)
+SELECT
+    DATE(created_at),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE feedback_type = 'accept'),
+    COUNT(*) FILTER (WHERE feedback_type = 'reject'),
+    COUNT(*) FILTER (WHERE feedback_type = 'maybe'),
+    COUNT(*) FILTER (WHERE feedback_type = 'irrelevant'),
+    COALESCE(SUM(user_rating), 0),
+    COUNT(user_rating),
+    COUNT(DISTINCT interaction_id),
+    NOW()
+FROM category_feedback
+WHERE created_at >= :since
+GROUP BY DATE(created_at)
+ON CONFLICT (day) DO UPDATE SET
+    total_feedback = EXCLUDED.total_feedback,
+    accepts = EXCLUDED.accepts,
+    rejects = EXCLUDED.rejects,
+    maybes = EXCLUDED.maybes,
+    irrelevant = EXCLUDED.irrelevant,
+    rating_sum = EXCLUDED.rating_sum,
+    rating_count = EXCLUDED.rating_count,
+    unique_interactions = EXCLUDED.unique_interactions,
+    refreshed_at = EXCLUDED.refreshed_at
+RETURNING day
+"""
+
+REFRESH_SESSIONS_QUERY = """
+INSERT INTO session_activity_daily
+(day, unique_sessions, total_interactions, session_interactions_sum,
+ processing_time_sum, processing_time_count, refreshed_at)
+SELECT
+    DATE(us.created_at),
+    COUNT(*),
+    COALESCE(SUM(ui.interactions), 0),
+    COALESCE(SUM(us.total_interactions), 0),
+    COALESCE(SUM(ui.processing_time_sum), 0),
+    COALESCE(SUM(ui.processing_time_count), 0),
+    NOW()
+FROM user_sessions us
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) AS interactions,
+           SUM(processing_time_ms) AS processing_time_sum,
+           COUNT(processing_time_ms) AS processing_time_count
+    FROM user_interactions
+    WHERE session_id = us.session_id
+) ui ON TRUE
+WHERE us.created_at >= :since
+GROUP BY DATE(us.created_at)
+ON CONFLICT (day) DO UPDATE SET
+    unique_sessions = EXCLUDED.unique_sessions,
+    total_interactions = EXCLUDED.total_interactions,
+    session_interactions_sum = EXCLUDED.session_interactions_sum,
+    processing_time_sum = EXCLUDED.processing_time_sum,
+    processing_time_count = EXCLUDED.processing_time_count,
+    refreshed_at = EXCLUDED.refreshed_at
+RETURNING day
+"""
+
+# rollup table -> (refresh query, how far before the high-water mark to reopen)
+ROLLUPS = {
+    'feedback_daily_rollup': (REFRESH_FEEDBACK_QUERY, WRITE_LAG),
+    'session_activity_daily': (REFRESH_SESSIONS_QUERY, WRITE_LAG + SESSION_LAG),
+}
+
+
+class AnalyticsRollupRefresher:
+    """
+    Periodic incremental refresh of the analytics rollup tables.
+    
+    Recomputing a day replaces its row, so overlapping or repeated refreshes
+    (several app processes, a retry after failure) are harmless.
+    """
+    
+    def __init__(self, interval: float = 60.0, backfill_days: int = 90):
+        self.interval = interval
+        self.backfill_days = backfill_days
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        
+        # Performance tracking
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.last_days_refreshed: Dict[str, int] = {}
+        self.last_duration_ms = 0.0
+        self.last_refresh_at: Optional[float] = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Refresh now and then every interval on the running event loop."""
+        if self.is_running:
+            return
+        
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Analytics rollup refresher started (every {self.interval}s)")
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("Analytics rollup refresher stopped")
+    
+    async def refresh(self) -> Dict[str, int]:
+        """Recompute every day touched since the last refresh. Returns days refreshed per rollup."""
+        if database is None:
+            return {}
+        
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        
+        async with self._refresh_lock:
+            started = time.monotonic()
+            
+            # Taken before recomputing, so rows landing mid-refresh are picked up next time
+            clock = await database.fetch_one("SELECT LOCALTIMESTAMP AS now")
+            now = clock['now']
+            
+            state_rows = await database.fetch_all("SELECT rollup, refreshed_through FROM analytics_rollup_state")
+            refreshed_through = {row['rollup']: row['refreshed_through'] for row in state_rows}
+            
+            days_refreshed = {}
+            for rollup, (query, lag) in ROLLUPS.items():
+                high_water = refreshed_through.get(rollup) or now - timedelta(days=self.backfill_days)
+                since = (high_water - lag).replace(hour=0, minute=0, second=0, microsecond=0)
+                
+                rows = await database.fetch_all(query, {"since": since})
+                await database.execute(
+                    """
+                    INSERT INTO analytics_rollup_state (rollup, refreshed_through)
+                    VALUES (:rollup, :refreshed_through)
+                    ON CONFLICT (rollup) DO UPDATE SET refreshed_through = EXCLUDED.refreshed_through
+                    """,
+                    {"rollup": rollup, "refreshed_through": now}
+                )
+                days_refreshed[rollup] = len(rows)
+            
+            self.refreshes += 1
+            self.last_days_refreshed = days_refreshed
+            self.last_duration_ms = (time.monotonic() - started) * 1000
+            self.last_refresh_at = time.monotonic()
+            
+            return days_refreshed
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.failed_refreshes += 1
+                logger.error(f"Analytics rollup refresh failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        
+        return {
+            "running": self.is_running,
+            "refreshes": self.refreshes,
+            "failed_refreshes": self.failed_refreshes,
+            "last_days_refreshed": self.last_days_refreshed,
+            "last_duration_ms": round(self.last_duration_ms, 2),
+            "seconds_since_last_refresh": round(now - self.last_refresh_at, 3) if self.last_refresh_at else None,
+            "interval_seconds": self.interval
+        }
+
+
+# Global rollup refresher instance (singleton pattern)
+_analytics_rollup_instance: Optional[AnalyticsRollupRefresher] = None
+
+
+def get_analytics_rollup() -> AnalyticsRollupRefresher:
+    """Get or create the global analytics rollup refresher instance"""
+    global _analytics_rollup_instance
+    
+    if _analytics_rollup_instance is None:
+        _analytics_rollup_instance = AnalyticsRollupRefresher(
+            interval=settings.analytics_refresh_interval_seconds
+        )
+    
+    return _analytics_rollup_instance
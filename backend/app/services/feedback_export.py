@@ -0,0 +1,305 @@
+"""
+Feedback Export - Streams category_feedback joined with user_interactions
+
+Rows are read in keyset-paginated batches ordered by (created_at, id), each
+batch through a server-side cursor, and encoded incrementally as gzip CSV,
+Parquet (one row group per batch) or an Arrow IPC stream. Memory stays at one
+batch regardless of export size.
+
+Every row carries its feedback created_at and id, so an interrupted export
+resumes from the cursor of the last row received (see encode_cursor).
+Parquet and Arrow output need pyarrow.
+"""
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Callable
+from datetime import datetime
+from decimal import Decimal
+import csv
+import io
+import logging
+import uuid
+import zlib
+
+from ..db.database import database
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'csv': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+EXPORT_EXTENSIONS = {
+    'csv': 'csv.gz',
+    'parquet': 'parquet',
+    'arrow': 'arrows',
+}
+
+# (output column, select expression, arrow type name)
+EXPORT_COLUMNS = [
+    ('feedback_id', 'cf.id', 'string'),
+    ('feedback_created_at', 'cf.created_at', 'timestamp'),
+    ('interaction_id', 'cf.interaction_id', 'string'),
+    ('category_id', 'cf.category_id', 'int32'),
+    ('category_name', 'cf.category_name', 'string'),
+    ('feedback_type', 'cf.feedback_type', 'string'),
+    ('confidence_score', 'cf.confidence_score', 'float64'),
+    ('similarity_score', 'cf.similarity_score', 'float64'),
+    ('user_rating', 'cf.user_rating', 'int32'),
+    ('feedback_reason', 'cf.feedback_reason', 'string'),
+    ('overall_satisfaction', "(cf.feedback_metadata->>'overall_satisfaction')::int", 'int32'),
+    ('session_id', 'ui.session_id', 'string'),
+    ('interaction_type', 'ui.interaction_type', 'string'),
+    ('user_input', 'ui.user_input', 'string'),
+    ('processing_time_ms', 'ui.processing_time_ms', 'int32'),
+    ('interaction_created_at', 'ui.created_at', 'timestamp'),
+]
+
+COLUMN_NAMES = [name for name, _, _ in EXPORT_COLUMNS]
+
+DEFAULT_BATCH_SIZE = 10000
+
+Cursor = Tuple[datetime, str]
+
+
+def encode_cursor(created_at: datetime, feedback_id: Any) -> str:
+    """Resume token for the row after (created_at, feedback_id)."""
+    return f"{created_at.isoformat()}|{feedback_id}"
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        created_at, feedback_id = cursor.split("|", 1)
+        return datetime.fromisoformat(created_at), str(uuid.UUID(feedback_id))
+    except ValueError:
+        raise ValueError(f"Invalid export cursor '{cursor}', expected '<created_at ISO>|<feedback id>'")
+
+
+def _export_value(value: Any) -> Any:
+    """Plain Python value for the encoders (asyncpg returns UUIDs and Decimals)."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class FeedbackExporter:
+    """Keyset-paginated, constant-memory export of feedback with its interaction."""
+    
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+    
+    async def iter_batches(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        max_rows: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield batches of export rows in (feedback_created_at, feedback_id) order."""
+        if database is None:
+            raise RuntimeError("Database not available")
+        
+        after = decode_cursor(cursor) if cursor else None
+        remaining = max_rows
+        
+        while remaining is None or remaining > 0:
+            limit = self.batch_size if remaining is None else min(self.batch_size, remaining)
+            query, values = self._batch_query(since, until, after, limit)
+            
+            batch = []
+            async for row in database.iterate(query, values):
+                batch.append({name: _export_value(row[name]) for name in COLUMN_NAMES})
+            
+            if not batch:
+                return
+            
+            yield batch
+            
+            last = batch[-1]
+            after = (last['feedback_created_at'], last['feedback_id'])
+            if remaining is not None:
+                remaining -= len(batch)
+            if len(batch) < limit:
+                return
+    
+    def _batch_query(
+        self,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        after: Optional[Cursor],
+        limit: int
+    ) -> Tuple[str, Dict[str, Any]]:
+        conditions = []
+        values: Dict[str, Any] = {"limit": limit}
+        
+        if since is not None:
+            conditions.append("cf.created_at >= :since")
+            values["since"] = since
+        if until is not None:
+            conditions.append("cf.created_at < :until")
+            values["until"] = until
+        if after is not None:
+            conditions.append("(cf.created_at, cf.id) > (:after_created_at, CAST(:after_id AS UUID))")
+            values["after_created_at"], values["after_id"] = after
+        
+        select = ",\n            ".join(f"{expression} as {name}" for name, expression, _ in EXPORT_COLUMNS)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        query = f"""
+        SELECT
+            {select}
+        FROM category_feedback cf
+        LEFT JOIN user_interactions ui ON ui.id = cf.interaction_id
+        {where}
+        ORDER BY cf.created_at, cf.id
+        LIMIT :limit
+        """
+        
+        return query, values
+    
+    def stream(
+        self,
+        export_format: str = "csv",
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        max_rows: Optional[int] = None,
+        on_batch: Optional[Callable[[int, str], None]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Encoded export, one chunk per batch
+        
+        Arguments are validated here, before the first byte is produced, so
+        callers can still turn a ValueError into an error response. on_batch
+        is called with each batch's row count and the cursor after it.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{export_format}', expected one of {', '.join(EXPORT_FORMATS)}")
+        if cursor:
+            decode_cursor(cursor)
+        
+        encoder = _CsvEncoder() if export_format == "csv" else _ArrowEncoder(export_format)
+        return self._encode(encoder, export_format, since, until, cursor, max_rows, on_batch)
+    
+    async def _encode(self, encoder, export_format, since, until, cursor, max_rows, on_batch) -> AsyncIterator[bytes]:
+        rows = 0
+        chunk = encoder.header()
+        if chunk:
+            yield chunk
+        
+        async for batch in self.iter_batches(since, until, cursor, max_rows):
+            rows += len(batch)
+            chunk = encoder.encode(batch)
+            if on_batch is not None:
+                last = batch[-1]
+                on_batch(len(batch), encode_cursor(last['feedback_created_at'], last['feedback_id']))
+            if chunk:
+                yield chunk
+        
+        yield encoder.close()
+        
+        logger.info(f"Exported {rows} feedback rows as {export_format}")
+
+
+class _CsvEncoder:
+    """Gzip-compressed CSV, compressed incrementally."""
+    
+    def __init__(self):
+        # wbits 31: gzip container
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    
+    def _rows(self, rows: List[List[Any]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return self._compressor.compress(buffer.getvalue().encode("utf-8"))
+    
+    def header(self) -> bytes:
+        return self._rows([COLUMN_NAMES])
+    
+    def encode(self, batch: List[Dict[str, Any]]) -> bytes:
+        return self._rows([
+            [row[name].isoformat() if isinstance(row[name], datetime) else row[name] for name in COLUMN_NAMES]
+            for row in batch
+        ])
+    
+    def close(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents are handed out and dropped per batch."""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class _ArrowEncoder:
+    """Parquet (one row group per batch) or Arrow IPC stream (one record batch per batch)."""
+    
+    def __init__(self, export_format: str):
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError(f"{export_format} export needs pyarrow; use csv or install pyarrow")
+        
+        self._pa = pyarrow
+        types = {
+            'string': pyarrow.string(),
+            'int32': pyarrow.int32(),
+            'float64': pyarrow.float64(),
+            'timestamp': pyarrow.timestamp('us'),
+        }
+        self._schema = pyarrow.schema([(name, types[type_name]) for name, _, type_name in EXPORT_COLUMNS])
+        
+        self._sink = _DrainableSink()
+        if export_format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(self._sink, self._schema, compression="zstd")
+        else:
+            self._writer = pyarrow.ipc.new_stream(self._sink, self._schema)
+    
+    def header(self) -> bytes:
+        return self._sink.drain()
+    
+    def encode(self, batch: List[Dict[str, Any]]) -> bytes:
+        table = self._pa.Table.from_pylist(batch, schema=self._schema)
+        self._writer.write_table(table)
+        return self._sink.drain()
+    
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+# Global exporter instance (singleton pattern)
+_feedback_exporter_instance: Optional[FeedbackExporter] = None
+
+
+def get_feedback_exporter() -> FeedbackExporter:
+    """Get or create the global feedback exporter instance"""
+    global _feedback_exporter_instance
+    
+    if _feedback_exporter_instance is None:
+        _feedback_exporter_instance = FeedbackExporter()
+    
+    return _feedback_exporter_instance
@@ -2,16 +2,21 @@
 User Feedback Collection Service
 Handles session management, interaction tracking, and feedback collection
 """
+import asyncio
 import json
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from fastapi import Request, HTTPException
 import hashlib
 import time
+import numpy as np
 
 from ..config import settings
 from ..db.database import database
+from ..models.category_cooccurrence import PairCounts, feedback_pair_counts, get_category_cooccurrence
+from ..utils.embeddings import pack_embedding
+from ..utils.ids import uuid7
 from ..utils.logging import structured_logger
 
 logger = structured_logger
@@ -32,32 +37,21 @@ class UserSession:
         return hashlib.md5(session_data.encode()).hexdigest()
     
     async def create_or_update_session(self) -> str:
-        """Create new session or update existing one."""
+        """
+        Record activity for this session.
+        
+        The session row is inserted the first time this process sees it;
+        activity and interaction counts are then batched by the session
+        tracker and flushed in the background.
+        """
         if database is None:
             logger.warning("Database not available - using session ID without persistence")
             return self.session_id
             
         try:
-            query = """
-            INSERT INTO user_sessions (session_id, user_ip, user_agent, last_activity)
-            VALUES (:session_id, :user_ip, :user_agent, NOW())
-            ON CONFLICT (session_id) 
-            DO UPDATE SET 
-                last_activity = NOW(),
-                total_interactions = user_sessions.total_interactions + 1
-            RETURNING id, session_id
-            """
+            from .session_tracker import get_session_tracker
             
-            # Use dictionary mapping for parameters (SQLAlchemy requirement)
-            values = {
-                "session_id": self.session_id,
-                "user_ip": self.user_ip, 
-                "user_agent": self.user_agent
-            }
-            
-            result = await database.fetch_one(query, values)
-            
-            logger.info(f"Session created/updated: {self.session_id}")
+            await get_session_tracker().record_activity(self.session_id, self.user_ip, self.user_agent)
             return self.session_id
             
         except Exception as e:
@@ -66,7 +60,12 @@ class UserSession:
 
 
 class InteractionTracker:
-    """Tracks user interactions with the AI system."""
+    """
+    Tracks user interactions with the AI system.
+    
+    Interaction ids are assigned here and returned immediately; the rows are
+    written in batches by the background interaction writer.
+    """
     
     async def track_category_matching(
         self, 
@@ -74,22 +73,16 @@ class InteractionTracker:
         user_input: str, 
         matches: List[Dict[str, Any]],
         processing_time: int,
-        original_query: Optional[str] = None
+        original_query: Optional[str] = None,
+        input_embedding: Optional[np.ndarray] = None,
+        embedding_model: Optional[str] = None
     ) -> str:
-        """Track a category matching interaction."""
+        """Track a category matching interaction, storing the input embedding when given."""
         
         if database is None:
             logger.warning("Database not available - skipping interaction tracking")
             return str(uuid.uuid4())  # Return a fake interaction ID
         try:
-            # Create interaction record
-            interaction_query = """
-            INSERT INTO user_interactions 
-            (session_id, interaction_type, user_input, original_query, processing_time_ms, interaction_metadata)
-            VALUES (:session_id, 'category_matching', :user_input, :original_query, :processing_time, :metadata)
-            RETURNING id
-            """
-            
             metadata = {
                 'matches_count': len(matches),
                 'top_match': matches[0] if matches else None,
@@ -104,18 +97,16 @@ class InteractionTracker:
                 ]
             }
             
-            interaction = await database.fetch_one(
-                interaction_query, 
-                {
-                    "session_id": session_id,
-                    "user_input": user_input,
-                    "original_query": original_query or user_input,
-                    "processing_time": processing_time,
-                    "metadata": json.dumps(metadata)
-                }
+            interaction_id = self._queue_interaction(
+                session_id=session_id,
+                interaction_type='category_matching',
+                user_input=user_input,
+                original_query=original_query or user_input,
+                processing_time=processing_time,
+                metadata=metadata,
+                input_embedding=input_embedding,
+                embedding_model=embedding_model
             )
-            
-            interaction_id = str(interaction['id'])
             logger.info(f"Tracked category matching interaction: {interaction_id}")
             return interaction_id
             
@@ -138,13 +129,6 @@ class InteractionTracker:
             return str(uuid.uuid4())  # Return a fake interaction ID
         
         try:
-            interaction_query = """
-            INSERT INTO user_interactions 
-            (session_id, interaction_type, user_input, processing_time_ms, interaction_metadata)
-            VALUES (:session_id, 'refinement', :user_input, :processing_time, :metadata)
-            RETURNING id
-            """
-            
             metadata = {
                 'rejected_categories': rejected_categories,
                 'new_matches_count': len(new_matches),
@@ -159,23 +143,51 @@ class InteractionTracker:
                 ]
             }
             
-            interaction = await database.fetch_one(
-                interaction_query,
-                {
-                    "session_id": session_id,
-                    "user_input": user_input,
-                    "processing_time": processing_time,
-                    "metadata": json.dumps(metadata)
-                }
+            interaction_id = self._queue_interaction(
+                session_id=session_id,
+                interaction_type='refinement',
+                user_input=user_input,
+                original_query=None,
+                processing_time=processing_time,
+                metadata=metadata
             )
-            
-            interaction_id = str(interaction['id'])
             logger.info(f"Tracked refinement interaction: {interaction_id}")
             return interaction_id
             
         except Exception as e:
             logger.error(f"Failed to track refinement: {str(e)}")
             raise HTTPException(status_code=500, detail="Refinement tracking failed")
+    
+    def _queue_interaction(
+        self,
+        session_id: str,
+        interaction_type: str,
+        user_input: str,
+        original_query: Optional[str],
+        processing_time: int,
+        metadata: Dict[str, Any],
+        input_embedding: Optional[np.ndarray] = None,
+        embedding_model: Optional[str] = None
+    ) -> str:
+        """Assign an id and hand the row to the background writer."""
+        from .interaction_writer import get_interaction_writer
+        
+        interaction_id = str(uuid7())
+        get_interaction_writer().submit({
+            "id": interaction_id,
+            # Fixed at queue time so a retried batch hits the same partition key
+            "created_at": datetime.utcnow(),
+            "session_id": session_id,
+            "interaction_type": interaction_type,
+            "user_input": user_input,
+            "original_query": original_query,
+            "processing_time_ms": processing_time,
+            "interaction_metadata": json.dumps(metadata),
+            "input_embedding": pack_embedding(input_embedding),
+            "embedding_model": embedding_model if input_embedding is not None else None
+        })
+        
+        return interaction_id
 
 
 class FeedbackCollector:
@@ -196,33 +208,46 @@ class FeedbackCollector:
             return {"status": "skipped", "message": "Database not available"}
         
         try:
-            # Verify interaction exists
+            # Feedback can arrive before the batched interaction insert lands
+            from .interaction_writer import get_interaction_writer
+            interaction_writer = get_interaction_writer()
+            if not await interaction_writer.wait_until_written(interaction_id):
+                # Not a missing interaction: its write is delayed or failed, so the client should retry
+                raise HTTPException(
+                    status_code=503,
+                    detail="Interaction is still being recorded, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            
+            # Fetch the interaction once and index its stored matches by category
             interaction = await self._get_interaction(interaction_id)
             if not interaction:
+                if interaction_writer.may_be_queued_elsewhere(interaction_id):
+                    # Tracked by another worker whose batch has not landed yet
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Interaction is still being recorded, please retry",
+                        headers={"Retry-After": "1"}
+                    )
                 raise HTTPException(status_code=404, detail="Interaction not found")
             
-            feedback_records = []
+            match_index = self._index_match_details(interaction)
+            pair_counts = feedback_pair_counts(category_feedbacks)
             
-            for feedback in category_feedbacks:
-                # Get original match data from interaction metadata
-                match_data = await self._get_match_data_from_interaction(
-                    interaction_id, 
-                    feedback['category_id']
-                )
-                
-                # Store feedback
-                feedback_record = await self._store_category_feedback(
+            # Store all feedback rows and bump the daily and pair counters in one transaction
+            async with database.transaction():
+                feedback_records = await self._store_category_feedbacks(
                     interaction_id=interaction_id,
-                    category_feedback=feedback,
-                    match_data=match_data,
+                    category_feedbacks=category_feedbacks,
+                    match_index=match_index,
                     overall_satisfaction=overall_satisfaction,
                     additional_comments=additional_comments
                 )
+                await self._upsert_daily_counters(category_feedbacks, match_index)
+                await self._upsert_cooccurrence(pair_counts)
                 
-                feedback_records.append(feedback_record)
-            
-            # Update category performance metrics (legacy method)
-            await self._update_category_metrics(category_feedbacks)
+            # Committed: apply the same increments to this process's in-memory matrices
+            get_category_cooccurrence().record(pair_counts)
             
             # Trigger learning service to update metrics
             await self._trigger_learning_updates(category_feedbacks)
@@ -255,179 +280,301 @@ class FeedbackCollector:
         """
         return await database.fetch_one(query, {"interaction_id": interaction_id})
     
-    async def _get_match_data_from_interaction(
-        self, 
-        interaction_id: str, 
-        category_id: int
-    ) -> Dict[str, Any]:
-        """Extract match data for specific category from interaction metadata."""
-        interaction = await self._get_interaction(interaction_id)
+    def _index_match_details(self, interaction: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """
+        Map category_id -> stored match data for an interaction.
         
-        if not interaction or not interaction['interaction_metadata']:
+        The rank is the 1-based position in the stored match_details, which
+        preserves the order the matches were served in.
+        """
+        raw_metadata = interaction['interaction_metadata']
+        if not raw_metadata:
             return {}
         
-        metadata = json.loads(interaction['interaction_metadata'])
+        metadata = json.loads(raw_metadata) if isinstance(raw_metadata, str) else raw_metadata
         match_details = metadata.get('match_details', [])
         
-        # Find the specific category match
-        for match in match_details:
-            if match.get('category_id') == category_id:
-                return match
+        match_index = {}
+        for rank, match in enumerate(match_details, start=1):
+            category_id = match.get('category_id')
+            if category_id is not None and category_id not in match_index:
+                match_index[category_id] = {**match, 'rank': rank}
         
-        return {}
+        return match_index
     
-    async def _store_category_feedback(
-        self,
-        interaction_id: str,
-        category_feedback: Dict[str, Any],
-        match_data: Dict[str, Any],
+    async def _store_category_feedbacks(
+        self, 
+        interaction_id: str, 
+        category_feedbacks: List[Dict[str, Any]],
+        match_index: Dict[int, Dict[str, Any]],
         overall_satisfaction: Optional[int],
         additional_comments: Optional[str]
-    ) -> Dict[str, Any]:
-        """Store individual category feedback."""
+    ) -> List[Dict[str, Any]]:
+        """Store all category feedback for an interaction with one multi-row INSERT."""
+        if not category_feedbacks:
+            return []
         
-        feedback_query = """
+        rows = []
+        values: Dict[str, Any] = {"interaction_id": interaction_id}
+        
+        for i, category_feedback in enumerate(category_feedbacks):
+            match_data = match_index.get(category_feedback['category_id'], {})
+            
+            feedback_metadata = {
+                'overall_satisfaction': overall_satisfaction,
+                'has_comments': bool(additional_comments),
+                'additional_comments': additional_comments,
+                'original_confidence': match_data.get('confidence_score'),
+                'original_similarity': match_data.get('similarity_score'),
+                'match_rank': match_data.get('rank')
+            }
+            
+            rows.append(
+                f"(:id_{i}, :interaction_id, :category_id_{i}, :category_name_{i}, :feedback_type_{i}, "
+                f":confidence_score_{i}, :similarity_score_{i}, :user_rating_{i}, "
+                f":feedback_reason_{i}, :feedback_metadata_{i})"
+            )
+            values.update({
+                f"id_{i}": str(uuid7()),
+                f"category_id_{i}": category_feedback['category_id'],
+                f"category_name_{i}": category_feedback.get('category_name') or match_data.get('category_name') or 'Unknown',
+                f"feedback_type_{i}": category_feedback['feedback_type'],
+                f"user_rating_{i}": category_feedback.get('user_rating'),
+                f"feedback_reason_{i}": category_feedback.get('feedback_reason'),
+                f"confidence_score_{i}": match_data.get('confidence_score') or 0.0,
+                f"similarity_score_{i}": match_data.get('similarity_score') or 0.0,
+                f"feedback_metadata_{i}": json.dumps(feedback_metadata)
+            })
+        
+        feedback_query = f"""
         INSERT INTO category_feedback 
-        (interaction_id, category_id, category_name, feedback_type, 
+        (id, interaction_id, category_id, category_name, feedback_type, 
          confidence_score, similarity_score, user_rating, feedback_reason, feedback_metadata)
-        VALUES (:interaction_id, :category_id, :category_name, :feedback_type, 
-         :confidence_score, :similarity_score, :user_rating, :feedback_reason, :feedback_metadata)
+        VALUES {', '.join(rows)}
         RETURNING id, created_at
         """
         
-        feedback_metadata = {
-            'overall_satisfaction': overall_satisfaction,
-            'has_comments': bool(additional_comments),
-            'additional_comments': additional_comments,
-            'original_confidence': match_data.get('confidence_score'),
-            'original_similarity': match_data.get('similarity_score'),
-            'match_rank': self._get_match_rank(match_data, category_feedback['category_id'])
-        }
+        return await database.fetch_all(feedback_query, values)
         
-        return await database.fetch_one(
-            feedback_query,
-            {
-                "interaction_id": interaction_id,
-                "category_id": category_feedback['category_id'],
-                "category_name": category_feedback.get('category_name', 'Unknown'),
-                "feedback_type": category_feedback['feedback_type'],
-                "user_rating": category_feedback.get('user_rating'),
-                "feedback_reason": category_feedback.get('feedback_reason'),
-                "confidence_score": match_data.get('confidence_score', 0.0),
-                "similarity_score": match_data.get('similarity_score', 0.0),
-                "feedback_metadata": json.dumps(feedback_metadata)
-            }
-        )
+    async def _upsert_daily_counters(
+        self,
+        category_feedbacks: List[Dict[str, Any]],
+        match_index: Dict[int, Dict[str, Any]]
+    ):
+        """
+        Add this submission to the per-day counters in category_feedback_daily.
     
-    def _get_match_rank(self, match_data: Dict[str, Any], category_id: int) -> int:
-        """Determine the rank of this category in the original matches."""
-        # This would need to be enhanced to track actual ranking
-        return 1  # Placeholder
+        Counts are summed per category in Python first, so the whole
+        submission is one multi-row upsert keyed by (category_id, day).
+        """
+        counters: Dict[int, Dict[str, Any]] = {}
     
-    async def _update_category_metrics(self, feedbacks: List[Dict[str, Any]]):
-        """Update category performance based on feedback."""
-        
-        for feedback in feedbacks:
+        for feedback in category_feedbacks:
             category_id = feedback['category_id']
+            feedback_type = feedback['feedback_type']
+            confidence = float(match_index.get(category_id, {}).get('confidence_score') or 0.0)
+        
+            counter = counters.setdefault(category_id, {
+                'accept': 0, 'reject': 0, 'maybe': 0, 'irrelevant': 0,
+                'confidence_sum': 0.0, 'success_confidence_sum': 0.0,
+                'rating_sum': 0, 'rating_count': 0
+            })
+            counter[feedback_type] += 1
+            counter['confidence_sum'] += confidence
+            if feedback_type in ('accept', 'maybe'):
+                counter['success_confidence_sum'] += confidence
+            if feedback.get('user_rating') is not None:
+                counter['rating_sum'] += feedback['user_rating']
+                counter['rating_count'] += 1
             
-            # Calculate new success rate for the category
-            success_query = """
-            WITH feedback_stats AS (
-                SELECT 
-                    category_id,
-                    COUNT(*) as total_feedback,
-                    COUNT(*) FILTER (WHERE feedback_type IN ('accept', 'maybe')) as positive_feedback,
-                    AVG(user_rating) as avg_rating
-                FROM category_feedback 
-                WHERE category_id = :category_id 
-                AND created_at > NOW() - INTERVAL '30 days'
-                GROUP BY category_id
+        if not counters:
+            return
+        
+        rows = []
+        values: Dict[str, Any] = {}
+        
+        for i, (category_id, counter) in enumerate(counters.items()):
+            rows.append(
+                f"(:category_id_{i}, CURRENT_DATE, :accept_{i}, :reject_{i}, :maybe_{i}, :irrelevant_{i}, "
+                f":confidence_sum_{i}, :success_confidence_sum_{i}, :rating_sum_{i}, :rating_count_{i})"
             )
-            SELECT total_feedback, positive_feedback, avg_rating
-            FROM feedback_stats
-            """
-            
-            stats = await database.fetch_one(success_query, {"category_id": category_id})
+            values[f"category_id_{i}"] = category_id
+            values.update({f"{key}_{i}": value for key, value in counter.items()})
             
-            if stats and stats['total_feedback'] > 0:
-                success_rate = stats['positive_feedback'] / stats['total_feedback']
-                
-                # Store daily metric
-                await self._store_daily_metric(
-                    category_id=category_id,
-                    metric_type='success_rate',
-                    metric_value=success_rate,
-                    sample_size=stats['total_feedback']
-                )
-                
-                # Store user satisfaction metric
-                if stats['avg_rating']:
-                    await self._store_daily_metric(
-                        category_id=category_id,
-                        metric_type='user_satisfaction',
-                        metric_value=float(stats['avg_rating']),
-                        sample_size=stats['total_feedback']
-                    )
+        upsert_query = f"""
+        INSERT INTO category_feedback_daily 
+        (category_id, day, accept_count, reject_count, maybe_count, irrelevant_count,
+         confidence_sum, success_confidence_sum, rating_sum, rating_count)
+        VALUES {', '.join(rows)}
+        ON CONFLICT (category_id, day) DO UPDATE SET
+            accept_count = category_feedback_daily.accept_count + EXCLUDED.accept_count,
+            reject_count = category_feedback_daily.reject_count + EXCLUDED.reject_count,
+            maybe_count = category_feedback_daily.maybe_count + EXCLUDED.maybe_count,
+            irrelevant_count = category_feedback_daily.irrelevant_count + EXCLUDED.irrelevant_count,
+            confidence_sum = category_feedback_daily.confidence_sum + EXCLUDED.confidence_sum,
+            success_confidence_sum = category_feedback_daily.success_confidence_sum + EXCLUDED.success_confidence_sum,
+            rating_sum = category_feedback_daily.rating_sum + EXCLUDED.rating_sum,
+            rating_count = category_feedback_daily.rating_count + EXCLUDED.rating_count,
+            updated_at = NOW()
+        """
+        
+        await database.execute(upsert_query, values)
     
     async def _trigger_learning_updates(self, category_feedbacks: List[Dict[str, Any]]):
         """
-        Trigger learning service to update category metrics.
+        Queue learning metric updates for the categories that received feedback.
         
-        This is called after feedback is submitted to update:
+        The background learning worker coalesces repeated categories and
+        recomputes them in bulk, so the submission returns as soon as the
+        feedback rows are durable:
         - Success rates
         - Confidence scores
         - User satisfaction ratings
         """
         try:
-            from .learning_service import get_learning_service
+            from .learning_worker import get_learning_worker
             
-            learning_service = get_learning_service()
+            category_ids = [feedback['category_id'] for feedback in category_feedbacks]
+            get_learning_worker().enqueue(category_ids)
             
-            # Update metrics for each category that received feedback
-            for feedback in category_feedbacks:
-                await learning_service.update_category_metrics(
-                    category_id=feedback['category_id'],
-                    feedback_type=feedback['feedback_type'],
-                    confidence_score=feedback.get('confidence_score', 0.0),
-                    user_rating=feedback.get('user_rating')
-                )
-                
-            logger.info(f"Learning updates triggered for {len(category_feedbacks)} categories")
+            logger.info(f"Learning updates queued for {len(set(category_ids))} categories")
             
         except Exception as e:
             # Don't fail the feedback submission if learning update fails
             logger.warning(f"Learning update failed (non-critical): {str(e)}")
     
-    async def _store_daily_metric(
-        self,
-        category_id: int,
-        metric_type: str,
-        metric_value: float,
-        sample_size: int
-    ):
-        """Store or update daily metric for a category."""
-        
-        # Simple insert - ON CONFLICT removed because constraint doesn't exist yet
-        # TODO: Add unique constraint on (category_id, metric_type, DATE(calculated_at)) in Phase 2
-        metric_query = """
-        INSERT INTO learning_metrics 
-        (category_id, metric_type, metric_value, sample_size, time_period, calculated_at)
-        VALUES (:category_id, :metric_type, :metric_value, :sample_size, 'daily', NOW())
+    async def _upsert_cooccurrence(self, pair_counts: PairCounts):
+        """Add this submission's category pair counts to category_cooccurrence in one upsert."""
+        if not pair_counts:
+            return
+        
+        rows = []
+        values: Dict[str, Any] = {}
+        
+        for i, ((category_a, category_b), (co_accepts, co_rejects, substitutions)) in enumerate(pair_counts.items()):
+            rows.append(f"(:category_a_{i}, :category_b_{i}, :co_accepts_{i}, :co_rejects_{i}, :substitutions_{i})")
+            values.update({
+                f"category_a_{i}": category_a,
+                f"category_b_{i}": category_b,
+                f"co_accepts_{i}": co_accepts,
+                f"co_rejects_{i}": co_rejects,
+                f"substitutions_{i}": substitutions
+            })
+        
+        upsert_query = f"""
+        INSERT INTO category_cooccurrence 
+        (category_a, category_b, co_accepts, co_rejects, substitutions)
+        VALUES {', '.join(rows)}
+        ON CONFLICT (category_a, category_b) DO UPDATE SET
+            co_accepts = category_cooccurrence.co_accepts + EXCLUDED.co_accepts,
+            co_rejects = category_cooccurrence.co_rejects + EXCLUDED.co_rejects,
+            substitutions = category_cooccurrence.substitutions + EXCLUDED.substitutions,
+            updated_at = NOW()
         """
         
-        await database.execute(
-            metric_query,
-            {
-                "category_id": category_id,
-                "metric_type": metric_type,
-                "metric_value": metric_value,
-                "sample_size": sample_size
-            }
-        )
+        await database.execute(upsert_query, values)
 
 
 class FeedbackAnalytics:
-    """Analytics and insights from feedback data."""
+    """
+    Analytics and insights from feedback data.
+    
+    Reads the daily rollup tables (category_feedback_daily,
+    feedback_daily_rollup, session_activity_daily) rather than raw events,
+    and caches the assembled summary for a short TTL. The summary can lag
+    live data by at most the rollup refresh interval plus that TTL.
+    """
+    
+    def __init__(self, cache_ttl: Optional[float] = None):
+        self.cache_ttl = settings.analytics_cache_ttl_seconds if cache_ttl is None else cache_ttl
+        
+        # days -> (monotonic time built, summary)
+        self._summary_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._summary_locks: Dict[int, asyncio.Lock] = {}
+    
+    async def get_summary(self, days: int = 30) -> Dict[str, Any]:
+        """Full analytics summary for the admin dashboard, served from cache when fresh."""
+        cached = self._summary_cache.get(days)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+        
+        # One rebuild per window; concurrent callers wait for it instead of piling on
+        lock = self._summary_locks.setdefault(days, asyncio.Lock())
+        async with lock:
+            cached = self._summary_cache.get(days)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1]
+            
+            category_performance, feedback_trends, session_activity, learning_insights = await asyncio.gather(
+                self.get_category_performance_summary(days),
+                self.get_feedback_trends(days),
+                self.get_session_activity(days),
+                self.get_learning_insights(days)
+            )
+            
+            with_feedback = [c for c in category_performance if c['total_feedback'] > 0]
+            summary = {
+                "period_days": days,
+                "generated_at": datetime.utcnow().isoformat(),
+                "category_performance": category_performance,
+                "feedback_trends": feedback_trends,
+                "session_activity": session_activity,
+                "learning_insights": learning_insights,
+                "summary": {
+                    "total_categories_with_feedback": len(with_feedback),
+                    "avg_acceptance_rate": sum(c['acceptance_rate'] for c in with_feedback) / max(len(with_feedback), 1),
+                    "total_feedback_items": sum(c['total_feedback'] for c in category_performance),
+                    "categories_needing_attention": len([c for c in category_performance if c['acceptance_rate'] < 50 and c['total_feedback'] >= 5])
+                }
+            }
+            
+            self._summary_cache[days] = (time.monotonic(), summary)
+            return summary
+    
+    async def _category_performance(
+        self,
+        days: int,
+        min_feedback: int = 1,
+        max_acceptance_rate: Optional[float] = None,
+        order_by: str = "acceptance_rate DESC, total_feedback DESC",
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Per-category totals over the window, summed from the per-day counters."""
+        having = ["SUM(d.accept_count + d.reject_count + d.maybe_count + d.irrelevant_count) >= :min_feedback"]
+        values: Dict[str, Any] = {"min_feedback": min_feedback}
+        
+        if max_acceptance_rate is not None:
+            having.append(
+                "100.0 * SUM(d.accept_count) < :max_acceptance_rate"
+                " * SUM(d.accept_count + d.reject_count + d.maybe_count + d.irrelevant_count)"
+            )
+            values["max_acceptance_rate"] = max_acceptance_rate
+        
+        query = """
+        SELECT 
+            d.category_id,
+            COALESCE(MAX(pc.name), 'Category ' || d.category_id) as category_name,
+            SUM(d.accept_count + d.reject_count + d.maybe_count + d.irrelevant_count) as total_feedback,
+            SUM(d.accept_count) as accepts,
+            SUM(d.reject_count) as rejects,
+            SUM(d.maybe_count) as maybes,
+            SUM(d.irrelevant_count) as irrelevant,
+            ROUND(100.0 * SUM(d.accept_count) / SUM(d.accept_count + d.reject_count + d.maybe_count + d.irrelevant_count), 2)::float as acceptance_rate,
+            SUM(d.confidence_sum) / SUM(d.accept_count + d.reject_count + d.maybe_count + d.irrelevant_count) as avg_confidence,
+            SUM(d.rating_sum)::float / NULLIF(SUM(d.rating_count), 0) as avg_rating
+        FROM category_feedback_daily d
+        LEFT JOIN political_categories pc ON pc.id = d.category_id
+        WHERE d.day > CURRENT_DATE - %s
+        GROUP BY d.category_id
+        HAVING %s
+        ORDER BY %s
+        """ % (days, " AND ".join(having), order_by)
+        
+        if limit is not None:
+            query += "LIMIT %s" % limit
+        
+        results = await database.fetch_all(query, values)
+        return [dict(row) for row in results]
     
     async def get_category_performance_summary(self, days: int = 30) -> List[Dict[str, Any]]:
         """Get category performance summary."""
@@ -436,14 +583,7 @@ class FeedbackAnalytics:
             logger.warning("Database not available - returning empty performance summary")
             return []
         
-        query = """
-        SELECT * FROM category_performance_summary
-        WHERE total_feedback > 0
-        ORDER BY acceptance_rate DESC, total_feedback DESC
-        """
-        
-        results = await database.fetch_all(query)
-        return [dict(row) for row in results]
+        return await self._category_performance(days)
     
     async def get_feedback_trends(self, days: int = 30) -> List[Dict[str, Any]]:
         """Get daily feedback trends."""
@@ -453,9 +593,18 @@ class FeedbackAnalytics:
             return []
         
         query = """
-        SELECT * FROM daily_feedback_trends
-        WHERE feedback_date > NOW() - INTERVAL '%s days'
-        ORDER BY feedback_date DESC
+        SELECT 
+            day as feedback_date,
+            total_feedback,
+            accepts,
+            rejects,
+            maybes,
+            irrelevant,
+            rating_sum::float / NULLIF(rating_count, 0) as avg_rating,
+            unique_interactions
+        FROM feedback_daily_rollup
+        WHERE day > CURRENT_DATE - %s
+        ORDER BY day DESC
         """ % days
         
         results = await database.fetch_all(query)
@@ -464,53 +613,68 @@ class FeedbackAnalytics:
     async def get_session_activity(self, days: int = 30) -> List[Dict[str, Any]]:
         """Get session activity summary."""
         
+        if database is None:
+            logger.warning("Database not available - returning empty session activity")
+            return []
+        
         query = """
-        SELECT * FROM session_activity_summary
-        WHERE session_date > NOW() - INTERVAL '%s days'
-        ORDER BY session_date DESC
+        SELECT 
+            day as session_date,
+            unique_sessions,
+            total_interactions,
+            session_interactions_sum::float / NULLIF(unique_sessions, 0) as avg_interactions_per_session,
+            processing_time_sum::float / NULLIF(processing_time_count, 0) as avg_processing_time_ms
+        FROM session_activity_daily
+        WHERE day > CURRENT_DATE - %s
+        ORDER BY day DESC
         """ % days
         
         results = await database.fetch_all(query)
         return [dict(row) for row in results]
     
-    async def get_learning_insights(self) -> Dict[str, Any]:
+    async def get_learning_insights(self, days: int = 30) -> Dict[str, Any]:
         """Generate learning insights from feedback data."""
         
+        if database is None:
+            logger.warning("Database not available - returning empty learning insights")
+            return {}
+        
         # Top performing categories
-        top_performers = await database.fetch_all("""
-            SELECT category_name, acceptance_rate, total_feedback
-            FROM category_performance_summary
-            WHERE total_feedback >= 5
-            ORDER BY acceptance_rate DESC
-            LIMIT 5
-        """)
+        top_performers = await self._category_performance(days, min_feedback=5, order_by="acceptance_rate DESC", limit=5)
         
         # Categories needing attention
-        needs_attention = await database.fetch_all("""
-            SELECT category_name, acceptance_rate, total_feedback
-            FROM category_performance_summary
-            WHERE acceptance_rate < 50 AND total_feedback >= 5
-            ORDER BY total_feedback DESC
-            LIMIT 5
-        """)
+        needs_attention = await self._category_performance(
+            days, min_feedback=5, max_acceptance_rate=50, order_by="total_feedback DESC", limit=5
+        )
         
         # Overall system metrics
         overall_stats = await database.fetch_one("""
             SELECT 
-                COUNT(DISTINCT us.session_id) as total_sessions,
-                COUNT(ui.id) as total_interactions,
-                COUNT(cf.id) as total_feedback,
-                AVG(cf.user_rating) as avg_user_rating,
-                COUNT(*) FILTER (WHERE cf.feedback_type = 'accept') as total_accepts
-            FROM user_sessions us
-            LEFT JOIN user_interactions ui ON us.session_id = ui.session_id
-            LEFT JOIN category_feedback cf ON ui.id = cf.interaction_id
-            WHERE us.created_at > NOW() - INTERVAL '30 days'
-        """)
+                sessions.total_sessions,
+                sessions.total_interactions,
+                feedback.total_feedback,
+                feedback.avg_user_rating,
+                feedback.total_accepts
+            FROM (
+                SELECT 
+                    COALESCE(SUM(unique_sessions), 0) as total_sessions,
+                    COALESCE(SUM(total_interactions), 0) as total_interactions
+                FROM session_activity_daily
+                WHERE day > CURRENT_DATE - %(days)s
+            ) sessions
+            CROSS JOIN (
+                SELECT 
+                    COALESCE(SUM(total_feedback), 0) as total_feedback,
+                    SUM(rating_sum)::float / NULLIF(SUM(rating_count), 0) as avg_user_rating,
+                    COALESCE(SUM(accepts), 0) as total_accepts
+                FROM feedback_daily_rollup
+                WHERE day > CURRENT_DATE - %(days)s
+            ) feedback
+        """ % {"days": days})
         
         return {
-            "top_performers": [dict(row) for row in top_performers],
-            "needs_attention": [dict(row) for row in needs_attention],
+            "top_performers": top_performers,
+            "needs_attention": needs_attention,
             "overall_stats": dict(overall_stats) if overall_stats else {},
             "insights": self._generate_insights(top_performers, needs_attention, overall_stats)
         }
@@ -0,0 +1,324 @@
+"""
+Interaction Writer - Batches user_interactions inserts off the request path
+
+Interaction ids are generated by the application, so tracking returns as soon
+as the row is queued. A background loop writes queued rows in multi-row
+INSERTs, either when the flush interval elapses or when a batch fills up.
+Callers that need a row to exist (feedback submission) can wait for its id.
+"""
+from typing import Dict, Any, List, Optional
+import asyncio
+import logging
+import time
+import uuid
+
+from ..config import settings
+from ..db.database import database
+from ..utils.ids import uuid7_timestamp_ms
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+
+class InteractionWriter:
+    """
+    In-process batched writer for user_interactions.
+    
+    When a batch insert fails its rows are written one at a time, so a bad
+    row (e.g. a foreign key violation) does not take the rest down with it.
+    Rows that still fail are requeued and retried up to max_attempts times;
+    after that they are dropped and anyone waiting on them is released.
+    """
+    
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        batch_size: int = 200,
+        max_attempts: int = 3,
+        read_your_writes_timeout: float = 2.0
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.read_your_writes_timeout = read_your_writes_timeout
+        
+        # interaction_id -> queued row (insertion ordered)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # interaction_id -> future resolved once the row is written (or dropped)
+        self._written: Dict[str, asyncio.Future] = {}
+        self._attempts: Dict[str, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        
+        # Performance tracking
+        self.queued = 0
+        self.written = 0
+        self.batches_written = 0
+        self.failed_batches = 0
+        self.failed_rows = 0
+        self.dropped = 0
+        self.forced_flushes = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.last_flush_at: Optional[float] = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the writer loop on the running event loop."""
+        if self.is_running:
+            return
+        
+        self._wakeup = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Interaction writer started (flush interval {self.flush_interval}s, batch size {self.batch_size})")
+    
+    async def stop(self) -> None:
+        """Stop the writer, writing anything still queued first."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        while self._pending:
+            await self.flush()
+        logger.info("Interaction writer stopped")
+    
+    def submit(self, row: Dict[str, Any]) -> None:
+        """
+        Queue an interaction row for writing; returns immediately.
+        
+        The row must carry its own 'id' and 'created_at' plus the
+        user_interactions columns (session_id, interaction_type, user_input,
+        original_query, processing_time_ms, interaction_metadata) and,
+        optionally, input_embedding bytes with their embedding_model.
+        """
+        if not self.is_running:
+            self.start()
+        
+        interaction_id = row['id']
+        self._pending[interaction_id] = row
+        self._written[interaction_id] = asyncio.get_running_loop().create_future()
+        self.queued += 1
+        
+        self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            self._batch_full.set()
+    
+    async def wait_until_written(self, interaction_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        Make sure a queued interaction has reached the database.
+        
+        Forces flushes, batch after batch, until the row is written rather
+        than waiting out the interval. Returns True when the row was written
+        (or was never queued here), False on drop or timeout.
+        
+        Only this process's queue is visible. With several workers the row
+        may sit in another worker's queue, so a caller that then cannot find
+        it should ask may_be_queued_elsewhere before treating it as missing.
+        """
+        written = self._written.get(interaction_id)
+        if written is None:
+            return True
+        
+        if interaction_id in self._pending:
+            self.forced_flushes += 1
+            asyncio.ensure_future(self._flush_until_written(interaction_id))
+        
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(written),
+                timeout if timeout is not None else self.read_your_writes_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out waiting for interaction {interaction_id} to be written")
+            return False
+    
+    def may_be_queued_elsewhere(self, interaction_id: str) -> bool:
+        """
+        Whether an interaction id is recent enough to still be queued by
+        another worker: generated within max_attempts flush intervals.
+        """
+        try:
+            value = uuid.UUID(str(interaction_id))
+        except ValueError:
+            return False
+        if value.version != 7:
+            return False
+        
+        age_seconds = time.time() - uuid7_timestamp_ms(value) / 1000
+        return age_seconds < self.flush_interval * self.max_attempts
+    
+    async def _flush_until_written(self, interaction_id: str) -> None:
+        """Flush batches until the interaction has left the queue; stops at a failed batch."""
+        while interaction_id in self._pending:
+            if await self.flush() == 0:
+                break
+    
+    async def flush(self) -> int:
+        """Write up to one batch of queued interactions. Returns the number written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            
+            batch_ids = list(self._pending)[:self.batch_size]
+            batch = [self._pending.pop(interaction_id) for interaction_id in batch_ids]
+            
+            started = time.monotonic()
+            failed: List[Dict[str, Any]] = []
+            try:
+                await self._insert_interactions(batch)
+            except Exception as e:
+                self.failed_batches += 1
+                logger.warning(f"Interaction batch of {len(batch)} rows failed: {str(e)}")
+                failed = await self._insert_each(batch) if len(batch) > 1 else batch
+                self._requeue(failed)
+            
+            failed_ids = {row['id'] for row in failed}
+            written_ids = [interaction_id for interaction_id in batch_ids if interaction_id not in failed_ids]
+            if not written_ids:
+                return 0
+            
+            self.last_flush_ms = (time.monotonic() - started) * 1000
+            self.last_flush_at = time.monotonic()
+            self.batches_written += 1
+            self.written += len(written_ids)
+            self.last_batch_size = len(written_ids)
+            
+            for interaction_id in written_ids:
+                self._resolve(interaction_id, True)
+            
+            return len(written_ids)
+    
+    async def _insert_interactions(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert many interaction rows in one statement."""
+        columns = [
+            'id', 'created_at', 'session_id', 'interaction_type', 'user_input',
+            'original_query', 'processing_time_ms', 'interaction_metadata',
+            'input_embedding', 'embedding_model'
+        ]
+        value_rows = []
+        values = {}
+        
+        for i, row in enumerate(batch):
+            value_rows.append("(" + ", ".join(f":{column}_{i}" for column in columns) + ")")
+            for column in columns:
+                values[f"{column}_{i}"] = row.get(column)
+        
+        query = f"""
+        INSERT INTO user_interactions ({', '.join(columns)})
+        VALUES {', '.join(value_rows)}
+        ON CONFLICT DO NOTHING
+        """
+        
+        await database.execute(query, values)
+    
+    async def _insert_each(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows one statement at a time after a failed batch. Returns the rows that failed."""
+        failed = []
+        
+        for row in batch:
+            try:
+                await self._insert_interactions([row])
+            except Exception as e:
+                self.failed_rows += 1
+                logger.warning(f"Interaction {row['id']} failed to write: {str(e)}")
+                failed.append(row)
+        
+        return failed
+    
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        """Put a failed batch back at the front of the queue, dropping rows out of attempts."""
+        retry = {}
+        
+        for row in batch:
+            interaction_id = row['id']
+            attempts = self._attempts.get(interaction_id, 0) + 1
+            
+            if attempts >= self.max_attempts:
+                self.dropped += 1
+                logger.error(f"Dropping interaction {interaction_id} after {attempts} failed writes")
+                self._resolve(interaction_id, False)
+            else:
+                self._attempts[interaction_id] = attempts
+                retry[interaction_id] = row
+        
+        retry.update(self._pending)
+        self._pending = retry
+    
+    def _resolve(self, interaction_id: str, written: bool) -> None:
+        self._attempts.pop(interaction_id, None)
+        future = self._written.pop(interaction_id, None)
+        if future is not None and not future.done():
+            future.set_result(written)
+    
+    async def _run(self) -> None:
+        """Flush when a batch fills or the interval elapses, whichever comes first."""
+        while True:
+            await self._wakeup.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._batch_full.clear()
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Interaction writer flush failed: {str(e)}")
+            
+            if self._pending:
+                self._wakeup.set()
+                if len(self._pending) >= self.batch_size:
+                    self._batch_full.set()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, throughput and failure statistics."""
+        now = time.monotonic()
+        
+        return {
+            "running": self.is_running,
+            "queue_depth": len(self._pending),
+            "queued": self.queued,
+            "written": self.written,
+            "batches_written": self.batches_written,
+            "failed_batches": self.failed_batches,
+            "failed_rows": self.failed_rows,
+            "dropped": self.dropped,
+            "forced_flushes": self.forced_flushes,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "seconds_since_last_flush": round(now - self.last_flush_at, 3) if self.last_flush_at else None,
+            "flush_interval_seconds": self.flush_interval,
+            "batch_size": self.batch_size
+        }
+
+
+# Global interaction writer instance (singleton pattern)
+_interaction_writer_instance: Optional[InteractionWriter] = None
+
+
+def get_interaction_writer() -> InteractionWriter:
+    """Get or create the global interaction writer instance"""
+    global _interaction_writer_instance
+    
+    if _interaction_writer_instance is None:
+        _interaction_writer_instance = InteractionWriter(
+            flush_interval=settings.interaction_flush_interval_seconds,
+            batch_size=settings.interaction_flush_batch_size
+        )
+    
+    return _interaction_writer_instance
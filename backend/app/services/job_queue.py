@@ -0,0 +1,399 @@
+"""
+Job Queue - Durable Postgres-backed queue for long-running admin work
+
+GPT-backed admin operations (category previews, transforms, keyword
+enhancement) take 10-30 seconds. Instead of holding an HTTP worker for that
+long, their routes enqueue a row in admin_jobs (alembic revision
+admin_jobs_001) and return the job id; the admin UI polls for the result.
+
+Worker coroutines claim due jobs one at a time with FOR UPDATE SKIP LOCKED, so
+any number of workers, in this process or others, drain the queue without
+claiming the same job twice. A failed job is retried with exponential backoff
+until max_attempts; a job whose worker died is claimed again once its lease
+(the job timeout plus a grace period) has run out. Results are stored on the
+row and finished jobs are purged after the retention period. Handlers
+registered with reports_progress also get a callback that writes their
+progress to the row while they run.
+"""
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+
+from ..config import settings
+from ..db.database import database
+from ..utils.ids import uuid7
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[..., Awaitable[Dict[str, Any]]]
+
+# Extra time a running job's lease lasts beyond the job timeout
+LEASE_GRACE_SECONDS = 60
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for failures a retry cannot fix (bad input, missing rows)."""
+    pass
+
+
+def _json_value(value: Any) -> Any:
+    """JSONB columns come back from asyncpg as text"""
+    return json.loads(value) if isinstance(value, str) else value
+
+
+class JobQueue:
+    """
+    Registry of job handlers plus the worker coroutines that run them.
+    
+    Handlers are async callables taking the job payload and returning a
+    JSON-serializable result dict. Handlers that report progress take an
+    async progress callback as a second argument.
+    """
+    
+    def __init__(
+        self,
+        workers: int = 2,
+        poll_interval: float = 2.0,
+        job_timeout: float = 300.0,
+        retry_base_seconds: float = 10.0,
+        retry_max_seconds: float = 600.0,
+        retention_days: int = 7
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retention_days = retention_days
+        
+        # job_type -> (handler, default max attempts, reports progress)
+        self._handlers: Dict[str, Tuple[JobHandler, int, bool]] = {}
+        self._tasks: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._next_purge = 0.0
+        
+        # Performance tracking
+        self.enqueued = 0
+        self.claimed = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.reclaimed = 0
+        self.in_progress = 0
+        self.total_run_seconds = 0.0
+        self.claim_errors = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+    
+    def register(self, job_type: str, handler: JobHandler, max_attempts: int = 3, reports_progress: bool = False) -> None:
+        """Register the handler for a job type"""
+        self._handlers[job_type] = (handler, max_attempts, reports_progress)
+    
+    def start(self) -> None:
+        """Start the worker coroutines on the running event loop."""
+        if self.is_running:
+            return
+        
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(f"{self._worker_prefix}:{n}"))
+            for n in range(self.workers)
+        ]
+        logger.info(f"Job queue started ({self.workers} workers, {self.job_timeout}s job timeout)")
+    
+    async def stop(self) -> None:
+        """
+        Stop the workers
+        
+        A job interrupted mid-run stays 'running' and is claimed again by any
+        worker once its lease runs out.
+        """
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        logger.info("Job queue stopped")
+    
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        created_by: Optional[str] = None,
+        max_attempts: Optional[int] = None
+    ) -> str:
+        """Insert a queued job and return its id"""
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        
+        job_id = str(uuid7())
+        query = """
+            INSERT INTO admin_jobs (id, job_type, payload, max_attempts, created_by)
+            VALUES (:id, :job_type, CAST(:payload AS JSONB), :max_attempts, :created_by)
+        """
+        await database.execute(query, {
+            "id": job_id,
+            "job_type": job_type,
+            "payload": json.dumps(payload),
+            "max_attempts": max_attempts or self._handlers[job_type][1],
+            "created_by": created_by
+        })
+        
+        self.enqueued += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        
+        return job_id
+    
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, result and error of a job, or None for an unknown id"""
+        try:
+            job_id = str(uuid.UUID(job_id))
+        except ValueError:
+            return None
+        
+        query = """
+            SELECT id, job_type, status, progress, result, error, attempts, max_attempts,
+                   run_after, created_by, created_at, updated_at, finished_at
+            FROM admin_jobs
+            WHERE id = :id
+        """
+        row = await database.fetch_one(query, {"id": job_id})
+        if row is None:
+            return None
+        
+        return {
+            "job_id": str(row["id"]),
+            "job_type": row["job_type"],
+            "status": row["status"],
+            "progress": _json_value(row["progress"]),
+            "result": _json_value(row["result"]),
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"],
+            "run_after": row["run_after"].isoformat() if row["run_after"] else None,
+            "created_by": row["created_by"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+            "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None,
+            "finished_at": row["finished_at"].isoformat() if row["finished_at"] else None
+        }
+    
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Claim the next due job (or one whose lease expired) for this worker"""
+        lease_seconds = int(self.job_timeout + LEASE_GRACE_SECONDS)
+        query = """
+            WITH next_job AS (
+                SELECT id, status
+                FROM admin_jobs
+                WHERE (status = 'queued' AND run_after <= NOW())
+                   OR (status = 'running' AND locked_at < NOW() - INTERVAL '%s seconds')
+                ORDER BY run_after
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE admin_jobs j
+            SET status = 'running',
+                attempts = j.attempts + 1,
+                locked_by = :worker_id,
+                locked_at = NOW(),
+                updated_at = NOW()
+            FROM next_job
+            WHERE j.id = next_job.id
+            RETURNING j.id, j.job_type, j.payload, j.attempts, j.max_attempts, next_job.status AS previous_status
+        """ % lease_seconds
+        row = await database.fetch_one(query, {"worker_id": worker_id})
+        if row is None:
+            return None
+        
+        self.claimed += 1
+        if row["previous_status"] == "running":
+            self.reclaimed += 1
+            logger.warning(f"Reclaimed job {row['id']} after its lease expired")
+        
+        return {
+            "id": str(row["id"]),
+            "job_type": row["job_type"],
+            "payload": _json_value(row["payload"]) or {},
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"]
+        }
+    
+    async def execute(self, job: Dict[str, Any], worker_id: str) -> str:
+        """Run a claimed job and record the outcome; returns the job's new status"""
+        if job["attempts"] > job["max_attempts"]:
+            # Only reachable through lease expiry: the job keeps killing its worker
+            return await self._finish_failed(job, worker_id, "Lease expired on the final attempt")
+        
+        entry = self._handlers.get(job["job_type"])
+        if entry is None:
+            return await self._finish_failed(job, worker_id, f"No handler for job type {job['job_type']}")
+        
+        handler, _, reports_progress = entry
+        if reports_progress:
+            async def progress(value: Dict[str, Any]) -> None:
+                await self.update_progress(job["id"], worker_id, value)
+            
+            operation = handler(job["payload"], progress)
+        else:
+            operation = handler(job["payload"])
+        
+        self.in_progress += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(operation, timeout=self.job_timeout)
+        except PermanentJobError as e:
+            return await self._finish_failed(job, worker_id, str(e))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = "Timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            if job["attempts"] >= job["max_attempts"]:
+                return await self._finish_failed(job, worker_id, error)
+            return await self._schedule_retry(job, worker_id, error)
+        finally:
+            self.in_progress -= 1
+            self.total_run_seconds += time.monotonic() - started
+        
+        query = """
+            UPDATE admin_jobs
+            SET status = 'succeeded', result = CAST(:result AS JSONB), error = NULL,
+                locked_by = NULL, locked_at = NULL, updated_at = NOW(), finished_at = NOW()
+            WHERE id = :id AND locked_by = :worker_id
+        """
+        await database.execute(query, {"id": job["id"], "worker_id": worker_id, "result": json.dumps(result, default=str)})
+        self.succeeded += 1
+        
+        return "succeeded"
+    
+    async def update_progress(self, job_id: str, worker_id: str, progress: Dict[str, Any]) -> None:
+        """Store a running job's progress (ignored once another worker holds the job)"""
+        query = """
+            UPDATE admin_jobs
+            SET progress = CAST(:progress AS JSONB), updated_at = NOW()
+            WHERE id = :id AND locked_by = :worker_id AND status = 'running'
+        """
+        await database.execute(query, {"id": job_id, "worker_id": worker_id, "progress": json.dumps(progress, default=str)})
+    
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff after the given number of failed attempts"""
+        return min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+    
+    async def _schedule_retry(self, job: Dict[str, Any], worker_id: str, error: str) -> str:
+        delay = self.retry_delay(job["attempts"])
+        query = """
+            UPDATE admin_jobs
+            SET status = 'queued', error = :error, run_after = NOW() + make_interval(secs => :delay),
+                locked_by = NULL, locked_at = NULL, updated_at = NOW()
+            WHERE id = :id AND locked_by = :worker_id
+        """
+        await database.execute(query, {"id": job["id"], "worker_id": worker_id, "error": error, "delay": delay})
+        self.retried += 1
+        logger.warning(f"Job {job['id']} ({job['job_type']}) attempt {job['attempts']} failed, retrying in {delay:.0f}s: {error}")
+        
+        return "queued"
+    
+    async def _finish_failed(self, job: Dict[str, Any], worker_id: str, error: str) -> str:
+        query = """
+            UPDATE admin_jobs
+            SET status = 'failed', error = :error,
+                locked_by = NULL, locked_at = NULL, updated_at = NOW(), finished_at = NOW()
+            WHERE id = :id AND locked_by = :worker_id
+        """
+        await database.execute(query, {"id": job["id"], "worker_id": worker_id, "error": error})
+        self.failed += 1
+        logger.error(f"Job {job['id']} ({job['job_type']}) failed after {job['attempts']} attempts: {error}")
+        
+        return "failed"
+    
+    async def purge_finished(self) -> int:
+        """Delete finished jobs past the retention period"""
+        query = """
+            DELETE FROM admin_jobs
+            WHERE status IN ('succeeded', 'failed')
+              AND finished_at < NOW() - INTERVAL '%s days'
+            RETURNING id
+        """ % int(self.retention_days)
+        return len(await database.fetch_all(query))
+    
+    async def _run(self, worker_id: str) -> None:
+        """Claim and run jobs until none are due, then wait for a wakeup or the poll interval."""
+        while True:
+            try:
+                job = await self.claim(worker_id)
+            except Exception as e:
+                job = None
+                self.claim_errors += 1
+                logger.warning(f"Job claim failed (non-critical): {str(e)}")
+            
+            if job is not None:
+                try:
+                    await self.execute(job, worker_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to record outcome of job {job['id']}: {str(e)}")
+                continue
+            
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + 3600
+                try:
+                    await self.purge_finished()
+                except Exception as e:
+                    logger.warning(f"Job purge failed (non-critical): {str(e)}")
+            
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get throughput and outcome counters for this process's workers."""
+        finished = self.succeeded + self.retried + self.failed
+        
+        return {
+            "running": self.is_running,
+            "workers": self.workers,
+            "job_types": sorted(self._handlers),
+            "in_progress": self.in_progress,
+            "enqueued": self.enqueued,
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "reclaimed": self.reclaimed,
+            "claim_errors": self.claim_errors,
+            "avg_run_seconds": round(self.total_run_seconds / finished, 3) if finished else None
+        }
+
+
+# Global job queue instance (singleton pattern)
+_job_queue_instance: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the global job queue instance"""
+    global _job_queue_instance
+    
+    if _job_queue_instance is None:
+        _job_queue_instance = JobQueue(
+            workers=settings.job_queue_workers,
+            poll_interval=settings.job_queue_poll_interval_seconds,
+            job_timeout=settings.job_queue_job_timeout_seconds,
+            retry_base_seconds=settings.job_queue_retry_base_seconds,
+            retention_days=settings.job_queue_retention_days
+        )
+    
+    return _job_queue_instance
@@ -0,0 +1,265 @@
+"""
+Keyword Enhancement - GPT-suggested keywords for one category or the whole catalog
+
+The single-category admin route and the bulk job share the prompt and merge
+rules defined here. A bulk job:
+
+1. Sends one GPT request per category, at most `concurrency` at a time. The
+   blocking OpenAI calls run in worker threads on the shared pooled client, so
+   concurrency never exceeds the pool's connection limit.
+2. Writes every category's merged keywords in a single transaction. Rows are
+   locked and merged with their current keywords at write time, so edits
+   made while the job ran are kept.
+3. Re-embeds only the changed categories in the live matcher, once, instead
+   of reloading and re-embedding the whole catalog.
+
+Bulk jobs run on the admin job queue (app.services.job_queue), which stores
+their progress and result on the admin_jobs row.
+"""
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from ..config import settings
+from ..db.database import database
+from ..models.category_matcher import get_category_matcher
+from .openai_client import get_openai_client
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+ENHANCE_MODEL = "gpt-4o"
+
+# Rows per UPDATE statement when writing a job's results
+UPDATE_CHUNK_SIZE = 200
+
+# Minimum seconds between progress writes while GPT calls complete
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def build_enhance_prompt(category: Dict[str, Any], additional_context: str) -> str:
+    """GPT prompt asking for new keywords for a category"""
+    return f"""Enhance this political category with better keywords based on additional context.
+
+CATEGORY: {category['name']}
+DESCRIPTION: {category['description']}
+CURRENT KEYWORDS: {', '.join(category['keywords'])}
+
+ADDITIONAL CONTEXT: "{additional_context}"
+
+Generate 10-20 NEW keywords that:
+1. Aren't already in the current keyword list
+2. Capture how people actually talk about this issue
+3. Include both progressive and conservative terminology
+4. Cover common phrases, synonyms, and related concepts
+5. Consider the additional context provided
+
+Return JSON: {{"new_keywords": ["keyword1", "keyword2", ...]}}
+"""
+
+
+def request_new_keywords(category: Dict[str, Any], additional_context: str) -> List[str]:
+    """Ask GPT for new keywords for a category (blocking)"""
+    response = get_openai_client().chat.completions.create(
+        model=ENHANCE_MODEL,
+        messages=[{"role": "user", "content": build_enhance_prompt(category, additional_context)}],
+        response_format={"type": "json_object"},
+        temperature=0.3
+    )
+    
+    return json.loads(response.choices[0].message.content)["new_keywords"]
+
+
+def merge_keywords(current: List[str], suggested: List[str]) -> List[str]:
+    """Suggested keywords not already present (case-insensitive), in suggestion order"""
+    existing = set(k.lower() for k in current)
+    added = []
+    for keyword in suggested:
+        if keyword.lower() not in existing:
+            existing.add(keyword.lower())
+            added.append(keyword)
+    return added
+
+
+class BulkKeywordEnhancer:
+    """Runs bulk enhancement over a set of categories and reports its progress."""
+    
+    def __init__(self, concurrency: int = 4):
+        # A worker thread per call; more than the pool has connections would only queue
+        self.concurrency = max(1, min(concurrency, settings.openai_max_connections))
+    
+    async def load_targets(self, category_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Active categories to enhance (all of them when no ids are given)"""
+        query = "SELECT id, name, description, keywords FROM political_categories WHERE is_active = true"
+        values: Dict[str, Any] = {}
+        if category_ids:
+            query += " AND id IN (" + ", ".join(f":id_{i}" for i in range(len(category_ids))) + ")"
+            values = {f"id_{i}": category_id for i, category_id in enumerate(category_ids)}
+        query += " ORDER BY id"
+        
+        rows = await database.fetch_all(query, values)
+        
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "description": row["description"],
+                "keywords": json.loads(row["keywords"]) if isinstance(row["keywords"], str) else (row["keywords"] or [])
+            }
+            for row in rows
+        ]
+    
+    async def run(
+        self,
+        categories: List[Dict[str, Any]],
+        additional_context: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Enhance every category, write the results once and reload the matcher once
+        
+        progress, when given, receives the running summary at each stage and
+        at most every PROGRESS_INTERVAL_SECONDS while GPT calls complete.
+        Returns the final summary. A failed GPT call is recorded in the
+        summary; a failed write or reload raises.
+        """
+        summary: Dict[str, Any] = {
+            "stage": "enhancing",
+            "total": len(categories),
+            "completed": 0,
+            "failed": 0,
+            "keywords_added": 0,
+            "categories_updated": 0,
+            "errors": []
+        }
+        semaphore = asyncio.Semaphore(self.concurrency)
+        suggestions: Dict[int, List[str]] = {}
+        last_report = [0.0]
+        
+        async def report(force: bool = False) -> None:
+            if progress is None or (not force and time.monotonic() - last_report[0] < PROGRESS_INTERVAL_SECONDS):
+                return
+            last_report[0] = time.monotonic()
+            try:
+                await progress({**summary, "errors": list(summary["errors"])})
+            except Exception as e:
+                logger.warning(f"Bulk enhancement progress update failed (non-critical): {str(e)}")
+        
+        async def enhance(category: Dict[str, Any]) -> None:
+            async with semaphore:
+                try:
+                    suggested = await asyncio.to_thread(request_new_keywords, category, additional_context)
+                    # Pre-filter against the snapshot; the write merges with the current row
+                    if merge_keywords(category["keywords"], suggested):
+                        suggestions[category["id"]] = suggested
+                    summary["completed"] += 1
+                except Exception as e:
+                    summary["failed"] += 1
+                    summary["errors"].append({"category_id": category["id"], "error": str(e)})
+            await report()
+        
+        await report(force=True)
+        await asyncio.gather(*(enhance(category) for category in categories))
+        
+        summary["stage"] = "writing"
+        await report(force=True)
+        written = await self.write_updates(suggestions)
+        summary["categories_updated"] = len(written)
+        summary["keywords_added"] = sum(len(update["added"]) for update in written.values())
+        
+        summary["stage"] = "reloading"
+        await report(force=True)
+        await self.reload_matcher({category_id: update["keywords"] for category_id, update in written.items()})
+        
+        summary["stage"] = "completed"
+        logger.info(
+            f"Bulk enhancement: {summary['categories_updated']} categories updated, "
+            f"{summary['keywords_added']} keywords added, {summary['failed']} failed"
+        )
+        
+        return summary
+    
+    async def write_updates(self, suggestions: Dict[int, List[str]]) -> Dict[int, Dict[str, List[str]]]:
+        """
+        Merge suggested keywords into the categories in one transaction
+        
+        Each row is locked and merged with the keywords it holds now, not the
+        ones read when the job started. Returns category id -> {"keywords":
+        written list, "added": new keywords} for the rows that changed.
+        """
+        written: Dict[int, Dict[str, List[str]]] = {}
+        if not suggestions:
+            return written
+        
+        ids = list(suggestions)
+        
+        async with database.transaction():
+            for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+                chunk_ids = ids[start:start + UPDATE_CHUNK_SIZE]
+                current = await database.fetch_all(
+                    "SELECT id, keywords FROM political_categories WHERE is_active = true AND id IN ("
+                    + ", ".join(f":id_{i}" for i in range(len(chunk_ids)))
+                    + ") ORDER BY id FOR UPDATE",
+                    {f"id_{i}": category_id for i, category_id in enumerate(chunk_ids)}
+                )
+                
+                chunk = []
+                for row in current:
+                    keywords = json.loads(row["keywords"]) if isinstance(row["keywords"], str) else (row["keywords"] or [])
+                    added = merge_keywords(keywords, suggestions[row["id"]])
+                    if added:
+                        written[row["id"]] = {"keywords": keywords + added, "added": added}
+                        chunk.append((row["id"], keywords + added))
+                if not chunk:
+                    continue
+                
+                rows = ", ".join(
+                    f"(CAST(:id_{i} AS INTEGER), CAST(:keywords_{i} AS TEXT))" for i in range(len(chunk))
+                )
+                values: Dict[str, Any] = {}
+                for i, (category_id, keywords) in enumerate(chunk):
+                    values[f"id_{i}"] = category_id
+                    values[f"keywords_{i}"] = json.dumps(keywords)
+                
+                query = f"""
+                    UPDATE political_categories pc
+                    SET keywords = CAST(v.keywords AS JSON), updated_at = NOW(), updated_by = 'ai_admin'
+                    FROM (VALUES {rows}) AS v(id, keywords)
+                    WHERE pc.id = v.id
+                """
+                await database.execute(query, values)
+        
+        return written
+    
+    async def reload_matcher(self, updates: Dict[int, List[str]]) -> None:
+        """Re-embed only the changed categories (an unloaded matcher picks them up on its first load)"""
+        matcher = get_category_matcher()
+        if not updates or not matcher.categories:
+            return
+        
+        changed = [
+            {**category, "keywords": updates[category["id"]]}
+            for category in matcher.categories
+            if category["id"] in updates
+        ]
+        await asyncio.to_thread(matcher.update_categories, changed)
+
+
+# Global bulk keyword enhancer instance (singleton pattern)
+_bulk_keyword_enhancer_instance: Optional[BulkKeywordEnhancer] = None
+
+
+def get_bulk_keyword_enhancer() -> BulkKeywordEnhancer:
+    """Get or create the global bulk keyword enhancer instance"""
+    global _bulk_keyword_enhancer_instance
+    
+    if _bulk_keyword_enhancer_instance is None:
+        _bulk_keyword_enhancer_instance = BulkKeywordEnhancer(
+            concurrency=settings.keyword_enhancement_concurrency
+        )
+    
+    return _bulk_keyword_enhancer_instance
@@ -7,16 +7,25 @@ This service implements the feedback learning loop:
 3. Identifies underperforming categories
 4. Suggests improvements to keywords and categories
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import logging
-from collections import Counter
+import numpy as np
 
+from ..config import settings
 from ..db.database import database
+from ..models.category_cooccurrence import get_category_cooccurrence
+from ..utils.embeddings import stored_or_encoded
+from ..utils.ids import uuid7
 
 # Use standard logging
 logger = logging.getLogger(__name__)
 
+# Recent rejections read for names, confidence and reasons in analyze_rejection_patterns
+REJECTION_SAMPLE_ROWS = 500
+REASONS_PER_CATEGORY = 5
+
 
 class CategoryLearningService:
     """
@@ -52,140 +61,168 @@ class CategoryLearningService:
             logger.warning("Database not available - skipping metrics update")
             return {"status": "skipped"}
         
+        updated = await self.update_metrics_for_categories([category_id], days=30)
+        return updated[0] if updated else {
+            "category_id": category_id,
+            "success_rate": 0.0,
+            "avg_confidence": 0.0,
+            "avg_rating": 0.0,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+    
+    async def update_metrics_for_categories(
+        self,
+        category_ids: List[int],
+        days: int = 30
+    ) -> List[Dict[str, Any]]:
+        """
+        Recompute metrics for a set of categories in bulk.
+        
+        Runs one grouped aggregate over every category in the set and writes
+        all resulting learning_metrics rows with a single upsert, so the cost
+        of a feedback submission no longer scales with its category count.
+        
+        Args:
+            category_ids: Categories whose metrics should be recomputed
+            days: Time window for the rolling metrics
+        
+        Returns:
+            Updated metrics, one entry per category that has feedback
+        """
+        if database is None:
+            logger.warning("Database not available - skipping metrics update")
+            return []
+        
+        category_ids = list(dict.fromkeys(category_ids))
+        if not category_ids:
+            return []
+        
         try:
-            # Calculate success rate over last 30 days
-            success_rate = await self._calculate_success_rate(category_id, days=30)
+            stats = await self._aggregate_feedback_stats(category_ids, days)
             
-            # Get average confidence for accepted matches
-            avg_confidence = await self._calculate_average_confidence(category_id, days=30)
+            updated_at = datetime.utcnow().isoformat()
+            updated = []
+            metric_rows = []
             
-            # Get average user rating
-            avg_rating = await self._calculate_average_rating(category_id, days=30)
+            for row in stats:
+                total = row['total']
+                successful = row['successful']
+                success_rate = successful / total if total else 0.0
+                avg_confidence = float(row['avg_confidence']) if row['avg_confidence'] is not None else 0.0
+                avg_rating = float(row['avg_rating']) if row['avg_rating'] is not None else 0.0
             
-            # Store updated metrics
-            await self._store_metrics(
-                category_id=category_id,
-                success_rate=success_rate,
-                avg_confidence=avg_confidence,
-                avg_rating=avg_rating
-            )
+                metric_rows.append((row['category_id'], 'success_rate', success_rate, total))
+                if successful:
+                    metric_rows.append((row['category_id'], 'avg_confidence', avg_confidence, successful))
+                if row['rating_count']:
+                    metric_rows.append((row['category_id'], 'avg_rating', avg_rating, row['rating_count']))
             
-            logger.info(f"Updated metrics for category {category_id}: success_rate={success_rate:.2f}")
+                updated.append({
+                    "category_id": row['category_id'],
+                    "total_feedback": total,
+                    "successful": successful,
+                    "success_rate": success_rate,
+                    "avg_confidence": avg_confidence,
+                    "avg_rating": avg_rating,
+                    "updated_at": updated_at
+                })
             
-            return {
-                "category_id": category_id,
-                "success_rate": success_rate,
-                "avg_confidence": avg_confidence,
-                "avg_rating": avg_rating,
-                "updated_at": datetime.utcnow().isoformat()
-            }
+            await self._store_metric_rows(metric_rows)
+            
+            logger.info(f"Updated metrics for {len(updated)} categories ({len(metric_rows)} metric rows)")
+            
+            return updated
             
         except Exception as e:
             logger.error(f"Failed to update category metrics: {str(e)}")
             raise
     
-    async def _calculate_success_rate(self, category_id: int, days: int = 30) -> float:
+    async def get_success_stats(self, days: int = 30) -> Dict[int, tuple]:
         """
-        Calculate success rate (acceptance rate) for a category.
+        Get (successful, total) feedback counts for every category with feedback.
         
-        Success = feedback_type in ('accept', 'maybe')
-        Failure = feedback_type in ('reject', 'irrelevant')
+        Used to seed the category matcher's live success rates in one query.
         """
+        if database is None:
+            return {}
+        
         query = """
         SELECT 
-            COUNT(*) as total,
-            COUNT(*) FILTER (WHERE feedback_type IN ('accept', 'maybe')) as successful
-        FROM category_feedback
-        WHERE category_id = :category_id
-        AND created_at > NOW() - INTERVAL '%s days'
+            category_id,
+            SUM(accept_count + maybe_count) as successful,
+            SUM(accept_count + reject_count + maybe_count + irrelevant_count) as total
+        FROM category_feedback_daily
+        WHERE day > CURRENT_DATE - %s
+        GROUP BY category_id
         """ % days
         
-        result = await database.fetch_one(query, {"category_id": category_id})
-        
-        if not result or result['total'] == 0:
-            return 0.0
-        
-        return result['successful'] / result['total']
+        results = await database.fetch_all(query)
+        return {row['category_id']: (row['successful'], row['total']) for row in results}
     
-    async def _calculate_average_confidence(self, category_id: int, days: int = 30) -> float:
-        """Calculate average confidence score for accepted matches."""
-        query = """
-        SELECT AVG(confidence_score) as avg_confidence
-        FROM category_feedback
-        WHERE category_id = :category_id
-        AND feedback_type IN ('accept', 'maybe')
-        AND created_at > NOW() - INTERVAL '%s days'
-        """ % days
+    async def _aggregate_feedback_stats(self, category_ids: List[int], days: int = 30) -> List[Dict[str, Any]]:
+        """
+        Aggregate feedback for many categories in one grouped query.
         
-        result = await database.fetch_one(query, {"category_id": category_id})
+        Reads the per-day counters in category_feedback_daily, so each
+        category costs at most `days` small rows regardless of feedback volume.
         
-        return float(result['avg_confidence']) if result and result['avg_confidence'] else 0.0
-    
-    async def _calculate_average_rating(self, category_id: int, days: int = 30) -> float:
-        """Calculate average user rating for a category."""
-        query = """
-        SELECT AVG(user_rating) as avg_rating
-        FROM category_feedback
-        WHERE category_id = :category_id
-        AND user_rating IS NOT NULL
-        AND created_at > NOW() - INTERVAL '%s days'
-        """ % days
+        Success = feedback_type in ('accept', 'maybe')
+        Failure = feedback_type in ('reject', 'irrelevant')
+        """
+        placeholders = ', '.join(f":category_id_{i}" for i in range(len(category_ids)))
         
-        result = await database.fetch_one(query, {"category_id": category_id})
+        query = f"""
+        SELECT 
+            category_id,
+            SUM(accept_count + reject_count + maybe_count + irrelevant_count) as total,
+            SUM(accept_count + maybe_count) as successful,
+            SUM(success_confidence_sum) / NULLIF(SUM(accept_count + maybe_count), 0) as avg_confidence,
+            SUM(rating_sum)::float / NULLIF(SUM(rating_count), 0) as avg_rating,
+            SUM(rating_count) as rating_count
+        FROM category_feedback_daily
+        WHERE category_id IN ({placeholders})
+        AND day > CURRENT_DATE - %s
+        GROUP BY category_id
+        """ % days
         
-        return float(result['avg_rating']) if result and result['avg_rating'] else 0.0
-    
-    async def _store_metrics(
-        self,
-        category_id: int,
-        success_rate: float,
-        avg_confidence: float,
-        avg_rating: float
-    ):
-        """Store calculated metrics in learning_metrics table."""
-        # Store success rate
-        await self._store_single_metric(
-            category_id=category_id,
-            metric_type='success_rate',
-            metric_value=success_rate
-        )
+        values = {f"category_id_{i}": category_id for i, category_id in enumerate(category_ids)}
         
-        # Store average confidence
-        await self._store_single_metric(
-            category_id=category_id,
-            metric_type='avg_confidence',
-            metric_value=avg_confidence
-        )
+        return await database.fetch_all(query, values)
         
-        # Store average rating
-        if avg_rating > 0:
-            await self._store_single_metric(
-                category_id=category_id,
-                metric_type='avg_rating',
-                metric_value=avg_rating
-            )
+    async def _store_metric_rows(self, metric_rows: List[tuple]):
+        """
+        Store (category_id, metric_type, metric_value, sample_size) rows in learning_metrics.
     
-    async def _store_single_metric(
-        self,
-        category_id: int,
-        metric_type: str,
-        metric_value: float
-    ):
-        """Store a single metric value."""
-        query = """
+        All rows are written with a single multi-row upsert: each category
+        keeps one row per metric per day, overwritten by every recomputation.
+        """
+        if not metric_rows:
+            return
+        
+        rows = []
+        values = {}
+        
+        for i, (category_id, metric_type, metric_value, sample_size) in enumerate(metric_rows):
+            rows.append(f"(:id_{i}, :category_id_{i}, :metric_type_{i}, :metric_value_{i}, :sample_size_{i}, 'daily', CURRENT_DATE, NOW())")
+            values.update({
+                f"id_{i}": str(uuid7()),
+                f"category_id_{i}": category_id,
+                f"metric_type_{i}": metric_type,
+                f"metric_value_{i}": metric_value,
+                f"sample_size_{i}": sample_size
+            })
+    
+        query = f"""
         INSERT INTO learning_metrics 
-        (category_id, metric_type, metric_value, sample_size, time_period, calculated_at)
-        VALUES (:category_id, :metric_type, :metric_value, 1, 'daily', NOW())
+        (id, category_id, metric_type, metric_value, sample_size, time_period, day, calculated_at)
+        VALUES {', '.join(rows)}
+        ON CONFLICT (category_id, metric_type, time_period, day) DO UPDATE SET
+            metric_value = EXCLUDED.metric_value,
+            sample_size = EXCLUDED.sample_size,
+            calculated_at = EXCLUDED.calculated_at
         """
         
-        await database.execute(
-            query,
-            {
-                "category_id": category_id,
-                "metric_type": metric_type,
-                "metric_value": metric_value
-            }
-        )
+        await database.execute(query, values)
     
     async def identify_underperforming_categories(
         self,
@@ -263,19 +300,19 @@ class CategoryLearningService:
         if database is None:
             return {"error": "Database not available"}
         
-        # Get basic stats
+        # Get basic stats from the per-day counters
         stats_query = """
         SELECT 
-            COUNT(*) as total_feedback,
-            COUNT(*) FILTER (WHERE feedback_type = 'accept') as accepts,
-            COUNT(*) FILTER (WHERE feedback_type = 'reject') as rejects,
-            COUNT(*) FILTER (WHERE feedback_type = 'maybe') as maybes,
-            COUNT(*) FILTER (WHERE feedback_type = 'irrelevant') as irrelevant,
-            AVG(confidence_score) as avg_confidence,
-            AVG(user_rating) as avg_rating
-        FROM category_feedback
+            COALESCE(SUM(accept_count + reject_count + maybe_count + irrelevant_count), 0) as total_feedback,
+            COALESCE(SUM(accept_count), 0) as accepts,
+            COALESCE(SUM(reject_count), 0) as rejects,
+            COALESCE(SUM(maybe_count), 0) as maybes,
+            COALESCE(SUM(irrelevant_count), 0) as irrelevant,
+            SUM(confidence_sum) / NULLIF(SUM(accept_count + reject_count + maybe_count + irrelevant_count), 0) as avg_confidence,
+            SUM(rating_sum)::float / NULLIF(SUM(rating_count), 0) as avg_rating
+        FROM category_feedback_daily
         WHERE category_id = :category_id
-        AND created_at > NOW() - INTERVAL '%s days'
+        AND day > CURRENT_DATE - %s
         """ % days
         
         stats = await database.fetch_one(stats_query, {"category_id": category_id})
@@ -377,106 +414,198 @@ class FeedbackAnalyzer:
         """
         Analyze why users are rejecting category matches.
         
-        Identifies:
-        - Common rejection reasons
-        - Patterns in rejected user inputs
-        - Confidence score correlations
-        """
-        if database is None:
-            return {"error": "Database not available"}
-        
-        # Build query based on whether we're analyzing a specific category
-        if category_id:
-            where_clause = "WHERE cf.category_id = :category_id AND cf.feedback_type IN ('reject', 'irrelevant')"
-            params = {"category_id": category_id}
-        else:
-            where_clause = "WHERE cf.feedback_type IN ('reject', 'irrelevant')"
-            params = {}
+        Rankings come from the in-memory co-occurrence matrices (all time):
+        - Rejection count per category
+        - Categories rejected alongside it, and accepted instead of it
         
-        query = f"""
-        SELECT 
-            cf.category_id,
-            cf.category_name,
-            COUNT(*) as rejection_count,
-            AVG(cf.confidence_score) as avg_confidence,
-            ARRAY_AGG(DISTINCT cf.feedback_reason) FILTER (WHERE cf.feedback_reason IS NOT NULL) as reasons
-        FROM category_feedback cf
-        JOIN user_interactions ui ON cf.interaction_id = ui.id
-        {where_clause}
-        AND cf.created_at > NOW() - INTERVAL '%s days'
-        GROUP BY cf.category_id, cf.category_name
-        ORDER BY rejection_count DESC
-        LIMIT 10
-        """ % days
+        Names, confidence and reasons come from at most
+        REJECTION_SAMPLE_ROWS of the most recent rejections in the window.
+        """
+        cooccurrence = get_category_cooccurrence()
+        patterns = cooccurrence.rejection_ranking(category_id) if cooccurrence.loaded else []
         
-        results = await database.fetch_all(query, params)
+        if patterns and database is not None:
+            samples = await self._recent_rejections([pattern["category_id"] for pattern in patterns], days)
+            for pattern in patterns:
+                pattern.update(samples.get(pattern["category_id"], {
+                    "category_name": None, "recent_avg_confidence": None, "recent_reasons": []
+                }))
         
         return {
             "period_days": days,
             "category_id": category_id,
-            "rejection_patterns": [dict(row) for row in results]
+            "counts_window": "all_time",
+            "recent_window_days": days,
+            "rejection_patterns": patterns
         }
     
+    async def _recent_rejections(self, category_ids: List[int], days: int) -> Dict[int, Dict[str, Any]]:
+        """Name, mean confidence and distinct reasons from a bounded sample of recent rejections."""
+        placeholders = ', '.join(f":category_id_{i}" for i in range(len(category_ids)))
+        
+        query = f"""
+        SELECT category_id, category_name, confidence_score, feedback_reason
+        FROM category_feedback
+        WHERE category_id IN ({placeholders})
+        AND feedback_type IN ('reject', 'irrelevant')
+        AND created_at > NOW() - INTERVAL '%s days'
+        ORDER BY created_at DESC
+        LIMIT :limit
+        """ % days
+        
+        values: Dict[str, Any] = {f"category_id_{i}": category_id for i, category_id in enumerate(category_ids)}
+        values["limit"] = REJECTION_SAMPLE_ROWS
+        
+        samples: Dict[int, Dict[str, Any]] = {}
+        confidences: Dict[int, List[float]] = {}
+        for row in await database.fetch_all(query, values):
+            sample = samples.setdefault(row["category_id"], {
+                "category_name": row["category_name"], "recent_avg_confidence": None, "recent_reasons": []
+            })
+            if row["confidence_score"] is not None:
+                confidences.setdefault(row["category_id"], []).append(float(row["confidence_score"]))
+            reason = row["feedback_reason"]
+            if reason and reason not in sample["recent_reasons"] and len(sample["recent_reasons"]) < REASONS_PER_CATEGORY:
+                sample["recent_reasons"].append(reason)
+        
+        for category_id, scores in confidences.items():
+            samples[category_id]["recent_avg_confidence"] = round(sum(scores) / len(scores), 3)
+        
+        return samples
+    
+    async def get_cooccurrence_counts(self) -> List[Dict[str, Any]]:
+        """All persisted category pair counts, for loading CategoryCooccurrence."""
+        if database is None:
+            return []
+        
+        rows = await database.fetch_all("""
+        SELECT category_a, category_b, co_accepts, co_rejects, substitutions
+        FROM category_cooccurrence
+        """)
+        
+        return [dict(row) for row in rows]
+    
     async def identify_missing_categories(
         self,
         confidence_threshold: float = 0.5,
         frequency_threshold: int = 5,
-        days: int = 30
+        days: int = 30,
+        n_clusters: int = 8,
+        batch_size: int = 500,
+        max_inputs: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Identify patterns in low-confidence matches that might indicate missing categories.
         
+        Streams every interaction in the window with a low-confidence match
+        and clusters the input embeddings batch by batch with mini-batch
+        k-means. Vectors stored with the interaction are used as-is; only
+        inputs without one are sent to the encoder, off the event loop. Only
+        centroids and a few representatives are kept in memory. At most
+        max_inputs interactions are read, oldest first.
+        
         Args:
             confidence_threshold: Max confidence to consider "low" (default: 0.5)
-            frequency_threshold: Min occurrences to suggest new category (default: 5)
+            frequency_threshold: Min cluster size to suggest new category (default: 5)
             days: Time window to analyze
+            n_clusters: Number of clusters to fit
+            batch_size: Interactions fetched and embedded per batch
+            max_inputs: Max interactions read (default: MISSING_CATEGORIES_MAX_INPUTS)
             
         Returns:
-            Suggested new categories based on patterns
+            Suggested new categories, largest cluster first
         """
         if database is None:
             return []
         
-        # Find interactions with low confidence matches
-        query = """
-        SELECT 
-            ui.user_input,
-            cf.category_name as best_match,
-            cf.confidence_score,
-            cf.feedback_type
-        FROM user_interactions ui
-        JOIN category_feedback cf ON ui.id = cf.interaction_id
-        WHERE cf.confidence_score < :threshold
-        AND ui.created_at > NOW() - INTERVAL '%s days'
-        ORDER BY ui.created_at DESC
-        LIMIT 100
-        """ % days
-        
-        results = await database.fetch_all(query, {"threshold": confidence_threshold})
+        from ..models.input_clusterer import InputClusterer
+        from ..models.text_encoder import EMBEDDING_MODEL
+        
+        clusterer = InputClusterer(n_clusters=n_clusters)
+        if max_inputs is None:
+            max_inputs = settings.missing_categories_max_inputs
+        
+        # Keyset pagination over (created_at, id); each interaction counted once
+        # however many of its matches fell below the threshold
+        cursor = None
+        fetched = 0
+        while fetched < max_inputs:
+            page_size = min(batch_size, max_inputs - fetched)
+            params = {"threshold": confidence_threshold, "batch_size": page_size}
+            cursor_clause = ""
+            if cursor is not None:
+                cursor_clause = "AND (ui.created_at, ui.id) > (:after_created_at, :after_id)"
+                params["after_created_at"], params["after_id"] = cursor
+        
+            query = """
+            SELECT ui.id, ui.created_at, ui.user_input, ui.input_embedding, ui.embedding_model
+            FROM user_interactions ui
+            WHERE ui.created_at > NOW() - INTERVAL '%s days'
+            %s
+            AND EXISTS (
+                SELECT 1 FROM category_feedback cf
+                WHERE cf.interaction_id = ui.id
+                AND cf.confidence_score < :threshold
+            )
+            ORDER BY ui.created_at, ui.id
+            LIMIT :batch_size
+            """ % (days, cursor_clause)
+        
+            rows = await database.fetch_all(query, params)
+            if not rows:
+                break
+            fetched += len(rows)
+        
+            rows_with_text = [row for row in rows if row['user_input'] and row['user_input'].strip()]
+            if rows_with_text:
+                texts = [row['user_input'].strip() for row in rows_with_text]
+                clusterer.partial_fit(await self._input_embeddings(rows_with_text, texts, EMBEDDING_MODEL), texts)
+        
+            cursor = (rows[-1]['created_at'], rows[-1]['id'])
+            if len(rows) < page_size:
+                break
+        
+        category_embeddings, category_names = self._loaded_category_embeddings()
+        clusters = clusterer.clusters(
+            min_size=frequency_threshold,
+            category_embeddings=category_embeddings,
+            category_names=category_names
+        )
         
-        # Analyze patterns (simplified - in production would use NLP clustering)
-        low_confidence_inputs = [row['user_input'] for row in results]
+        suggestions = []
+        for cluster in clusters:
+            theme = cluster['representative_inputs'][0] if cluster['representative_inputs'] else ""
+            suggestions.append({
+                "theme": theme,
+                "frequency": cluster['size'],
+                "suggestion": f"Consider creating category for inputs like '{theme}'",
+                **cluster
+            })
+        
+        logger.info(
+            f"Identified {len(suggestions)} potential missing categories "
+            f"from {clusterer.inputs_seen} low-confidence inputs"
+        )
         
-        # Extract common words (basic implementation)
-        word_freq = Counter()
-        for input_text in low_confidence_inputs:
-            words = input_text.lower().split()
-            word_freq.update(words)
+        return suggestions
+    
+    async def _input_embeddings(self, rows: List[Any], texts: List[str], model: str) -> np.ndarray:
+        """Stored input vectors where present for this model; embeds only the rest in a worker thread."""
+        from ..models.text_encoder import get_text_encoder
         
-        # Find common themes
-        common_themes = [
-            {
-                "theme": word,
-                "frequency": count,
-                "suggestion": f"Consider creating category related to '{word}'"
-            }
-            for word, count in word_freq.most_common(10)
-            if count >= frequency_threshold and len(word) > 3
-        ]
+        encoder = get_text_encoder()
+        return await asyncio.to_thread(stored_or_encoded, rows, texts, model, encoder.encode_batch)
+    
+    def _loaded_category_embeddings(self) -> Tuple[Optional[np.ndarray], Optional[List[str]]]:
+        """Embeddings and names of the categories the live matcher already holds, if any."""
+        from ..models import category_matcher
         
-        logger.info(f"Identified {len(common_themes)} potential missing categories")
+        # Never build a matcher (and re-embed the catalog) just for this report
+        matcher = category_matcher._category_matcher_instance
+        if matcher is None or matcher.category_embeddings is None:
+            return None, None
         
-        return common_themes
+        return matcher.category_embeddings, [category['name'] for category in matcher.categories]
 
 
 # Convenience function to get learning service instance
@@ -0,0 +1,185 @@
+"""
+Background Learning Worker - Recomputes category metrics off the request path
+
+Feedback submissions enqueue the category ids they touched. The worker waits a
+short coalescing window, collapses repeated ids into a distinct set and hands
+that set to CategoryLearningService in one bulk recomputation. Fresh success
+rates are then pushed into the live CategoryMatcher.
+"""
+from typing import Dict, Any, Iterable, List, Optional
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from .learning_service import get_learning_service
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+
+class LearningUpdateWorker:
+    """
+    In-process async worker that coalesces learning updates per category.
+    
+    Metrics are rolling aggregates, so a failed batch is logged and dropped
+    rather than retried; the next feedback for those categories recomputes
+    them from scratch.
+    """
+    
+    def __init__(self, coalesce_window: float = 2.0):
+        self.coalesce_window = coalesce_window
+        
+        # category_id -> monotonic time it was first enqueued in this window
+        self._pending: Dict[int, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        
+        # Performance tracking
+        self.enqueued = 0
+        self.coalesced = 0
+        self.batches_processed = 0
+        self.categories_processed = 0
+        self.failed_batches = 0
+        self.last_batch_size = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+        self.last_flush_at: Optional[float] = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the worker loop on the running event loop."""
+        if self.is_running:
+            return
+        
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Learning worker started (coalesce window {self.coalesce_window}s)")
+    
+    async def stop(self) -> None:
+        """Stop the worker, recomputing anything still pending first."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        await self.flush()
+        logger.info("Learning worker stopped")
+    
+    def enqueue(self, category_ids: Iterable[int]) -> None:
+        """Queue categories for recomputation; returns immediately."""
+        now = time.monotonic()
+        
+        for category_id in category_ids:
+            self.enqueued += 1
+            if category_id in self._pending:
+                self.coalesced += 1
+            else:
+                self._pending[category_id] = now
+        
+        if not self.is_running:
+            self.start()
+        
+        self._wakeup.set()
+    
+    async def flush(self) -> int:
+        """Recompute metrics for every pending category now. Returns the batch size."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            
+            batch, self._pending = self._pending, {}
+            oldest_enqueue = min(batch.values())
+            
+            try:
+                updated = await get_learning_service().update_metrics_for_categories(list(batch))
+                self.batches_processed += 1
+                self.categories_processed += len(batch)
+                self._push_success_rates(updated)
+            except Exception as e:
+                self.failed_batches += 1
+                logger.warning(f"Learning batch of {len(batch)} categories failed (non-critical): {str(e)}")
+            
+            now = time.monotonic()
+            self.last_batch_size = len(batch)
+            self.last_lag_seconds = now - oldest_enqueue
+            self.max_lag_seconds = max(self.max_lag_seconds, self.last_lag_seconds)
+            self.last_flush_at = now
+            
+            return len(batch)
+    
+    def _push_success_rates(self, updated: List[Dict[str, Any]]) -> None:
+        """Feed recomputed success counts into the live category matcher."""
+        if not updated:
+            return
+        
+        from ..models import category_matcher
+        
+        # Only update a matcher that is already serving; never build one here
+        matcher = category_matcher._category_matcher_instance
+        if matcher is None:
+            return
+        
+        try:
+            matcher.update_success_rates({
+                row['category_id']: (row['successful'], row['total_feedback'])
+                for row in updated
+            })
+        except Exception as e:
+            logger.warning(f"Failed to push success rates to category matcher: {str(e)}")
+    
+    async def _run(self) -> None:
+        """Wait for work, let the coalescing window fill, then flush."""
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.coalesce_window)
+            self._wakeup.clear()
+            await self.flush()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, lag and throughput statistics."""
+        now = time.monotonic()
+        oldest_pending_age = now - min(self._pending.values()) if self._pending else 0.0
+        
+        return {
+            "running": self.is_running,
+            "queue_depth": len(self._pending),
+            "oldest_pending_age_seconds": round(oldest_pending_age, 3),
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+            "last_batch_size": self.last_batch_size,
+            "seconds_since_last_flush": round(now - self.last_flush_at, 3) if self.last_flush_at else None,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "batches_processed": self.batches_processed,
+            "categories_processed": self.categories_processed,
+            "failed_batches": self.failed_batches,
+            "coalesce_window_seconds": self.coalesce_window
+        }
+
+
+# Global learning worker instance (singleton pattern)
+_learning_worker_instance: Optional[LearningUpdateWorker] = None
+
+
+def get_learning_worker() -> LearningUpdateWorker:
+    """Get or create the global learning worker instance"""
+    global _learning_worker_instance
+    
+    if _learning_worker_instance is None:
+        _learning_worker_instance = LearningUpdateWorker(
+            coalesce_window=settings.learning_coalesce_window_seconds
+        )
+    
+    return _learning_worker_instance
@@ -0,0 +1,176 @@
+"""
+LLM Response Cache - Reuses GPT results for repeated admin prompts
+
+Category previews and transforms send large prompts at a fixed model and
+temperature, and admins often resubmit the same description. Parsed results
+are cached in process memory keyed by (model, temperature, request hash,
+catalog version). The request is the prompt or the inputs it is built from;
+keying on the inputs lets callers skip building the prompt on a hit. The
+catalog version is a fingerprint of the active categories' ids and update
+times, so any category change makes earlier entries unreachable.
+
+Entries expire after a TTL and the least recently used ones are evicted past
+max_entries. Concurrent identical requests share one GPT call. Callers can
+bypass the lookup to force a fresh result, which then replaces the cached one.
+"""
+from typing import Dict, Any, Awaitable, Callable, Iterable, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import copy
+import hashlib
+import logging
+import time
+
+from ..config import settings
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+
+def catalog_version(categories: Iterable[Dict[str, Any]]) -> str:
+    """Fingerprint of the active catalog: changes when a category is added, edited or removed"""
+    digest = hashlib.sha256()
+    for category in sorted(categories, key=lambda category: category["id"]):
+        digest.update(f"{category['id']}:{category.get('updated_at')};".encode())
+    return digest.hexdigest()[:16]
+
+
+class LLMResponseCache:
+    """In-memory LRU cache of parsed LLM responses with a TTL."""
+    
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        
+        # key -> (monotonic time stored, parsed response)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        
+        # Performance tracking
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.bypassed = 0
+        self.saved_seconds = 0.0
+        self._compute_seconds: Dict[str, float] = {}
+    
+    @staticmethod
+    def key(model: str, temperature: float, request: str, version: str) -> str:
+        request_hash = hashlib.sha256(request.encode()).hexdigest()
+        return f"{model}:{temperature}:{version}:{request_hash}"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response for a key, or None when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        if time.monotonic() - entry[0] >= self.ttl:
+            del self._entries[key]
+            self._compute_seconds.pop(key, None)
+            self.expired += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry[1])
+    
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._compute_seconds.pop(evicted, None)
+            self.evictions += 1
+    
+    async def get_or_compute(
+        self,
+        model: str,
+        temperature: float,
+        request: str,
+        version: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        bypass: bool = False
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Cached response for the request, or compute() and cache its result
+        
+        Returns (response, whether it came from the cache). With bypass the
+        lookup is skipped and the fresh response replaces any cached one.
+        """
+        key = self.key(model, temperature, request, version)
+        
+        if bypass:
+            self.bypassed += 1
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                self._record_hit(key)
+                return cached, True
+        
+        # One computation per key; concurrent identical requests wait for it
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                if not bypass:
+                    cached = self.get(key)
+                    if cached is not None:
+                        self._record_hit(key)
+                        return cached, True
+                    self.misses += 1
+                
+                started = time.monotonic()
+                value = await compute()
+                self.put(key, value)
+                self._compute_seconds[key] = time.monotonic() - started
+                
+                return copy.deepcopy(value), False
+        finally:
+            if not lock.locked() and self._locks.get(key) is lock:
+                del self._locks[key]
+    
+    def _record_hit(self, key: str) -> None:
+        self.hits += 1
+        self.saved_seconds += self._compute_seconds.get(key, 0.0)
+    
+    def clear(self) -> int:
+        """Drop every entry; returns how many were cached"""
+        cleared = len(self._entries)
+        self._entries.clear()
+        self._compute_seconds.clear()
+        return cleared
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, size and eviction statistics."""
+        lookups = self.hits + self.misses
+        
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "bypassed": self.bypassed,
+            "saved_seconds": round(self.saved_seconds, 3)
+        }
+
+
+# Global LLM response cache instance (singleton pattern)
+_llm_response_cache_instance: Optional[LLMResponseCache] = None
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Get or create the global LLM response cache instance"""
+    global _llm_response_cache_instance
+    
+    if _llm_response_cache_instance is None:
+        _llm_response_cache_instance = LLMResponseCache(
+            max_entries=settings.llm_cache_max_entries,
+            ttl=settings.llm_cache_ttl_seconds
+        )
+    
+    return _llm_response_cache_instance
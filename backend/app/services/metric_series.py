@@ -0,0 +1,310 @@
+"""
+Metric Series - Downsampled per-category time series for trend reporting
+
+Series are read for many categories at once, one grouped query per call:
+
+- feedback, day/week buckets: the category_feedback_daily counters
+- feedback, hour buckets: category_feedback itself (covering created_at
+  indexes), limited to the last MAX_HOURLY_DAYS days
+- learning_metrics: the daily snapshot of each computed metric, day/week buckets
+
+Trend slopes for every category in a series are fitted in one vectorized
+weighted least-squares pass.
+"""
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import logging
+
+import numpy as np
+
+from ..db.database import database
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+BUCKETS = ('hour', 'day', 'week')
+FEEDBACK_METRICS = ('success_rate', 'feedback_count', 'avg_confidence', 'avg_rating')
+LEARNING_METRICS = ('success_rate', 'avg_confidence', 'avg_rating')
+
+# Hourly series read raw feedback rows, so their window is capped
+MAX_HOURLY_DAYS = 14
+
+# A success rate moving by at least this much per day is a trend
+TREND_THRESHOLD = 0.01
+# Fewer feedback items than this in the window always reads as stable
+TREND_MIN_SAMPLES = 5
+
+
+def trend_slopes(positions: np.ndarray, values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted least-squares slope of each row of values against positions
+    
+    values and weights are (series, buckets); empty buckets carry weight 0.
+    Rows with data in fewer than two distinct positions get slope 0.
+    """
+    weights = np.where(np.isnan(values), 0.0, weights)
+    values = np.nan_to_num(values)
+    
+    total = weights.sum(axis=1)
+    total = np.where(total > 0, total, 1.0)
+    position_mean = (weights * positions).sum(axis=1) / total
+    value_mean = (weights * values).sum(axis=1) / total
+    
+    deviation = positions[None, :] - position_mean[:, None]
+    covariance = (weights * deviation * (values - value_mean[:, None])).sum(axis=1)
+    variance = (weights * deviation ** 2).sum(axis=1)
+    
+    return np.where(variance > 1e-12, covariance / np.where(variance > 1e-12, variance, 1.0), 0.0)
+
+
+def classify_trend(slope: float, samples: int) -> str:
+    """'improving', 'declining' or 'stable' for a success rate slope (per day)."""
+    if samples < TREND_MIN_SAMPLES or abs(slope) < TREND_THRESHOLD:
+        return "stable"
+    return "improving" if slope > 0 else "declining"
+
+
+def _as_datetime(bucket) -> datetime:
+    if isinstance(bucket, datetime):
+        return bucket
+    return datetime.combine(bucket, datetime.min.time())
+
+
+class MetricSeriesService:
+    """Per-category time series and trends without per-category queries."""
+    
+    async def feedback_series(
+        self,
+        metric: str = "success_rate",
+        bucket: str = "day",
+        days: int = 30,
+        category_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Downsampled feedback metric per category
+        
+        Returns {"metric", "bucket", "period_days", "series"} where series maps
+        category_id -> {"points": [{"bucket", "value", "samples"}], "slope",
+        "samples"}. Slopes are in metric units per day.
+        """
+        if metric not in FEEDBACK_METRICS:
+            raise ValueError(f"Unknown feedback metric '{metric}', expected one of {', '.join(FEEDBACK_METRICS)}")
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket '{bucket}', expected one of {', '.join(BUCKETS)}")
+        if bucket == "hour" and days > MAX_HOURLY_DAYS:
+            raise ValueError(f"Hourly series cover at most {MAX_HOURLY_DAYS} days")
+        
+        if database is None:
+            logger.warning("Database not available - returning empty series")
+            return self._result(metric, bucket, days, {})
+        
+        rows = await self._feedback_buckets(bucket, days, category_ids)
+        
+        points = []
+        for row in rows:
+            total = row['total'] or 0
+            if metric == "success_rate":
+                value, samples = (row['successful'] / total if total else None), total
+            elif metric == "feedback_count":
+                value, samples = total, total
+            elif metric == "avg_confidence":
+                value, samples = (row['confidence_sum'] / total if total else None), total
+            else:
+                rating_count = row['rating_count'] or 0
+                value, samples = (row['rating_sum'] / rating_count if rating_count else None), rating_count
+            
+            points.append((row['category_id'], row['bucket'], value, samples))
+        
+        # Counts are fitted as-is; rates and averages weight each bucket by its sample size
+        return self._result(metric, bucket, days, self._build_series(points, weighted=metric != "feedback_count"))
+    
+    async def learning_metric_series(
+        self,
+        metric: str = "success_rate",
+        bucket: str = "day",
+        days: int = 30,
+        category_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Downsampled learning_metrics snapshots per category
+        
+        Each point is the average of the daily snapshots in its bucket,
+        weighted in the slope fit by the snapshot's sample size.
+        """
+        if metric not in LEARNING_METRICS:
+            raise ValueError(f"Unknown learning metric '{metric}', expected one of {', '.join(LEARNING_METRICS)}")
+        if bucket not in ("day", "week"):
+            raise ValueError("learning_metrics are computed daily; use day or week buckets")
+        
+        if database is None:
+            logger.warning("Database not available - returning empty series")
+            return self._result(metric, bucket, days, {})
+        
+        bucket_expression = "day" if bucket == "day" else "date_trunc('week', day)::date"
+        where_category, values = self._category_filter(category_ids)
+        values["metric_type"] = metric
+        
+        query = f"""
+        SELECT
+            category_id,
+            {bucket_expression} as bucket,
+            AVG(metric_value) as value,
+            MAX(sample_size) as samples
+        FROM learning_metrics
+        WHERE metric_type = :metric_type
+        AND time_period = 'daily'
+        AND day > CURRENT_DATE - %s
+        {where_category}
+        GROUP BY category_id, bucket
+        """ % days
+        
+        rows = await database.fetch_all(query, values)
+        points = [(row['category_id'], row['bucket'], row['value'], row['samples']) for row in rows]
+        
+        return self._result(metric, bucket, days, self._build_series(points))
+    
+    async def category_trends(self, days: int = 7) -> Dict[int, Dict[str, Any]]:
+        """
+        Success rate trend, last feedback time and average confidence per category
+        
+        Two grouped queries for every category with feedback: the daily series
+        over the trend window and the all-time totals.
+        """
+        if database is None:
+            return {}
+        
+        series = await self.feedback_series("success_rate", "day", days)
+        
+        totals = await database.fetch_all("""
+        SELECT
+            category_id,
+            MAX(updated_at) as last_used,
+            SUM(confidence_sum) / NULLIF(SUM(accept_count + reject_count + maybe_count + irrelevant_count), 0) as avg_confidence
+        FROM category_feedback_daily
+        GROUP BY category_id
+        """)
+        
+        trends = {}
+        for row in totals:
+            category_series = series["series"].get(row['category_id'], {"slope": 0.0, "samples": 0})
+            trends[row['category_id']] = {
+                "trend": classify_trend(category_series["slope"], category_series["samples"]),
+                "slope": category_series["slope"],
+                "last_used": row['last_used'].isoformat() if row['last_used'] else None,
+                "avg_confidence": float(row['avg_confidence']) if row['avg_confidence'] is not None else 0.0
+            }
+        
+        return trends
+    
+    async def _feedback_buckets(self, bucket: str, days: int, category_ids: Optional[List[int]]):
+        where_category, values = self._category_filter(category_ids)
+        
+        if bucket == "hour":
+            query = f"""
+            SELECT
+                category_id,
+                date_trunc('hour', created_at) as bucket,
+                COUNT(*) as total,
+                COUNT(*) FILTER (WHERE feedback_type IN ('accept', 'maybe')) as successful,
+                COALESCE(SUM(confidence_score), 0) as confidence_sum,
+                COALESCE(SUM(user_rating), 0) as rating_sum,
+                COUNT(user_rating) as rating_count
+            FROM category_feedback
+            WHERE created_at > NOW() - INTERVAL '%s days'
+            {where_category}
+            GROUP BY category_id, bucket
+            """ % days
+        else:
+            bucket_expression = "day" if bucket == "day" else "date_trunc('week', day)::date"
+            query = f"""
+            SELECT
+                category_id,
+                {bucket_expression} as bucket,
+                SUM(accept_count + reject_count + maybe_count + irrelevant_count) as total,
+                SUM(accept_count + maybe_count) as successful,
+                SUM(confidence_sum) as confidence_sum,
+                SUM(rating_sum) as rating_sum,
+                SUM(rating_count) as rating_count
+            FROM category_feedback_daily
+            WHERE day > CURRENT_DATE - %s
+            {where_category}
+            GROUP BY category_id, bucket
+            """ % days
+        
+        return await database.fetch_all(query, values)
+    
+    def _category_filter(self, category_ids: Optional[List[int]]) -> Tuple[str, Dict[str, Any]]:
+        if not category_ids:
+            return "", {}
+        
+        placeholders = ', '.join(f":category_id_{i}" for i in range(len(category_ids)))
+        values = {f"category_id_{i}": category_id for i, category_id in enumerate(category_ids)}
+        return f"AND category_id IN ({placeholders})", values
+    
+    def _build_series(
+        self,
+        points: List[Tuple[int, Any, Optional[float], int]],
+        weighted: bool = True
+    ) -> Dict[int, Dict[str, Any]]:
+        """Group (category_id, bucket, value, samples) points and fit every slope at once."""
+        if not points:
+            return {}
+        
+        category_ids = sorted({category_id for category_id, _, _, _ in points})
+        buckets = sorted({bucket for _, bucket, _, _ in points})
+        row_index = {category_id: i for i, category_id in enumerate(category_ids)}
+        column_index = {bucket: i for i, bucket in enumerate(buckets)}
+        
+        values = np.full((len(category_ids), len(buckets)), np.nan)
+        samples_total = np.zeros(len(category_ids), dtype=np.int64)
+        for category_id, bucket, value, samples in points:
+            samples_total[row_index[category_id]] += int(samples or 0)
+            if value is not None:
+                values[row_index[category_id], column_index[bucket]] = float(value)
+        
+        if weighted:
+            weights = np.zeros_like(values)
+            for category_id, bucket, value, samples in points:
+                weights[row_index[category_id], column_index[bucket]] = float(samples or 0)
+        else:
+            weights = np.ones_like(values)
+        
+        # Positions in days, so slopes compare across bucket sizes
+        origin = _as_datetime(buckets[0])
+        positions = np.array([(_as_datetime(bucket) - origin).total_seconds() / 86400 for bucket in buckets])
+        slopes = trend_slopes(positions, values, weights)
+        
+        series = {
+            category_id: {"points": [], "slope": round(float(slopes[i]), 6), "samples": int(samples_total[i])}
+            for i, category_id in enumerate(category_ids)
+        }
+        for category_id, bucket, value, samples in sorted(points, key=lambda point: (point[0], point[1])):
+            series[category_id]["points"].append({
+                "bucket": bucket.isoformat(),
+                "value": float(value) if value is not None else None,
+                "samples": int(samples or 0)
+            })
+        
+        return series
+    
+    def _result(self, metric: str, bucket: str, days: int, series: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "metric": metric,
+            "bucket": bucket,
+            "period_days": days,
+            "series": series
+        }
+
+
+# Global metric series instance (singleton pattern)
+_metric_series_instance: Optional[MetricSeriesService] = None
+
+
+def get_metric_series() -> MetricSeriesService:
+    """Get or create the global metric series instance"""
+    global _metric_series_instance
+    
+    if _metric_series_instance is None:
+        _metric_series_instance = MetricSeriesService()
+    
+    return _metric_series_instance
@@ -0,0 +1,166 @@
+"""
+OpenAI Client - One pooled OpenAI client shared by every subsystem
+
+The text encoder, sentiment analyzer and category admin routes all call
+get_openai_client() instead of constructing their own OpenAI(). The client
+sits on one httpx connection pool with keep-alive, so TLS handshakes happen
+once per pooled connection rather than once per request or per subsystem.
+
+The pool's transport counts requests, in-flight concurrency and newly
+opened connections (at the pool's connection factory, so each connection is
+counted once however many requests race for it); get_openai_pool_stats()
+reports those together with the pool's current open/idle connections and
+queued requests.
+"""
+from typing import Dict, Any, Optional
+import logging
+import threading
+import time
+
+import httpx
+from openai import OpenAI
+
+from ..config import settings
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedTransport(httpx.HTTPTransport):
+    """httpx transport that keeps utilization counters for its connection pool."""
+    
+    def __init__(self, limits: Optional[httpx.Limits] = None, **kwargs):
+        # httpx's own default limits when none are given
+        self.limits = limits or httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        super().__init__(limits=self.limits, **kwargs)
+        self._lock = threading.Lock()
+        
+        # Count connections where the pool creates them
+        create_connection = self._pool.create_connection
+        
+        def counting_create_connection(origin):
+            with self._lock:
+                self.connections_opened += 1
+            return create_connection(origin)
+        
+        self._pool.create_connection = counting_create_connection
+        
+        # Performance tracking
+        self.requests = 0
+        self.failed_requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections_opened = 0
+        self.total_request_seconds = 0.0
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        
+        started = time.perf_counter()
+        try:
+            return super().handle_request(request)
+        except Exception:
+            with self._lock:
+                self.failed_requests += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.total_request_seconds += time.perf_counter() - started
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request counters and the pool's current connection usage."""
+        connections = list(self._pool.connections)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        active = len(connections) - idle
+        max_connections = self.limits.max_connections
+        
+        return {
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "open_connections": len(connections),
+            "active_connections": active,
+            "idle_connections": idle,
+            "utilization": round(active / max_connections, 4) if max_connections else None,
+            # In-flight requests not holding a connection are waiting for one
+            "queued_requests": max(0, self.in_flight - active),
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "connections_opened": self.connections_opened,
+            # Share of requests that reused a kept-alive connection
+            "connection_reuse_rate": (
+                round(max(0.0, 1 - self.connections_opened / self.requests), 4) if self.requests else None
+            ),
+            "avg_request_ms": round(self.total_request_seconds * 1000 / self.requests, 2) if self.requests else None
+        }
+
+
+# Global OpenAI client and its transport (singleton pattern)
+_openai_client_instance: Optional[OpenAI] = None
+_openai_transport_instance: Optional[InstrumentedTransport] = None
+_openai_client_lock = threading.Lock()
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Get or create the shared OpenAI client
+    
+    Raises ValueError when no API key is configured.
+    """
+    global _openai_client_instance, _openai_transport_instance
+    
+    if _openai_client_instance is not None:
+        return _openai_client_instance
+    
+    if not settings.openai_api_key:
+        raise ValueError("OpenAI API key not found in environment variables")
+    
+    with _openai_client_lock:
+        if _openai_client_instance is None:
+            transport = InstrumentedTransport(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_keepalive_connections,
+                    keepalive_expiry=settings.openai_keepalive_expiry_seconds
+                ),
+                retries=1  # connection-level retries only; the OpenAI client retries responses
+            )
+            timeout = httpx.Timeout(settings.openai_timeout_seconds, connect=settings.openai_connect_timeout_seconds)
+            
+            _openai_client_instance = OpenAI(
+                api_key=settings.openai_api_key,
+                timeout=timeout,
+                max_retries=settings.openai_max_retries,
+                http_client=httpx.Client(transport=transport, timeout=timeout)
+            )
+            _openai_transport_instance = transport
+            logger.info(
+                f"Shared OpenAI client created (max {settings.openai_max_connections} connections, "
+                f"{settings.openai_max_keepalive_connections} kept alive)"
+            )
+    
+    return _openai_client_instance
+
+
+def get_openai_pool_stats() -> Dict[str, Any]:
+    """Connection pool statistics of the shared client (empty until it is first used)."""
+    if _openai_transport_instance is None:
+        return {"initialized": False}
+    
+    return {"initialized": True, **_openai_transport_instance.get_stats()}
+
+
+def close_openai_client() -> None:
+    """Close the shared client's pooled connections (application shutdown)."""
+    global _openai_client_instance, _openai_transport_instance
+    
+    with _openai_client_lock:
+        if _openai_client_instance is not None:
+            _openai_client_instance.close()
+            _openai_client_instance = None
+            _openai_transport_instance = None
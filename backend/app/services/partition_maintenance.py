@@ -0,0 +1,295 @@
+"""
+Partition Maintenance - Keeps monthly event partitions ahead of time and expires old ones
+
+The event tables are range-partitioned by month (alembic revision
+partition_events_001). This routine creates partitions for upcoming months,
+detaches partitions past the retention window and either drops them or moves
+them to an archive schema, and prunes expired rows from the unpartitioned
+user_sessions table in small batches. Nothing is pruned until the event
+tables are partitioned. It only runs when PARTITION_MAINTENANCE_ENABLED is set.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date
+import asyncio
+import logging
+import re
+import time
+
+from ..config import settings
+from ..db.database import database
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+# Monthly range-partitioned tables (see alembic revision partition_events_001;
+# learning_metrics is partitioned by its `day` column since learning_metrics_dedup_001)
+PARTITIONED_TABLES = ('user_interactions', 'category_feedback', 'learning_metrics', 'openai_usage')
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def _add_months(month: date, count: int) -> date:
+    """First day of the month `count` months after `month`."""
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month a partition covers, parsed from its _pYYYYMM suffix."""
+    match = _PARTITION_SUFFIX.search(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+class PartitionMaintenance:
+    """
+    Periodic partition upkeep for the event tables.
+    
+    Expiring a month is a DETACH plus DROP (or SET SCHEMA), so retention no
+    longer depends on large DELETEs against the live tables.
+    """
+    
+    def __init__(
+        self,
+        retention_months: int = 12,
+        months_ahead: int = 3,
+        archive_schema: Optional[str] = None,
+        session_batch_size: int = 5000,
+        interval: float = 86400.0
+    ):
+        self.retention_months = retention_months
+        self.months_ahead = months_ahead
+        self.archive_schema = archive_schema or None
+        self.session_batch_size = session_batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        
+        # Performance tracking
+        self.runs = 0
+        self.failed_runs = 0
+        self.last_run_at: Optional[float] = None
+        self.last_report: Dict[str, Any] = {}
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Run maintenance now and then every interval on the running event loop."""
+        if self.is_running:
+            return
+        
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Partition maintenance started (every {self.interval}s, retention {self.retention_months} months)")
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        logger.info("Partition maintenance stopped")
+    
+    async def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Create upcoming partitions, expire old ones and prune sessions."""
+        if database is None:
+            return {}
+        
+        current_month = (today or date.today()).replace(day=1)
+        cutoff = _add_months(current_month, -self.retention_months)
+        
+        report = {
+            "created": [],
+            "archived": [],
+            "dropped": [],
+            "sessions_pruned": 0,
+            "errors": [],
+            "retention_cutoff": cutoff.isoformat()
+        }
+        
+        for table in PARTITIONED_TABLES:
+            try:
+                await self._maintain_table(table, current_month, cutoff, report)
+            except Exception as e:
+                # One table failing (e.g. rows stuck in its default partition) shouldn't block the rest
+                logger.error(f"Partition maintenance failed for {table}: {str(e)}")
+                report["errors"].append(f"{table}: {str(e)}")
+        
+        # Only once user_interactions is partitioned: before partition_events_001
+        # its session FK cascades, so each pruned session would delete events row by row
+        if await self.list_partitions('user_interactions') is not None:
+            report["sessions_pruned"] = await self.prune_sessions(cutoff)
+        else:
+            logger.warning("Skipping session pruning: user_interactions is not partitioned")
+        
+        self.runs += 1
+        self.last_run_at = time.monotonic()
+        self.last_report = report
+        
+        logger.info(
+            f"Partition maintenance: {len(report['created'])} created, "
+            f"{len(report['archived'])} archived, {len(report['dropped'])} dropped, "
+            f"{report['sessions_pruned']} sessions pruned"
+        )
+        
+        return report
+    
+    async def _maintain_table(self, table: str, current_month: date, cutoff: date, report: Dict[str, Any]) -> None:
+        partitions = await self.list_partitions(table)
+        if partitions is None:
+            # Table missing or not partitioned yet
+            return
+        
+        existing = {month for _, month in partitions}
+        for offset in range(self.months_ahead + 1):
+            month = _add_months(current_month, offset)
+            if month not in existing:
+                report["created"].append(await self._create_partition(table, month))
+        
+        for name, month in partitions:
+            if _add_months(month, 1) <= cutoff:
+                await self._expire_partition(table, name, report)
+    
+    async def list_partitions(self, table: str) -> Optional[List[Tuple[str, date]]]:
+        """Monthly partitions of a table as (name, month), or None if it isn't partitioned."""
+        is_partitioned = await database.fetch_one(
+            """
+            SELECT 1 AS partitioned
+            FROM pg_partitioned_table
+            WHERE partrelid = to_regclass(:table)
+            """,
+            {"table": table}
+        )
+        if not is_partitioned:
+            return None
+        
+        rows = await database.fetch_all(
+            """
+            SELECT c.relname AS name
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:table)
+            """,
+            {"table": table}
+        )
+        
+        partitions = []
+        for row in rows:
+            month = partition_month(row['name'])
+            if month is not None:
+                partitions.append((row['name'], month))
+        
+        return sorted(partitions, key=lambda partition: partition[1])
+    
+    async def _create_partition(self, table: str, month: date) -> str:
+        name = partition_name(table, month)
+        
+        await database.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {name}
+            PARTITION OF {table}
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')
+            """
+        )
+        
+        return name
+    
+    async def _expire_partition(self, table: str, name: str, report: Dict[str, Any]) -> None:
+        await database.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        
+        if self.archive_schema:
+            # A detached partition keeps the parent's foreign keys; drop them so
+            # pruning sessions can never touch archived rows
+            foreign_keys = await database.fetch_all(
+                """
+                SELECT conname
+                FROM pg_constraint
+                WHERE conrelid = to_regclass(:table) AND contype = 'f'
+                """,
+                {"table": name}
+            )
+            for row in foreign_keys:
+                await database.execute(f'ALTER TABLE {name} DROP CONSTRAINT "{row["conname"]}"')
+            
+            await database.execute(f"CREATE SCHEMA IF NOT EXISTS {self.archive_schema}")
+            await database.execute(f"ALTER TABLE {name} SET SCHEMA {self.archive_schema}")
+            report["archived"].append(f"{self.archive_schema}.{name}")
+        else:
+            await database.execute(f"DROP TABLE {name}")
+            report["dropped"].append(name)
+    
+    async def prune_sessions(self, cutoff: date) -> int:
+        """
+        Delete sessions idle since before the cutoff, one small batch at a time
+        
+        user_interactions references sessions ON DELETE SET NULL (since
+        partition_events_001), and an idle session's interactions are almost
+        all in partitions that have already expired, so this touches few rows.
+        """
+        pruned = 0
+        
+        while True:
+            rows = await database.fetch_all(
+                """
+                DELETE FROM user_sessions
+                WHERE id IN (
+                    SELECT id FROM user_sessions
+                    WHERE last_activity < :cutoff
+                    LIMIT :batch_size
+                )
+                RETURNING id
+                """,
+                {"cutoff": cutoff, "batch_size": self.session_batch_size}
+            )
+            
+            pruned += len(rows)
+            if len(rows) < self.session_batch_size:
+                return pruned
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.failed_runs += 1
+                logger.error(f"Partition maintenance failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        
+        return {
+            "running": self.is_running,
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "seconds_since_last_run": round(now - self.last_run_at, 3) if self.last_run_at else None,
+            "retention_months": self.retention_months,
+            "months_ahead": self.months_ahead,
+            "archive_schema": self.archive_schema,
+            "last_report": self.last_report
+        }
+
+
+# Global partition maintenance instance (singleton pattern)
+_partition_maintenance_instance: Optional[PartitionMaintenance] = None
+
+
+def get_partition_maintenance() -> PartitionMaintenance:
+    """Get or create the global partition maintenance instance"""
+    global _partition_maintenance_instance
+    
+    if _partition_maintenance_instance is None:
+        _partition_maintenance_instance = PartitionMaintenance(
+            retention_months=settings.partition_retention_months,
+            months_ahead=settings.partition_months_ahead,
+            archive_schema=settings.partition_archive_schema
+        )
+    
+    return _partition_maintenance_instance
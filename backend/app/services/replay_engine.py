@@ -0,0 +1,293 @@
+"""
+Replay Engine - Re-scores historical interactions against a candidate matcher configuration
+
+Streams stored category_matching interactions (keyset pages over
+user_interactions, with their recorded feedback), reuses stored input
+embeddings where they match the current embedding model, scores every page
+with CategoryMatcher.score_batch, and compares the candidate top-k with what
+was served and with what users accepted or rejected.
+
+Intended for offline use before changing matcher weights, thresholds or the
+catalog (see scripts/replay_interactions.py).
+"""
+from typing import List, Dict, Any, Optional, Tuple
+from collections import Counter
+from datetime import datetime
+import copy
+import json
+import logging
+import time
+
+from ..db.database import database
+from ..models.category_matcher import CategoryMatcher
+from ..models.text_encoder import EMBEDDING_MODEL, get_text_encoder
+from ..utils.embeddings import stored_or_encoded
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+# CategoryMatcher attributes a replay may override
+TUNABLE_PARAMETERS = (
+    'similarity_weight',
+    'keyword_weight',
+    'success_rate_weight',
+    'min_similarity_threshold',
+    'min_confidence_threshold',
+)
+
+
+def configured_matcher(
+    base: CategoryMatcher,
+    overrides: Optional[Dict[str, float]] = None,
+    categories: Optional[List[Dict[str, Any]]] = None
+) -> CategoryMatcher:
+    """
+    Copy of a loaded matcher with some parameters (and optionally the catalog) replaced
+    
+    The base matcher is left untouched. Replacing the catalog re-embeds it.
+    """
+    unknown = set(overrides or {}) - set(TUNABLE_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown matcher parameters: {', '.join(sorted(unknown))}")
+    
+    matcher = copy.copy(base)
+    matcher.success_rates = base.success_rates.copy()
+    matcher._keyword_index = None
+    for name, value in (overrides or {}).items():
+        setattr(matcher, name, float(value))
+    
+    if categories is not None:
+        matcher.load_categories(categories)
+    
+    return matcher
+
+
+def overlap_at_k(reference: List[int], candidate: List[int]) -> float:
+    """
+    Share of two top-k lists that agrees: |intersection| / length of the longer list
+    
+    Lists shorter than k (few categories above threshold) are compared at
+    their own length; two empty lists agree fully. Shared with shadow scoring
+    so offline replays and live shadowing report the same figure.
+    """
+    longest = max(len(reference), len(candidate))
+    return len(set(reference) & set(candidate)) / longest if longest else 1.0
+
+
+class ReplayReport:
+    """Running totals for one replay; as_dict() turns them into rates."""
+    
+    def __init__(self, top_k: int):
+        self.top_k = top_k
+        self.interactions = 0
+        self.with_served = 0
+        self.with_feedback = 0
+        
+        # Ranking drift (interactions with a recorded served list)
+        self.top1_changed = 0
+        self.overlap_sum = 0.0
+        self.identical = 0
+        self.entered: Counter = Counter()
+        self.dropped: Counter = Counter()
+        
+        # Acceptance proxy (interactions with feedback): accepted/rejected categories in the top-k
+        self.accepted_total = 0
+        self.served_slots = 0
+        self.replay_slots = 0
+        self.served_accepted = 0
+        self.replay_accepted = 0
+        self.served_rejected = 0
+        self.replay_rejected = 0
+        
+        # Throughput
+        self.batches = 0
+        self.embeddings_reused = 0
+        self.embeddings_encoded = 0
+        self.fetch_seconds = 0.0
+        self.embed_seconds = 0.0
+        self.score_seconds = 0.0
+    
+    def add(self, served: List[int], replayed: List[int], accepted: set, rejected: set) -> None:
+        self.interactions += 1
+        
+        if served:
+            self.with_served += 1
+            served_set, replay_set = set(served), set(replayed)
+            self.overlap_sum += overlap_at_k(served, replayed)
+            self.identical += served == replayed
+            self.top1_changed += not replayed or replayed[0] != served[0]
+            self.entered.update(replay_set - served_set)
+            self.dropped.update(served_set - replay_set)
+        
+        if accepted or rejected:
+            self.with_feedback += 1
+            self.accepted_total += len(accepted)
+            self.served_slots += len(served)
+            self.replay_slots += len(replayed)
+            self.served_accepted += len(accepted & set(served))
+            self.replay_accepted += len(accepted & set(replayed))
+            self.served_rejected += len(rejected & set(served))
+            self.replay_rejected += len(rejected & set(replayed))
+    
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        def rate(numerator, denominator):
+            return round(numerator / denominator, 4) if denominator else None
+        
+        return {
+            "interactions": self.interactions,
+            "top_k": self.top_k,
+            "ranking_drift": {
+                "compared": self.with_served,
+                "identical_rate": rate(self.identical, self.with_served),
+                "top1_changed_rate": rate(self.top1_changed, self.with_served),
+                "mean_overlap_at_k": rate(self.overlap_sum, self.with_served),
+                "most_entered": [{"category_id": c, "count": n} for c, n in self.entered.most_common(10)],
+                "most_dropped": [{"category_id": c, "count": n} for c, n in self.dropped.most_common(10)]
+            },
+            "acceptance_proxy": {
+                "interactions_with_feedback": self.with_feedback,
+                # Share of accepted categories that appear in the top-k
+                "served_accepted_recall": rate(self.served_accepted, self.accepted_total),
+                "replay_accepted_recall": rate(self.replay_accepted, self.accepted_total),
+                # Share of top-k slots taken by categories the user rejected
+                "served_rejected_rate": rate(self.served_rejected, self.served_slots),
+                "replay_rejected_rate": rate(self.replay_rejected, self.replay_slots)
+            },
+            "throughput": {
+                "batches": self.batches,
+                "elapsed_seconds": round(elapsed, 3),
+                "interactions_per_second": rate(self.interactions, elapsed),
+                "scored_per_second": rate(self.interactions, self.score_seconds),
+                "fetch_seconds": round(self.fetch_seconds, 3),
+                "embed_seconds": round(self.embed_seconds, 3),
+                "score_seconds": round(self.score_seconds, 3),
+                "embeddings_reused": self.embeddings_reused,
+                "embeddings_encoded": self.embeddings_encoded
+            }
+        }
+
+
+class ReplayEngine:
+    """Streams historical interactions through a candidate matcher in large batches."""
+    
+    def __init__(self, matcher: CategoryMatcher, top_k: int = 5, batch_size: int = 2000):
+        self.matcher = matcher
+        self.top_k = top_k
+        self.batch_size = batch_size
+    
+    async def run(
+        self,
+        days: int = 30,
+        limit: Optional[int] = None,
+        category_types: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Replay up to `limit` category_matching interactions from the last `days` days."""
+        if database is None:
+            raise RuntimeError("Database not available")
+        
+        report = ReplayReport(self.top_k)
+        category_ids = [category['id'] for category in self.matcher.categories]
+        started = time.monotonic()
+        cursor: Optional[Tuple[datetime, Any]] = None
+        
+        while limit is None or report.interactions < limit:
+            batch_size = self.batch_size if limit is None else min(self.batch_size, limit - report.interactions)
+            
+            fetch_started = time.monotonic()
+            rows = await self._fetch_page(days, cursor, batch_size)
+            report.fetch_seconds += time.monotonic() - fetch_started
+            if not rows:
+                break
+            
+            page_size = len(rows)
+            cursor = (rows[-1]['created_at'], rows[-1]['id'])
+            rows = [row for row in rows if row['user_input']]
+            
+            if rows:
+                texts = [row['user_input'] for row in rows]
+                
+                embed_started = time.monotonic()
+                embeddings = stored_or_encoded(rows, texts, EMBEDDING_MODEL, self._encode)
+                report.embed_seconds += time.monotonic() - embed_started
+                
+                encoded = sum(
+                    1 for row in rows
+                    if row['input_embedding'] is None or row['embedding_model'] != EMBEDDING_MODEL
+                )
+                report.embeddings_encoded += encoded
+                report.embeddings_reused += len(rows) - encoded
+                
+                score_started = time.monotonic()
+                positions, _ = self.matcher.score_batch(texts, embeddings, category_types, self.top_k)
+                report.score_seconds += time.monotonic() - score_started
+                
+                for row, row_positions in zip(rows, positions):
+                    replayed = [category_ids[p] for p in row_positions if p >= 0]
+                    report.add(
+                        self._served_ids(row)[:self.top_k],
+                        replayed,
+                        set(row['accepted'] or []),
+                        set(row['rejected'] or [])
+                    )
+            
+            report.batches += 1
+            if page_size < batch_size:
+                break
+        
+        result = report.as_dict(time.monotonic() - started)
+        logger.info(
+            f"Replayed {report.interactions} interactions: "
+            f"top-1 changed for {result['ranking_drift']['top1_changed_rate']}, "
+            f"{result['throughput']['scored_per_second']} scored/s"
+        )
+        
+        return result
+    
+    def _encode(self, texts: List[str]):
+        return get_text_encoder().encode_batch(texts)
+    
+    async def _fetch_page(self, days: int, cursor: Optional[Tuple[datetime, Any]], batch_size: int):
+        values: Dict[str, Any] = {"batch_size": batch_size}
+        after = ""
+        if cursor is not None:
+            after = "AND (ui.created_at, ui.id) > (:after_created_at, :after_id)"
+            values["after_created_at"], values["after_id"] = cursor
+        
+        query = f"""
+        SELECT
+            ui.id,
+            ui.created_at,
+            ui.user_input,
+            ui.input_embedding,
+            ui.embedding_model,
+            ui.interaction_metadata,
+            fb.accepted,
+            fb.rejected
+        FROM user_interactions ui
+        LEFT JOIN LATERAL (
+            SELECT
+                ARRAY_AGG(cf.category_id) FILTER (WHERE cf.feedback_type IN ('accept', 'maybe')) as accepted,
+                ARRAY_AGG(cf.category_id) FILTER (WHERE cf.feedback_type IN ('reject', 'irrelevant')) as rejected
+            FROM category_feedback cf
+            WHERE cf.interaction_id = ui.id
+        ) fb ON TRUE
+        WHERE ui.interaction_type = 'category_matching'
+        AND ui.created_at > NOW() - INTERVAL '%s days'
+        {after}
+        ORDER BY ui.created_at, ui.id
+        LIMIT :batch_size
+        """ % days
+        
+        return await database.fetch_all(query, values)
+    
+    def _served_ids(self, row) -> List[int]:
+        """Category ids served for the interaction, in served order."""
+        metadata = row['interaction_metadata']
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        
+        return [
+            detail['category_id']
+            for detail in (metadata or {}).get('match_details', [])
+            if detail.get('category_id') is not None
+        ]
@@ -0,0 +1,247 @@
+"""
+Session Activity Tracker - Coalesces user_sessions writes off the request path
+
+Requests record activity in an in-memory session table. A session's row is
+inserted the first time this process sees it (user_interactions references
+it), after which activity and interaction deltas accumulate in memory and a
+periodic background flush writes them as one bulk upsert.
+"""
+from typing import Dict, Any, Optional
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from ..db.database import database
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityTracker:
+    """
+    In-process table of session activity with periodic bulk flushing.
+    
+    Deltas are additive, so a failed flush merges its batch back into the
+    pending table and the next flush writes it.
+    """
+    
+    def __init__(self, flush_interval: float = 5.0, seen_ttl: float = 7200.0):
+        self.flush_interval = flush_interval
+        self.seen_ttl = seen_ttl
+        
+        # session_id -> monotonic time it was last seen (first-seen insert already done)
+        self._seen: Dict[str, float] = {}
+        # session_id -> {"user_ip", "user_agent", "interactions", "last_activity"}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # session_id -> in-flight first-seen insert, shared by concurrent requests
+        self._inserting: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        
+        # Performance tracking
+        self.activity_recorded = 0
+        self.first_seen_inserts = 0
+        self.flushes = 0
+        self.sessions_flushed = 0
+        self.failed_flushes = 0
+        self.last_flush_size = 0
+        self.last_flush_at: Optional[float] = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the periodic flush loop on the running event loop."""
+        if self.is_running:
+            return
+        
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Session tracker started (flush interval {self.flush_interval}s)")
+    
+    async def stop(self) -> None:
+        """Stop the flush loop, writing anything still pending first."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        await self.flush()
+        logger.info("Session tracker stopped")
+    
+    async def record_activity(self, session_id: str, user_ip: str, user_agent: str) -> None:
+        """
+        Record one interaction for a session.
+        
+        Only the first call for a session in this process touches the
+        database; every later call is an in-memory update.
+        """
+        now = time.monotonic()
+        
+        if session_id not in self._seen:
+            await self._ensure_inserted(session_id, user_ip, user_agent)
+        self._seen[session_id] = now
+        
+        pending = self._pending.get(session_id)
+        if pending is None:
+            pending = self._pending[session_id] = {
+                "user_ip": user_ip,
+                "user_agent": user_agent,
+                "interactions": 0
+            }
+        pending["interactions"] += 1
+        pending["last_activity"] = datetime.utcnow()
+        self.activity_recorded += 1
+        
+        if not self.is_running:
+            self.start()
+    
+    async def _ensure_inserted(self, session_id: str, user_ip: str, user_agent: str) -> None:
+        """Insert a new session once, even when several requests race on it."""
+        in_flight = self._inserting.get(session_id)
+        if in_flight is not None:
+            await in_flight
+            return
+        
+        in_flight = self._inserting[session_id] = asyncio.get_running_loop().create_future()
+        try:
+            await self._insert_session(session_id, user_ip, user_agent)
+            self.first_seen_inserts += 1
+            in_flight.set_result(None)
+        except Exception as e:
+            in_flight.set_exception(e)
+            # Mark retrieved so an insert nobody else awaited doesn't warn
+            in_flight.exception()
+            raise
+        finally:
+            del self._inserting[session_id]
+    
+    async def _insert_session(self, session_id: str, user_ip: str, user_agent: str) -> None:
+        """Create the session row so interactions can reference it."""
+        query = """
+        INSERT INTO user_sessions (session_id, user_ip, user_agent, last_activity)
+        VALUES (:session_id, :user_ip, :user_agent, NOW())
+        ON CONFLICT (session_id) DO NOTHING
+        """
+        
+        await database.execute(query, {
+            "session_id": session_id,
+            "user_ip": user_ip,
+            "user_agent": user_agent
+        })
+    
+    async def flush(self) -> int:
+        """Write all pending session deltas in one upsert. Returns the number of sessions."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            self._prune_seen()
+            
+            if not self._pending:
+                return 0
+            
+            batch, self._pending = self._pending, {}
+            
+            try:
+                await self._upsert_sessions(batch)
+                self.flushes += 1
+                self.sessions_flushed += len(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                self._requeue(batch)
+                logger.warning(f"Session flush of {len(batch)} sessions failed, will retry: {str(e)}")
+            
+            self.last_flush_size = len(batch)
+            self.last_flush_at = time.monotonic()
+            
+            return len(batch)
+    
+    async def _upsert_sessions(self, batch: Dict[str, Dict[str, Any]]) -> None:
+        """Apply interaction deltas and last activity for many sessions in one statement."""
+        value_rows = []
+        values = {}
+        
+        for i, (session_id, pending) in enumerate(batch.items()):
+            value_rows.append(
+                f"(:session_id_{i}, :user_ip_{i}, :user_agent_{i}, :last_activity_{i}, :interactions_{i})"
+            )
+            values[f"session_id_{i}"] = session_id
+            values[f"user_ip_{i}"] = pending["user_ip"]
+            values[f"user_agent_{i}"] = pending["user_agent"]
+            values[f"last_activity_{i}"] = pending["last_activity"]
+            values[f"interactions_{i}"] = pending["interactions"]
+        
+        query = f"""
+        INSERT INTO user_sessions (session_id, user_ip, user_agent, last_activity, total_interactions)
+        VALUES {', '.join(value_rows)}
+        ON CONFLICT (session_id)
+        DO UPDATE SET
+            last_activity = GREATEST(user_sessions.last_activity, EXCLUDED.last_activity),
+            total_interactions = user_sessions.total_interactions + EXCLUDED.total_interactions
+        """
+        
+        await database.execute(query, values)
+    
+    def _requeue(self, batch: Dict[str, Dict[str, Any]]) -> None:
+        """Merge a failed batch back into the pending table."""
+        for session_id, failed in batch.items():
+            pending = self._pending.get(session_id)
+            if pending is None:
+                self._pending[session_id] = failed
+            else:
+                pending["interactions"] += failed["interactions"]
+    
+    def _prune_seen(self) -> None:
+        """Forget sessions idle longer than the TTL (session ids rotate hourly)."""
+        cutoff = time.monotonic() - self.seen_ttl
+        stale = [session_id for session_id, last_seen in self._seen.items() if last_seen < cutoff]
+        for session_id in stale:
+            del self._seen[session_id]
+    
+    async def _run(self) -> None:
+        """Flush pending session activity on a fixed interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session table size and flush statistics."""
+        now = time.monotonic()
+        
+        return {
+            "running": self.is_running,
+            "known_sessions": len(self._seen),
+            "pending_sessions": len(self._pending),
+            "pending_interactions": sum(p["interactions"] for p in self._pending.values()),
+            "activity_recorded": self.activity_recorded,
+            "first_seen_inserts": self.first_seen_inserts,
+            "flushes": self.flushes,
+            "sessions_flushed": self.sessions_flushed,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_size": self.last_flush_size,
+            "seconds_since_last_flush": round(now - self.last_flush_at, 3) if self.last_flush_at else None,
+            "flush_interval_seconds": self.flush_interval
+        }
+
+
+# Global session tracker instance (singleton pattern)
+_session_tracker_instance: Optional[SessionActivityTracker] = None
+
+
+def get_session_tracker() -> SessionActivityTracker:
+    """Get or create the global session tracker instance"""
+    global _session_tracker_instance
+    
+    if _session_tracker_instance is None:
+        _session_tracker_instance = SessionActivityTracker(
+            flush_interval=settings.session_flush_interval_seconds
+        )
+    
+    return _session_tracker_instance
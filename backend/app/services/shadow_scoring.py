@@ -0,0 +1,304 @@
+"""
+Shadow Scoring - Scores live requests with a candidate matcher off the request path
+
+While a candidate configuration is enabled (see replay_engine.configured_matcher),
+find-matches hands each request's already-computed input embedding and its
+served top-k to the shadow scorer after the response is sent. A background
+loop scores queued requests in batches with CategoryMatcher.score_batch against
+the candidate's catalog snapshot and records overlap@k, top-1 agreement and
+the latency difference to the primary path.
+
+Shadowing is kept inside a hard CPU budget: scoring runs on one dedicated
+thread, batches are capped, and after each batch the loop sleeps long enough
+that shadow CPU time stays below `cpu_budget` of one core. Requests arriving
+while the queue is full are dropped, never waited for.
+"""
+from typing import Dict, Any, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import random
+import time
+
+import numpy as np
+
+from ..config import settings
+from ..models.category_matcher import CategoryMatcher
+from .replay_engine import overlap_at_k
+
+# Use standard logging
+logger = logging.getLogger(__name__)
+
+# Recent per-request latency deltas kept for percentiles
+LATENCY_WINDOW = 2000
+
+
+class ShadowScorer:
+    """
+    In-process shadow evaluation of one candidate matcher.
+    
+    Results are only aggregated in memory; enabling a new candidate resets them.
+    """
+    
+    def __init__(
+        self,
+        cpu_budget: float = 0.05,
+        queue_size: int = 1000,
+        batch_size: int = 64,
+        sample_rate: float = 1.0
+    ):
+        self.cpu_budget = cpu_budget
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.sample_rate = sample_rate
+        
+        self.candidate: Optional[CategoryMatcher] = None
+        self.candidate_label: Optional[str] = None
+        self.enabled_at: Optional[float] = None
+        
+        self._queue: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        self._reset_results()
+    
+    def _reset_results(self) -> None:
+        # Performance tracking
+        self.submitted = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.incompatible = 0
+        self.failed_batches = 0
+        self.batches_scored = 0
+        self.cpu_seconds = 0.0
+        self.throttled_seconds = 0.0
+        
+        # Comparison with the primary results
+        self.compared = 0
+        self.overlap_sum = 0.0
+        self.top1_agreements = 0
+        self.primary_ms_sum = 0.0
+        self.shadow_ms_sum = 0.0
+        self._latency_deltas: deque = deque(maxlen=LATENCY_WINDOW)
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    @property
+    def is_enabled(self) -> bool:
+        return self.candidate is not None
+    
+    def start(self) -> None:
+        """Start the scoring loop on the running event loop."""
+        if self.is_running:
+            return
+        
+        self._wakeup = asyncio.Event()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-scoring")
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Shadow scorer started (CPU budget {self.cpu_budget:.0%} of one core)")
+    
+    async def stop(self) -> None:
+        """Stop the loop; queued requests are discarded."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        self._queue.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        logger.info("Shadow scorer stopped")
+    
+    def enable(self, candidate: CategoryMatcher, label: Optional[str] = None, sample_rate: Optional[float] = None) -> None:
+        """Shadow every sampled request with `candidate` from now on."""
+        if not candidate.categories or candidate.category_embeddings is None:
+            raise ValueError("Candidate matcher has no categories loaded")
+        
+        self._queue.clear()
+        self._reset_results()
+        self.candidate = candidate
+        self.candidate_label = label
+        self.enabled_at = time.monotonic()
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        logger.info(f"Shadow scoring enabled for '{label}' ({len(candidate.categories)} categories)")
+    
+    def disable(self) -> None:
+        self.candidate = None
+        self._queue.clear()
+        logger.info("Shadow scoring disabled")
+    
+    def submit(
+        self,
+        user_input: str,
+        user_embedding: np.ndarray,
+        primary_ids: List[int],
+        primary_ms: float,
+        category_types: Optional[List[str]] = None,
+        top_k: int = 5
+    ) -> bool:
+        """
+        Queue a served request for shadow scoring; returns immediately.
+        
+        Returns False when shadowing is off, the request was sampled out or
+        the queue is full.
+        """
+        if self.candidate is None:
+            return False
+        
+        self.submitted += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+        if len(self._queue) >= self.queue_size:
+            self.dropped += 1
+            return False
+        
+        if not self.is_running:
+            self.start()
+        
+        self._queue.append({
+            "candidate": self.candidate,
+            "user_input": user_input,
+            "user_embedding": user_embedding,
+            "primary_ids": primary_ids,
+            "primary_ms": primary_ms,
+            "category_types": tuple(category_types) if category_types else None,
+            "top_k": top_k
+        })
+        self._wakeup.set()
+        return True
+    
+    async def _run(self) -> None:
+        """Score queued requests, sleeping after each batch to stay inside the CPU budget."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                
+                try:
+                    cpu_seconds = await loop.run_in_executor(self._executor, self._score, batch)
+                except Exception as e:
+                    self.failed_batches += 1
+                    logger.warning(f"Shadow scoring batch of {len(batch)} failed (non-critical): {str(e)}")
+                    continue
+                
+                # A batch that used c CPU seconds buys c / budget seconds of wall time
+                pause = cpu_seconds * (1.0 - self.cpu_budget) / self.cpu_budget
+                self.throttled_seconds += pause
+                await asyncio.sleep(pause)
+    
+    def _score(self, batch: List[Dict[str, Any]]) -> float:
+        """Score one batch on the shadow thread; returns the CPU seconds it used."""
+        started = time.thread_time()
+        
+        # Requests queued under a previous candidate, or with a different filter/top-k, score separately
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for request in batch:
+            key = (id(request["candidate"]), request["category_types"], request["top_k"])
+            groups.setdefault(key, []).append(request)
+        
+        for requests in groups.values():
+            candidate = requests[0]["candidate"]
+            if candidate is not self.candidate:
+                continue
+            
+            dimension = candidate.category_embeddings.shape[1]
+            compatible = [r for r in requests if np.shape(r["user_embedding"])[-1] == dimension]
+            self.incompatible += len(requests) - len(compatible)
+            if not compatible:
+                continue
+            
+            scoring_started = time.perf_counter()
+            positions, _ = candidate.score_batch(
+                [r["user_input"] for r in compatible],
+                np.vstack([np.reshape(r["user_embedding"], (1, -1)) for r in compatible]),
+                list(compatible[0]["category_types"]) if compatible[0]["category_types"] else None,
+                compatible[0]["top_k"]
+            )
+            # Batch scoring time is amortized evenly over its requests
+            shadow_ms = (time.perf_counter() - scoring_started) * 1000 / len(compatible)
+            
+            category_ids = [category['id'] for category in candidate.categories]
+            for request, row in zip(compatible, positions):
+                shadow_ids = [category_ids[p] for p in row if p >= 0]
+                self._record(request, shadow_ids, shadow_ms)
+        
+        self.batches_scored += 1
+        cpu_seconds = time.thread_time() - started
+        self.cpu_seconds += cpu_seconds
+        return cpu_seconds
+    
+    def _record(self, request: Dict[str, Any], shadow_ids: List[int], shadow_ms: float) -> None:
+        primary_ids = request["primary_ids"]
+        
+        self.compared += 1
+        self.overlap_sum += overlap_at_k(primary_ids, shadow_ids)
+        self.top1_agreements += primary_ids[:1] == shadow_ids[:1]
+        self.primary_ms_sum += request["primary_ms"]
+        self.shadow_ms_sum += shadow_ms
+        self._latency_deltas.append(shadow_ms - request["primary_ms"])
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get comparison results, queue depth and CPU usage."""
+        def mean(total):
+            return round(total / self.compared, 4) if self.compared else None
+        
+        elapsed = time.monotonic() - self.enabled_at if self.enabled_at else 0.0
+        deltas = np.array(self._latency_deltas) if self._latency_deltas else None
+        
+        return {
+            "enabled": self.is_enabled,
+            "running": self.is_running,
+            "candidate": self.candidate_label,
+            "sample_rate": self.sample_rate,
+            "queue_depth": len(self._queue),
+            "submitted": self.submitted,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "incompatible": self.incompatible,
+            "failed_batches": self.failed_batches,
+            "batches_scored": self.batches_scored,
+            "compared": self.compared,
+            "mean_overlap_at_k": mean(self.overlap_sum),
+            "top1_agreement_rate": mean(self.top1_agreements),
+            "mean_primary_ms": mean(self.primary_ms_sum),
+            "mean_shadow_ms": mean(self.shadow_ms_sum),
+            "latency_delta_ms_p50": round(float(np.percentile(deltas, 50)), 4) if deltas is not None else None,
+            "latency_delta_ms_p99": round(float(np.percentile(deltas, 99)), 4) if deltas is not None else None,
+            "cpu_budget": self.cpu_budget,
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "cpu_share": round(self.cpu_seconds / elapsed, 4) if elapsed else None,
+            "throttled_seconds": round(self.throttled_seconds, 3)
+        }
+
+
+# Global shadow scorer instance (singleton pattern)
+_shadow_scorer_instance: Optional[ShadowScorer] = None
+
+
+def get_shadow_scorer() -> ShadowScorer:
+    """Get or create the global shadow scorer instance"""
+    global _shadow_scorer_instance
+    
+    if _shadow_scorer_instance is None:
+        _shadow_scorer_instance = ShadowScorer(
+            cpu_budget=settings.shadow_cpu_budget,
+            queue_size=settings.shadow_queue_size,
+            sample_rate=settings.shadow_sample_rate
+        )
+    
+    return _shadow_scorer_instance
@@ -0,0 +1,51 @@
+"""
+Compact storage format for embedding vectors
+
+Vectors are stored as little-endian float16 bytes: 2 bytes per dimension
+(3 KB for a 1536-dimension OpenAI embedding). Half precision keeps cosine
+similarities between normalized embeddings accurate to about 1e-3, well
+inside the noise of the matching thresholds.
+"""
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+EMBEDDING_DTYPE = np.dtype('<f2')
+
+
+def pack_embedding(vector: Optional[np.ndarray]) -> Optional[bytes]:
+    """Serialize an embedding for a BYTEA column."""
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+
+def unpack_embedding(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Inverse of pack_embedding, widened to float32 for arithmetic."""
+    if data is None:
+        return None
+    return np.frombuffer(bytes(data), dtype=EMBEDDING_DTYPE).astype(np.float32)
+
+
+def stored_or_encoded(
+    rows: List[Any],
+    texts: List[str],
+    model: str,
+    encode_batch: Callable[[List[str]], np.ndarray]
+) -> np.ndarray:
+    """
+    One embedding per row: the stored input_embedding when it was made by
+    `model`, otherwise encoded (all missing rows in one encode_batch call).
+    """
+    vectors = [
+        unpack_embedding(row['input_embedding']) if row['embedding_model'] == model else None
+        for row in rows
+    ]
+    
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        encoded = encode_batch([texts[i] for i in missing])
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+    
+    return np.vstack(vectors)
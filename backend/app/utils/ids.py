@@ -0,0 +1,58 @@
+"""
+Time-ordered identifiers for feedback tables
+
+UUIDv7 layout (RFC 9562): 48-bit Unix millisecond timestamp, 4-bit version,
+12-bit sequence, 2-bit variant, 62 random bits. Keys generated later sort
+later, so B-tree inserts append at the right edge of the primary key index.
+"""
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_sequence = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUID (version 7)
+    
+    The 12-bit rand_a field is used as a per-millisecond counter seeded at
+    random, so ids generated by this process are strictly increasing even
+    within the same millisecond. If the counter overflows, the timestamp is
+    advanced by one millisecond.
+    """
+    global _last_ms, _sequence
+    
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            # Leave headroom so the counter rarely overflows within a millisecond
+            _sequence = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _sequence += 1
+            if _sequence > 0xFFF:
+                _last_ms += 1
+                _sequence = 0
+        
+        timestamp_ms = _last_ms
+        sequence = _sequence
+    
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= sequence << 64
+    value |= 0b10 << 62
+    value |= rand_b
+    
+    return uuid.UUID(int=value)
+
+
+def uuid7_timestamp_ms(value: uuid.UUID) -> int:
+    """Extract the Unix millisecond timestamp embedded in a UUIDv7"""
+    return value.int >> 80
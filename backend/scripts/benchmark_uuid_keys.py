@@ -0,0 +1,99 @@
+"""
+Benchmark random (v4) vs time-ordered (v7) UUID primary keys
+
+Creates two scratch tables shaped like category_feedback, inserts the same
+number of rows into each in multi-row batches, and reports insert throughput
+and primary key index size. The scratch tables are dropped afterwards.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/benchmark_uuid_keys.py [rows] [batch_size]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.database import database
+from app.utils.ids import uuid7
+
+KEY_GENERATORS = {
+    "uuid_v4": uuid.uuid4,
+    "uuid_v7": uuid7,
+}
+
+
+async def create_scratch_table(table: str):
+    await database.execute(f"DROP TABLE IF EXISTS {table}")
+    await database.execute(f"""
+        CREATE TABLE {table} (
+            id UUID PRIMARY KEY,
+            category_id INTEGER NOT NULL,
+            feedback_type VARCHAR(20) NOT NULL,
+            confidence_score DECIMAL(5,4),
+            created_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+
+
+async def insert_rows(table: str, make_key, rows: int, batch_size: int) -> float:
+    """Insert rows in multi-row batches and return elapsed seconds."""
+    started = time.perf_counter()
+    
+    for offset in range(0, rows, batch_size):
+        count = min(batch_size, rows - offset)
+        value_rows = []
+        values = {}
+        
+        for i in range(count):
+            value_rows.append(f"(:id_{i}, :category_id_{i}, 'accept', 0.75)")
+            values[f"id_{i}"] = str(make_key())
+            values[f"category_id_{i}"] = (offset + i) % 40
+        
+        await database.execute(
+            f"INSERT INTO {table} (id, category_id, feedback_type, confidence_score) VALUES {', '.join(value_rows)}",
+            values
+        )
+    
+    return time.perf_counter() - started
+
+
+async def index_size_bytes(table: str) -> int:
+    result = await database.fetch_one(f"SELECT pg_relation_size('{table}_pkey') AS size")
+    return result["size"]
+
+
+async def run_benchmark(rows: int = 200_000, batch_size: int = 500):
+    if database is None:
+        print("DATABASE_URL not set")
+        return
+    
+    await database.connect()
+    
+    try:
+        print(f"Inserting {rows:,} rows per key type in batches of {batch_size}\n")
+        print(f"{'key':<10} {'rows/s':>12} {'pkey index':>14}")
+        
+        for name, make_key in KEY_GENERATORS.items():
+            table = f"bench_feedback_{name}"
+            await create_scratch_table(table)
+            
+            elapsed = await insert_rows(table, make_key, rows, batch_size)
+            size = await index_size_bytes(table)
+            
+            print(f"{name:<10} {rows / elapsed:>12,.0f} {size / (1024 * 1024):>11.1f} MB")
+            
+            await database.execute(f"DROP TABLE IF EXISTS {table}")
+    
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    asyncio.run(run_benchmark(rows, batch_size))
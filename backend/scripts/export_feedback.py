@@ -0,0 +1,115 @@
+"""
+Export category feedback joined with user interactions for offline analysis
+
+Writes numbered part files of at most --rows-per-file rows each. After every
+completed part the cursor of its last row is saved to export_state.json in the
+output directory, so re-running with --resume continues where an interrupted
+export stopped (a partially written part is overwritten).
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/export_feedback.py OUTPUT_DIR \\
+        [--format csv|parquet|arrow] [--since ISO] [--until ISO] \\
+        [--rows-per-file N] [--batch-size N] [--resume]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.database import database
+from app.services.feedback_export import (
+    EXPORT_EXTENSIONS,
+    EXPORT_FORMATS,
+    FeedbackExporter,
+)
+
+STATE_FILE = "export_state.json"
+
+
+def load_state(output_dir: Path, resume: bool) -> dict:
+    state_path = output_dir / STATE_FILE
+    if resume and state_path.exists():
+        return json.loads(state_path.read_text())
+    return {"cursor": None, "parts": 0, "rows": 0}
+
+
+def save_state(output_dir: Path, state: dict):
+    # Write then rename, so an interruption never leaves a truncated state file
+    temporary = output_dir / f"{STATE_FILE}.tmp"
+    temporary.write_text(json.dumps(state, indent=2))
+    temporary.replace(output_dir / STATE_FILE)
+
+
+async def export_part(exporter: FeedbackExporter, args, cursor, path: Path) -> tuple:
+    """Write one part file; returns (rows written, cursor after its last row)."""
+    progress = {"rows": 0, "cursor": cursor}
+    
+    def on_batch(rows: int, batch_cursor: str):
+        progress["rows"] += rows
+        progress["cursor"] = batch_cursor
+    
+    chunks = exporter.stream(args.format, args.since, args.until, cursor, args.rows_per_file, on_batch)
+    with open(path, "wb") as output:
+        async for chunk in chunks:
+            output.write(chunk)
+    
+    return progress["rows"], progress["cursor"]
+
+
+async def run_export(args):
+    if database is None:
+        print("DATABASE_URL not set")
+        return
+    
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state = load_state(output_dir, args.resume)
+    
+    if state["cursor"]:
+        print(f"Resuming after {state['rows']:,} rows ({state['parts']} parts) from {state['cursor']}")
+    
+    exporter = FeedbackExporter(batch_size=args.batch_size)
+    await database.connect()
+    
+    try:
+        while True:
+            path = output_dir / f"feedback-{state['parts'] + 1:05d}.{EXPORT_EXTENSIONS[args.format]}"
+            rows, cursor = await export_part(exporter, args, state["cursor"], path)
+            
+            if rows == 0:
+                path.unlink()
+                break
+            
+            state = {"cursor": cursor, "parts": state["parts"] + 1, "rows": state["rows"] + rows}
+            save_state(output_dir, state)
+            print(f"{path.name}: {rows:,} rows ({state['rows']:,} total)")
+            
+            if rows < args.rows_per_file:
+                break
+    
+    finally:
+        await database.disconnect()
+    
+    print(f"Export complete: {state['rows']:,} rows in {state['parts']} parts")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export category feedback joined with user interactions")
+    parser.add_argument("output_dir", help="Directory for part files and export_state.json")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only feedback created at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only feedback created before this time")
+    parser.add_argument("--rows-per-file", type=int, default=5_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--resume", action="store_true", help="Continue from export_state.json")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_export(parse_args()))
@@ -0,0 +1,121 @@
+"""
+Replay stored category_matching interactions against a candidate matcher configuration
+
+Scores every interaction from the last --days days again, in batches, with
+the active catalog (or --catalog) and any --set overrides, and prints a JSON
+report comparing the new top-k with what was served and with the feedback
+users gave: ranking drift, an acceptance proxy and throughput.
+
+Stored input embeddings are reused when they were made by the current
+embedding model; other inputs are re-encoded (OpenAI API key needed).
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/replay_interactions.py \\
+        [--days N] [--limit N] [--top-k N] [--batch-size N] \\
+        [--set min_confidence_threshold=0.4 ...] [--catalog categories.json]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.database import database
+from app.models.category_matcher import CategoryMatcher
+from app.services.learning_service import get_learning_service
+from app.services.replay_engine import TUNABLE_PARAMETERS, ReplayEngine, configured_matcher
+
+
+def _json_field(value, default):
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or default
+
+
+async def load_active_categories() -> list:
+    """The catalog the API serves (same query as application startup)."""
+    rows = await database.fetch_all("""
+        SELECT id, name, type, description, keywords, success_count,
+               total_usage_count, terminology_source, terminology_sections, metadata
+        FROM political_categories
+        WHERE is_active = true
+        ORDER BY created_at DESC
+    """)
+    
+    return [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "type": row["type"],
+            "description": row["description"],
+            "keywords": _json_field(row["keywords"], []),
+            "success_count": row["success_count"],
+            "total_usage_count": row["total_usage_count"],
+            "terminology_source": row["terminology_source"],
+            "terminology_sections": _json_field(row["terminology_sections"], []),
+            "metadata": _json_field(row["metadata"], {})
+        }
+        for row in rows
+    ]
+
+
+def parse_override(value: str) -> tuple:
+    name, separator, number = value.partition("=")
+    if not separator or name not in TUNABLE_PARAMETERS:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE with NAME one of {', '.join(TUNABLE_PARAMETERS)}")
+    try:
+        return name, float(number)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{number}' is not a number")
+
+
+async def run_replay(args):
+    if database is None:
+        print("DATABASE_URL not set")
+        return
+    
+    await database.connect()
+    
+    try:
+        if args.catalog:
+            categories = json.loads(Path(args.catalog).read_text())
+        else:
+            categories = await load_active_categories()
+        
+        base = CategoryMatcher()
+        base.load_categories(categories)
+        base.update_success_rates(await get_learning_service().get_success_stats())
+        
+        matcher = configured_matcher(base, dict(args.overrides))
+        engine = ReplayEngine(matcher, top_k=args.top_k, batch_size=args.batch_size)
+        report = await engine.run(days=args.days, limit=args.limit, category_types=args.types)
+    
+    finally:
+        await database.disconnect()
+    
+    report["catalog_size"] = len(categories)
+    report["overrides"] = dict(args.overrides)
+    print(json.dumps(report, indent=2, default=str))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay stored interactions against a candidate matcher configuration")
+    parser.add_argument("--days", type=int, default=30, help="Replay interactions from the last N days")
+    parser.add_argument("--limit", type=int, help="Stop after N interactions")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--types", nargs="+", help="Only match categories of these types")
+    parser.add_argument(
+        "--set", dest="overrides", type=parse_override, action="append", default=[],
+        metavar="NAME=VALUE", help="Override a matcher weight or threshold (repeatable)"
+    )
+    parser.add_argument("--catalog", help="JSON list of categories to use instead of the active catalog")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_replay(parse_args()))
@@ -3,6 +3,7 @@ Pytest configuration and shared fixtures
 """
 import pytest
 import asyncio
+import numpy as np
 from unittest.mock import Mock
 from fastapi import Request
 from fastapi.testclient import TestClient
@@ -126,3 +127,68 @@ def test_feedback_data():
         "confidence_score": 0.85,
         "similarity_score": 0.78
     }
+
+
+# Offline stand-ins shared by the matcher, clustering, replay and shadow tests
+class FakeTextEncoder:
+    """Deterministic stand-in for the OpenAI text encoder that records its calls."""
+    
+    def __init__(self, embed):
+        self.embed = embed
+        self.text_calls = 0
+        self.batches = []
+    
+    @property
+    def batch_calls(self):
+        return len(self.batches)
+    
+    @property
+    def batch_sizes(self):
+        return [len(batch) for batch in self.batches]
+    
+    def encode_text(self, text):
+        self.text_calls += 1
+        return self.embed(text)
+    
+    def encode_batch(self, texts):
+        self.batches.append(list(texts))
+        return np.array([self.embed(text) for text in texts])
+
+
+@pytest.fixture
+def fake_text_encoder(monkeypatch):
+    """Factory: a FakeTextEncoder(embed) returned by get_text_encoder() at each target"""
+    def install(embed, targets=("app.models.category_matcher.get_text_encoder",)):
+        encoder = FakeTextEncoder(embed)
+        for target in targets:
+            monkeypatch.setattr(target, lambda: encoder)
+        return encoder
+    
+    return install
+
+
+class PagingDatabase:
+    """Serves interaction rows one (created_at, id) keyset page at a time."""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+    
+    async def fetch_all(self, query, values=None):
+        self.queries.append(values)
+        remaining = self.rows
+        if "after_created_at" in values:
+            cursor = (values["after_created_at"], values["after_id"])
+            remaining = [row for row in self.rows if (row["created_at"], row["id"]) > cursor]
+        return remaining[:values["batch_size"]]
+
+
+@pytest.fixture
+def paging_database(monkeypatch):
+    """Factory: a PagingDatabase(rows) installed as the `database` at target"""
+    def install(rows, target):
+        db = PagingDatabase(rows)
+        monkeypatch.setattr(target, db)
+        return db
+    
+    return install
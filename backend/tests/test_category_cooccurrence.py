@@ -0,0 +1,169 @@
+"""
+Category co-occurrence tests
+
+Builds the sparse matrices from synthetic feedback submissions, the same way
+the feedback path does, and checks the learned refinement penalties.
+"""
+import pytest
+
+from app.models.category_cooccurrence import CategoryCooccurrence, feedback_pair_counts
+from app.services.learning_service import REJECTION_SAMPLE_ROWS, FeedbackAnalyzer
+
+
+def _submission(accepted=(), rejected=()):
+    return [{"category_id": c, "feedback_type": "accept"} for c in accepted] + [
+        {"category_id": c, "feedback_type": "reject"} for c in rejected
+    ]
+
+
+@pytest.mark.unit
+class TestFeedbackPairCounts:
+    """Increments contributed by one submission"""
+    
+    def test_pairs_by_verdict(self):
+        counts = feedback_pair_counts(_submission(accepted=[1, 2], rejected=[3]))
+        
+        assert counts[(1, 2)] == counts[(2, 1)] == (1, 0, 0)
+        assert counts[(3, 1)] == counts[(3, 2)] == (0, 0, 1)
+        assert counts[(3, 3)] == (0, 1, 0)
+        # Accepting 1 while rejecting 3 says nothing about 1 being confused with 3
+        assert (1, 3) not in counts
+    
+    def test_last_verdict_per_category_wins(self):
+        counts = feedback_pair_counts([
+            {"category_id": 4, "feedback_type": "reject"},
+            {"category_id": 4, "feedback_type": "maybe"},
+        ])
+        
+        assert counts == {(4, 4): (1, 0, 0)}
+
+
+@pytest.mark.unit
+class TestCategoryCooccurrence:
+    """Sparse matrices and the penalties derived from them"""
+    
+    def _build(self, submissions):
+        cooccurrence = CategoryCooccurrence()
+        cooccurrence.load([])
+        for submission in submissions:
+            cooccurrence.record(feedback_pair_counts(submission))
+        return cooccurrence
+    
+    def test_increments_match_a_full_rebuild(self):
+        submissions = [
+            _submission(accepted=[1], rejected=[2, 3]),
+            _submission(accepted=[4], rejected=[2]),
+            _submission(accepted=[1, 4], rejected=[3]),
+        ]
+        incremental = self._build(submissions[:1])
+        incremental.rejection_penalties([2])  # materialize between submissions
+        for submission in submissions[1:]:
+            incremental.record(feedback_pair_counts(submission))
+        
+        totals = {}
+        for submission in submissions:
+            for pair, counts in feedback_pair_counts(submission).items():
+                totals[pair] = tuple(a + b for a, b in zip(totals.get(pair, (0, 0, 0)), counts))
+        rebuilt = CategoryCooccurrence()
+        rebuilt.load([
+            {"category_a": a, "category_b": b, "co_accepts": x, "co_rejects": y, "substitutions": z}
+            for (a, b), (x, y, z) in totals.items()
+        ])
+        
+        for category_id in (1, 2, 3, 4):
+            assert incremental.confused_with(category_id) == rebuilt.confused_with(category_id)
+        assert incremental.rejection_penalties([2, 3]) == pytest.approx(rebuilt.rejection_penalties([2, 3]))
+    
+    def test_co_rejected_categories_are_penalized_and_substitutes_favoured(self):
+        cooccurrence = self._build(
+            [_submission(accepted=[9], rejected=[2, 3])] * 15 + [_submission(accepted=[4], rejected=[2])] * 5
+        )
+        
+        penalties = cooccurrence.rejection_penalties([2])
+        
+        assert penalties[3] > 0
+        assert penalties[9] < 0 and penalties[4] < 0
+        assert 2 not in penalties
+    
+    def test_small_samples_are_shrunk(self):
+        few = self._build([_submission(rejected=[2, 3])])
+        many = self._build([_submission(rejected=[2, 3])] * 50)
+        
+        assert 0 < few.rejection_penalties([2])[3] < many.rejection_penalties([2])[3] < 1
+    
+    def test_confused_with_ranks_substitutes(self):
+        cooccurrence = self._build(
+            [_submission(accepted=[7], rejected=[5])] * 3 + [_submission(accepted=[8], rejected=[5])]
+        )
+        
+        confused = cooccurrence.confused_with(5)
+        
+        assert [(c["category_id"], c["substitutions"]) for c in confused] == [(7, 3), (8, 1)]
+        assert confused[0]["substitution_rate"] == 0.75
+        assert cooccurrence.confused_with(999) == []
+    
+    def test_rejection_ranking_orders_by_rejections(self):
+        cooccurrence = self._build(
+            [_submission(accepted=[7], rejected=[5, 6])] * 3 + [_submission(accepted=[8], rejected=[5])]
+        )
+        
+        ranking = cooccurrence.rejection_ranking()
+        
+        assert [(r["category_id"], r["rejection_count"]) for r in ranking] == [(5, 4), (6, 3)]
+        assert ranking[0]["co_rejected_with"] == [{"category_id": 6, "co_rejects": 3, "co_rejection_rate": 0.75}]
+        assert [c["category_id"] for c in ranking[0]["commonly_confused_with"]] == [7, 8]
+        assert [r["category_id"] for r in cooccurrence.rejection_ranking(6)] == [6]
+        # Accepted-only and unknown categories have no rejections to rank
+        assert cooccurrence.rejection_ranking(7) == cooccurrence.rejection_ranking(999) == []
+    
+    def test_stats_count_non_zeros(self):
+        cooccurrence = self._build([_submission(accepted=[1], rejected=[2])])
+        cooccurrence.confused_with(2)
+        
+        stats = cooccurrence.get_stats()
+        
+        assert stats["categories"] == 2
+        assert stats["substitution_nnz"] == 1
+        assert stats["pending_pairs"] == 0
+
+
+class RecentRejectionsDatabase:
+    """Returns canned rejection rows and records the queries it was sent."""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+    
+    async def fetch_all(self, query, values=None):
+        self.queries.append((" ".join(query.split()), values))
+        return self.rows
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestRejectionPatterns:
+    """FeedbackAnalyzer ranks from the matrices and samples reasons from the database"""
+    
+    async def test_rankings_come_from_the_matrices(self, monkeypatch):
+        cooccurrence = CategoryCooccurrence()
+        cooccurrence.load([])
+        for submission in [_submission(accepted=[7], rejected=[5])] * 2 + [_submission(rejected=[6])]:
+            cooccurrence.record(feedback_pair_counts(submission))
+        db = RecentRejectionsDatabase([
+            {"category_id": 5, "category_name": "Housing", "confidence_score": 0.4, "feedback_reason": "too broad"},
+            {"category_id": 5, "category_name": "Housing", "confidence_score": 0.6, "feedback_reason": "too broad"},
+        ])
+        monkeypatch.setattr("app.services.learning_service.get_category_cooccurrence", lambda: cooccurrence)
+        monkeypatch.setattr("app.services.learning_service.database", db)
+        
+        result = await FeedbackAnalyzer().analyze_rejection_patterns(days=7)
+        
+        assert result["counts_window"] == "all_time" and result["recent_window_days"] == 7
+        housing, other = result["rejection_patterns"]
+        assert (housing["category_id"], housing["rejection_count"], housing["category_name"]) == (5, 2, "Housing")
+        assert housing["recent_avg_confidence"] == 0.5 and housing["recent_reasons"] == ["too broad"]
+        assert housing["commonly_confused_with"][0]["category_id"] == 7
+        assert (other["category_id"], other["category_name"], other["recent_reasons"]) == (6, None, [])
+        # One bounded lookup, no aggregate over the feedback table
+        (query, values), = db.queries
+        assert "GROUP BY" not in query and values["limit"] == REJECTION_SAMPLE_ROWS
@@ -0,0 +1,91 @@
+"""
+Category matcher tests
+
+Uses a deterministic stand-in for the OpenAI text encoder so matching and
+embedding call counts can be asserted without network access.
+"""
+import numpy as np
+import pytest
+
+from app.models.category_matcher import CategoryMatcher
+
+
+def _embed(text):
+    """Maps each text to a fixed direction"""
+    vector = np.zeros(3)
+    for axis, word in enumerate(("climate", "health", "tax")):
+        if word in text.lower():
+            vector[axis] = 1.0
+    return vector
+
+
+@pytest.fixture
+def fake_encoder(fake_text_encoder):
+    return fake_text_encoder(_embed)
+
+
+@pytest.fixture
+def matcher(fake_encoder):
+    matcher = CategoryMatcher()
+    matcher.load_categories([
+        {"id": 1, "name": "Climate", "keywords": [], "success_count": 0, "total_usage_count": 0},
+        {"id": 2, "name": "Climate health", "keywords": [], "success_count": 0, "total_usage_count": 0},
+        {"id": 3, "name": "Tax", "keywords": [], "success_count": 9, "total_usage_count": 10},
+    ])
+    return matcher
+
+
+@pytest.mark.unit
+class TestLiveSuccessRates:
+    """Success rates pushed from live feedback without re-embedding"""
+    
+    def test_update_is_in_place_and_skips_embedding(self, matcher, fake_encoder):
+        rates = matcher.success_rates
+        
+        updated = matcher.update_success_rates({1: (20, 20), 3: (0, 15), 99: (1, 1)})
+        
+        assert updated == 2
+        assert matcher.success_rates is rates
+        assert matcher.success_rates[0] == pytest.approx((20 + 2.5) / 25)
+        assert matcher.success_rates[2] == pytest.approx(2.5 / 20)
+        assert fake_encoder.batch_calls == 1
+    
+    def test_update_changes_ranking(self, matcher):
+        before = [m.category_id for m in matcher.find_matches("climate")]
+        
+        matcher.update_success_rates({1: (0, 50), 2: (50, 50)})
+        after = matcher.find_matches("climate")
+        
+        assert before[0] == 1
+        assert after[0].category_id == 2
+    
+    def test_small_samples_are_smoothed_toward_neutral(self, matcher):
+        matcher.update_success_rates({1: (1, 1)})
+        
+        assert 0.5 < matcher.success_rates[0] < 0.6
+    
+    def test_live_stats_survive_catalog_reload(self, matcher, fake_encoder):
+        matcher.update_success_rates({3: (0, 15)})
+        
+        matcher.load_categories(list(reversed(matcher.categories)))
+        
+        assert matcher.success_rates[0] == pytest.approx(2.5 / 20)
+        assert fake_encoder.batch_calls == 2
+
+
+@pytest.mark.unit
+class TestSimilarCategories:
+    """Whole-catalog similarity ranking for admin redundancy checks"""
+    
+    def test_ranks_whole_catalog_without_thresholds(self, matcher, fake_encoder):
+        similar = matcher.find_similar_categories("health", top_n=2)
+        
+        assert [category["id"] for category, _ in similar] == [2, 1]
+        assert similar[0][1] == pytest.approx(np.sqrt(0.5))
+        assert similar[1][1] == 0.0
+        assert fake_encoder.text_calls == 1
+    
+    def test_excluded_categories_are_skipped(self, matcher):
+        similar = matcher.find_similar_categories("climate tax", top_n=5, exclude_ids=[1])
+        
+        assert [category["id"] for category, _ in similar] == [3, 2]
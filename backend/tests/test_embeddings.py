@@ -0,0 +1,36 @@
+"""
+Embedding storage format tests
+"""
+import numpy as np
+import pytest
+
+from app.utils.embeddings import pack_embedding, unpack_embedding
+
+
+@pytest.mark.unit
+class TestEmbeddingStorage:
+    """Half-precision bytes stored on user_interactions"""
+    
+    def test_two_bytes_per_dimension(self):
+        assert len(pack_embedding(np.ones(1536))) == 3072
+    
+    def test_round_trip_preserves_cosine_similarity(self):
+        rng = np.random.default_rng(0)
+        a, b = rng.normal(size=(2, 1536))
+        
+        restored_a, restored_b = unpack_embedding(pack_embedding(a)), unpack_embedding(pack_embedding(b))
+        
+        def cosine(x, y):
+            return float(x @ y / (np.linalg.norm(x) * np.linalg.norm(y)))
+        
+        assert abs(cosine(restored_a, restored_b) - cosine(a, b)) < 1e-3
+        assert restored_a.dtype == np.float32
+    
+    def test_missing_vector_stays_none(self):
+        assert pack_embedding(None) is None
+        assert unpack_embedding(None) is None
+    
+    def test_accepts_memoryview_from_driver(self):
+        data = pack_embedding(np.array([1.0, 2.0]))
+        
+        assert unpack_embedding(memoryview(data)).tolist() == [1.0, 2.0]
@@ -0,0 +1,157 @@
+"""
+Feedback analytics tests
+
+Uses an in-memory stand-in for the database so the summary's query shape,
+concurrency and caching, and the rollup refresher's incremental window, can be
+asserted without a live Postgres.
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.analytics_rollup import AnalyticsRollupRefresher
+from app.services.feedback_service import FeedbackAnalytics
+
+
+class AnalyticsDatabase:
+    """Records queries and tracks how many are in flight at once."""
+    
+    def __init__(self, delay=0.01, refreshed_through=None, now=None):
+        self.delay = delay
+        self.refreshed_through = refreshed_through or {}
+        self.now = now or datetime(2026, 10, 19, 12, 0)
+        self.queries = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def _record(self, query, values):
+        self.queries.append((" ".join(query.split()), values or {}))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+    
+    async def fetch_one(self, query, values=None):
+        await self._record(query, values)
+        if "LOCALTIMESTAMP" in query:
+            return {"now": self.now}
+        if "total_sessions" in query:
+            return {
+                "total_sessions": 10,
+                "total_interactions": 40,
+                "total_feedback": 25,
+                "avg_user_rating": 4.2,
+                "total_accepts": 15
+            }
+        return None
+    
+    async def fetch_all(self, query, values=None):
+        await self._record(query, values)
+        if "FROM analytics_rollup_state" in query:
+            return [
+                {"rollup": rollup, "refreshed_through": through}
+                for rollup, through in self.refreshed_through.items()
+            ]
+        if "FROM category_feedback_daily" in query:
+            return [
+                {"category_id": 1, "category_name": "Climate", "total_feedback": 20, "acceptance_rate": 80.0},
+                {"category_id": 2, "category_name": "Housing", "total_feedback": 6, "acceptance_rate": 30.0},
+            ]
+        return []
+    
+    async def execute(self, query, values=None):
+        await self._record(query, values)
+
+
+@pytest.fixture
+def analytics_db(monkeypatch):
+    db = AnalyticsDatabase()
+    monkeypatch.setattr("app.services.feedback_service.database", db)
+    return db
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestAnalyticsSummary:
+    """Admin analytics summary served from rollups"""
+    
+    async def test_reads_rollups_not_raw_events(self, analytics_db):
+        summary = await FeedbackAnalytics(cache_ttl=30).get_summary(30)
+        
+        assert summary["summary"]["total_feedback_items"] == 26
+        assert summary["summary"]["categories_needing_attention"] == 1
+        for query, _ in analytics_db.queries:
+            assert "FROM category_feedback " not in query + " "
+            assert "FROM user_interactions" not in query
+            assert "FROM user_sessions" not in query
+    
+    async def test_queries_run_concurrently(self, analytics_db):
+        await FeedbackAnalytics(cache_ttl=30).get_summary(30)
+        
+        assert analytics_db.max_in_flight >= 4
+    
+    async def test_summary_is_cached_within_ttl(self, analytics_db):
+        analytics = FeedbackAnalytics(cache_ttl=30)
+        
+        first = await analytics.get_summary(30)
+        query_count = len(analytics_db.queries)
+        second = await analytics.get_summary(30)
+        
+        assert second is first
+        assert len(analytics_db.queries) == query_count
+    
+    async def test_concurrent_requests_share_one_rebuild(self, analytics_db):
+        analytics = FeedbackAnalytics(cache_ttl=30)
+        
+        await asyncio.gather(*(analytics.get_summary(30) for _ in range(5)))
+        single_build = len(analytics_db.queries)
+        await FeedbackAnalytics(cache_ttl=30).get_summary(30)
+        
+        assert single_build == len(analytics_db.queries) - single_build
+    
+    async def test_expired_summary_is_rebuilt(self, analytics_db):
+        analytics = FeedbackAnalytics(cache_ttl=0)
+        
+        await analytics.get_summary(30)
+        query_count = len(analytics_db.queries)
+        await analytics.get_summary(30)
+        
+        assert len(analytics_db.queries) == 2 * query_count
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestAnalyticsRollupRefresher:
+    """Incremental rollup refresh window"""
+    
+    async def test_reopens_only_days_since_high_water_mark(self, monkeypatch):
+        db = AnalyticsDatabase(delay=0, refreshed_through={
+            "feedback_daily_rollup": datetime(2026, 10, 19, 11, 59),
+            "session_activity_daily": datetime(2026, 10, 19, 11, 59),
+        })
+        monkeypatch.setattr("app.services.analytics_rollup.database", db)
+        
+        await AnalyticsRollupRefresher().refresh()
+        
+        since = {
+            query.split()[2]: values["since"]
+            for query, values in db.queries if "since" in values
+        }
+        assert since["feedback_daily_rollup"] == datetime(2026, 10, 19)
+        # Session days stay open one extra day for late interactions
+        assert since["session_activity_daily"] == datetime(2026, 10, 18)
+    
+    async def test_high_water_mark_advances_to_refresh_start(self, monkeypatch):
+        db = AnalyticsDatabase(delay=0)
+        monkeypatch.setattr("app.services.analytics_rollup.database", db)
+        
+        await AnalyticsRollupRefresher(backfill_days=90).refresh()
+        
+        state_updates = [values for query, values in db.queries if "INTO analytics_rollup_state" in query]
+        assert [values["refreshed_through"] for values in state_updates] == [db.now, db.now]
+        # No previous refresh: falls back to the backfill window
+        feedback_since = next(values["since"] for query, values in db.queries if "INTO feedback_daily_rollup" in query)
+        assert feedback_since == datetime(2026, 7, 21)
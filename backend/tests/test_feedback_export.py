@@ -0,0 +1,134 @@
+"""
+Feedback export tests
+
+Streams exports from an in-memory database that applies the keyset
+conditions itself, so batching, resumption and encoding can be checked
+without Postgres.
+"""
+import csv
+import gzip
+import io
+import re
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.services.feedback_export import COLUMN_NAMES, EXPORT_COLUMNS, FeedbackExporter, encode_cursor
+
+SCHEMA = Path(__file__).parent.parent / "app" / "db" / "migrations" / "001_create_feedback_tables.sql"
+
+
+class KeysetDatabase:
+    """Serves export rows in (created_at, id) order, honouring cursor and limit."""
+    
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda row: (row["feedback_created_at"], row["feedback_id"]))
+        self.queries = []
+    
+    async def iterate(self, query, values=None):
+        self.queries.append((" ".join(query.split()), values))
+        remaining = self.rows
+        if "after_created_at" in values:
+            cursor = (values["after_created_at"], uuid.UUID(values["after_id"]))
+            remaining = [row for row in remaining if (row["feedback_created_at"], row["feedback_id"]) > cursor]
+        for row in remaining[:values["limit"]]:
+            yield row
+
+
+def _rows(count):
+    start = datetime(2026, 10, 1)
+    rows = []
+    for i in range(count):
+        row = {name: None for name in COLUMN_NAMES}
+        row.update({
+            "feedback_id": uuid.UUID(int=i + 1),
+            # Pairs of rows share a timestamp, so the id breaks ties
+            "feedback_created_at": start + timedelta(seconds=i // 2),
+            "category_id": i % 5,
+            "feedback_type": "accept",
+            "user_input": f"input, with \"quotes\" {i}",
+        })
+        rows.append(row)
+    return rows
+
+
+async def _collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+def _csv_rows(data):
+    return list(csv.reader(io.StringIO(gzip.decompress(data).decode("utf-8"))))
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestFeedbackExport:
+    """Keyset batches encoded as a single stream"""
+    
+    async def test_csv_streams_every_row_in_batches(self, monkeypatch):
+        db = KeysetDatabase(_rows(25))
+        monkeypatch.setattr("app.services.feedback_export.database", db)
+        
+        data = await _collect(FeedbackExporter(batch_size=10).stream("csv"))
+        rows = _csv_rows(data)
+        
+        assert rows[0] == COLUMN_NAMES
+        assert len(rows) == 26
+        assert rows[1][COLUMN_NAMES.index("user_input")] == 'input, with "quotes" 0'
+        # Three pages; the last one is short so no fourth query is needed
+        assert len(db.queries) == 3
+        assert "ORDER BY cf.created_at, cf.id" in db.queries[0][0]
+    
+    async def test_resume_from_cursor_continues_after_the_row(self, monkeypatch):
+        source = _rows(25)
+        monkeypatch.setattr("app.services.feedback_export.database", KeysetDatabase(source))
+        exporter = FeedbackExporter(batch_size=4)
+        
+        progress = []
+        first = _csv_rows(await _collect(exporter.stream("csv", max_rows=9, on_batch=lambda n, c: progress.append((n, c)))))
+        rest = _csv_rows(await _collect(exporter.stream("csv", cursor=progress[-1][1])))
+        
+        assert [n for n, _ in progress] == [4, 4, 1]
+        assert progress[-1][1] == encode_cursor(source[8]["feedback_created_at"], source[8]["feedback_id"])
+        exported_ids = [row[0] for row in first[1:] + rest[1:]]
+        assert exported_ids == [str(row["feedback_id"]) for row in source]
+    
+    async def test_invalid_arguments_fail_before_streaming(self, monkeypatch):
+        monkeypatch.setattr("app.services.feedback_export.database", KeysetDatabase([]))
+        exporter = FeedbackExporter()
+        
+        with pytest.raises(ValueError):
+            exporter.stream("xlsx")
+        with pytest.raises(ValueError):
+            exporter.stream("csv", cursor="yesterday")
+    
+    async def test_parquet_has_one_row_group_per_batch(self, monkeypatch):
+        pq = pytest.importorskip("pyarrow.parquet")
+        monkeypatch.setattr("app.services.feedback_export.database", KeysetDatabase(_rows(25)))
+        
+        data = await _collect(FeedbackExporter(batch_size=10).stream("parquet"))
+        parquet_file = pq.ParquetFile(io.BytesIO(data))
+        
+        assert parquet_file.metadata.num_rows == 25
+        assert parquet_file.metadata.num_row_groups == 3
+
+
+def _table_columns(table):
+    """Column names of a CREATE TABLE in the Postgres migration."""
+    body = re.search(rf"CREATE TABLE IF NOT EXISTS {table} \((.*?)\n\);", SCHEMA.read_text(), re.S).group(1)
+    return {line.split()[0] for line in body.strip().splitlines()}
+
+
+@pytest.mark.unit
+class TestExportSchema:
+    
+    def test_every_column_expression_exists_in_the_schema(self):
+        tables = {"cf": _table_columns("category_feedback"), "ui": _table_columns("user_interactions")}
+        
+        for name, expression, _ in EXPORT_COLUMNS:
+            references = re.findall(r"\b(cf|ui)\.(\w+)", expression)
+            assert references, name
+            for alias, column in references:
+                assert column in tables[alias], f"{name}: {alias}.{column} is not in the schema"
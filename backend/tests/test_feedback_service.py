@@ -0,0 +1,576 @@
+"""
+Feedback submission path tests
+
+Uses an in-memory stand-in for the database that records every query, so the
+number of round trips per submission can be asserted without a live Postgres.
+"""
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.services.feedback_service import FeedbackCollector
+
+
+class RecordingDatabase:
+    """Minimal async database double that records queries."""
+    
+    def __init__(self, interaction=None):
+        self.interaction = interaction
+        self.queries = []
+    
+    def _record(self, query, values):
+        self.queries.append((" ".join(query.split()), values or {}))
+    
+    async def fetch_one(self, query, values=None):
+        self._record(query, values)
+        if "FROM user_interactions" in query:
+            return self.interaction
+        return None
+    
+    async def fetch_all(self, query, values=None):
+        self._record(query, values)
+        if query.lstrip().startswith("INSERT INTO category_feedback"):
+            count = sum(1 for key in (values or {}) if key.startswith("category_id_"))
+            return [{"id": uuid.uuid4(), "created_at": datetime.utcnow()} for _ in range(count)]
+        if "FROM category_feedback" in query and "GROUP BY category_id" in query:
+            return [
+                {
+                    "category_id": category_id,
+                    "total": 4,
+                    "successful": 3,
+                    "avg_confidence": 0.8,
+                    "avg_rating": 4.0,
+                    "rating_count": 2
+                }
+                for key, category_id in (values or {}).items()
+                if key.startswith("category_id_")
+            ]
+        return []
+    
+    async def execute(self, query, values=None):
+        self._record(query, values)
+    
+    def transaction(self):
+        return _NullTransaction()
+    
+    def count(self, fragment):
+        return sum(1 for query, _ in self.queries if fragment in query)
+
+
+class _NullTransaction:
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def stored_interaction():
+    """Interaction row as returned by asyncpg (JSONB metadata as text)."""
+    return {
+        "id": "11111111-1111-1111-1111-111111111111",
+        "session_id": "test-session",
+        "interaction_type": "category_matching",
+        "user_input": "climate and healthcare",
+        "interaction_metadata": json.dumps({
+            "matches_count": 3,
+            "match_details": [
+                {"category_id": 7, "category_name": "Climate", "confidence_score": 0.9, "similarity_score": 0.8},
+                {"category_id": 3, "category_name": "Healthcare", "confidence_score": 0.7, "similarity_score": 0.6},
+                {"category_id": 5, "category_name": "Economy", "confidence_score": 0.4, "similarity_score": 0.3},
+            ]
+        })
+    }
+
+
+@pytest.fixture
+def recording_db(stored_interaction, monkeypatch):
+    db = RecordingDatabase(interaction=stored_interaction)
+    monkeypatch.setattr("app.services.feedback_service.database", db)
+    monkeypatch.setattr("app.services.learning_service.database", db)
+    monkeypatch.setattr("app.services.session_tracker.database", db)
+    monkeypatch.setattr("app.services.interaction_writer.database", db)
+    return db
+
+
+@pytest.fixture
+async def learning_worker(monkeypatch):
+    """Fresh learning worker with a long window so tests control flushing."""
+    from app.services import learning_worker as worker_module
+    
+    worker = worker_module.LearningUpdateWorker(coalesce_window=60)
+    monkeypatch.setattr(worker_module, "_learning_worker_instance", worker)
+    yield worker
+    await worker.stop()
+
+
+@pytest.fixture
+async def session_tracker(monkeypatch):
+    """Fresh session tracker with a long interval so tests control flushing."""
+    from app.services import session_tracker as tracker_module
+    
+    tracker = tracker_module.SessionActivityTracker(flush_interval=60)
+    monkeypatch.setattr(tracker_module, "_session_tracker_instance", tracker)
+    yield tracker
+    await tracker.stop()
+
+
+@pytest.fixture
+async def interaction_writer(monkeypatch):
+    """Fresh interaction writer with a long interval so tests control flushing."""
+    from app.services import interaction_writer as writer_module
+    
+    writer = writer_module.InteractionWriter(flush_interval=60, batch_size=50)
+    monkeypatch.setattr(writer_module, "_interaction_writer_instance", writer)
+    yield writer
+    await writer.stop()
+
+
+@pytest.fixture
+def category_cooccurrence(monkeypatch):
+    """Fresh in-memory co-occurrence matrices."""
+    from app.models import category_cooccurrence as cooccurrence_module
+    
+    cooccurrence = cooccurrence_module.CategoryCooccurrence()
+    monkeypatch.setattr(cooccurrence_module, "_category_cooccurrence_instance", cooccurrence)
+    return cooccurrence
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.usefixtures("learning_worker", "interaction_writer", "category_cooccurrence")
+class TestFeedbackSubmission:
+    """Round-trip behaviour of FeedbackCollector.submit_feedback"""
+    
+    async def test_single_interaction_read_and_single_insert(self, recording_db, stored_interaction):
+        feedbacks = [
+            {"category_id": category_id, "feedback_type": "accept", "user_rating": 4}
+            for category_id in (7, 3, 5, 42, 99)
+        ]
+        
+        result = await FeedbackCollector().submit_feedback(
+            interaction_id=stored_interaction["id"],
+            category_feedbacks=feedbacks
+        )
+        
+        assert result["status"] == "success"
+        assert result["feedback_count"] == 5
+        assert len(result["feedback_ids"]) == 5
+        assert recording_db.count("FROM user_interactions") == 1
+        assert recording_db.count("INSERT INTO category_feedback (") == 1
+        assert recording_db.count("INSERT INTO category_feedback_daily") == 1
+    
+    async def test_query_count_is_constant(self, recording_db, stored_interaction):
+        feedbacks = [
+            {"category_id": category_id, "feedback_type": "accept", "user_rating": 4}
+            for category_id in (7, 3, 5, 42, 99)
+        ]
+        
+        await FeedbackCollector().submit_feedback(
+            interaction_id=stored_interaction["id"],
+            category_feedbacks=feedbacks[:1]
+        )
+        single_item_queries = len(recording_db.queries)
+        
+        recording_db.queries.clear()
+        await FeedbackCollector().submit_feedback(
+            interaction_id=stored_interaction["id"],
+            category_feedbacks=feedbacks
+        )
+        
+        assert len(recording_db.queries) == single_item_queries
+    
+    async def test_match_rank_comes_from_stored_order(self, recording_db, stored_interaction):
+        await FeedbackCollector().submit_feedback(
+            interaction_id=stored_interaction["id"],
+            category_feedbacks=[
+                {"category_id": 5, "feedback_type": "reject"},
+                {"category_id": 7, "feedback_type": "accept"},
+                {"category_id": 42, "feedback_type": "maybe"},
+            ]
+        )
+        
+        _, values = next(
+            (query, values) for query, values in recording_db.queries
+            if query.startswith("INSERT INTO category_feedback (")
+        )
+        ranks = [json.loads(values[f"feedback_metadata_{i}"])["match_rank"] for i in range(3)]
+        
+        assert ranks == [3, 1, None]
+        assert values["confidence_score_1"] == 0.9
+        assert values["category_name_0"] == "Economy"
+        assert uuid.UUID(values["id_0"]).version == 7
+    
+    async def test_daily_counters_are_summed_per_category(self, recording_db, stored_interaction):
+        await FeedbackCollector().submit_feedback(
+            interaction_id=stored_interaction["id"],
+            category_feedbacks=[
+                {"category_id": 7, "feedback_type": "accept", "user_rating": 5},
+                {"category_id": 7, "feedback_type": "maybe", "user_rating": 3},
+                {"category_id": 3, "feedback_type": "reject"},
+            ]
+        )
+        
+        _, values = next(
+            (query, values) for query, values in recording_db.queries
+            if query.startswith("INSERT INTO category_feedback_daily")
+        )
+        
+        assert values["category_id_0"] == 7
+        assert values["accept_0"] == 1 and values["maybe_0"] == 1
+        assert values["success_confidence_sum_0"] == pytest.approx(1.8)
+        assert values["rating_sum_0"] == 8 and values["rating_count_0"] == 2
+        assert values["category_id_1"] == 3
+        assert values["reject_1"] == 1 and values["success_confidence_sum_1"] == 0.0
+        assert recording_db.count("ON CONFLICT (category_id, day) DO UPDATE") == 1
+    
+    async def test_pair_counts_are_upserted_and_recorded(self, recording_db, stored_interaction, category_cooccurrence):
+        await FeedbackCollector().submit_feedback(
+            interaction_id=stored_interaction["id"],
+            category_feedbacks=[
+                {"category_id": 7, "feedback_type": "accept"},
+                {"category_id": 5, "feedback_type": "reject"},
+            ]
+        )
+        
+        _, values = next(
+            (query, values) for query, values in recording_db.queries
+            if query.startswith("INSERT INTO category_cooccurrence")
+        )
+        pairs = {
+            (values[f"category_a_{i}"], values[f"category_b_{i}"]): (
+                values[f"co_accepts_{i}"], values[f"co_rejects_{i}"], values[f"substitutions_{i}"]
+            )
+            for i in range(len(values) // 5)
+        }
+        
+        assert pairs == {(7, 7): (1, 0, 0), (5, 5): (0, 1, 0), (5, 7): (0, 0, 1)}
+        assert recording_db.count("ON CONFLICT (category_a, category_b) DO UPDATE") == 1
+        assert category_cooccurrence.confused_with(5)[0]["category_id"] == 7
+    
+    async def test_unknown_interaction_returns_404(self, recording_db):
+        from fastapi import HTTPException
+        
+        recording_db.interaction = None
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await FeedbackCollector().submit_feedback(
+                interaction_id="missing",
+                category_feedbacks=[{"category_id": 1, "feedback_type": "accept"}]
+            )
+        
+        assert exc_info.value.status_code == 404
+        assert recording_db.count("INSERT INTO category_feedback (") == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestLearningMetricsRecomputation:
+    """Set-based recomputation in CategoryLearningService"""
+    
+    async def test_one_aggregate_and_one_insert(self, recording_db):
+        from app.services.learning_service import CategoryLearningService
+        
+        updated = await CategoryLearningService().update_metrics_for_categories([7, 3, 7, 5])
+        
+        assert [row["category_id"] for row in updated] == [7, 3, 5]
+        assert updated[0]["success_rate"] == 0.75
+        assert recording_db.count("GROUP BY category_id") == 1
+        assert recording_db.count("INSERT INTO learning_metrics") == 1
+        
+        _, values = next(
+            (query, values) for query, values in recording_db.queries
+            if query.startswith("INSERT INTO learning_metrics")
+        )
+        metric_types = [value for key, value in values.items() if key.startswith("metric_type_")]
+        assert metric_types == ["success_rate", "avg_confidence", "avg_rating"] * 3
+        assert recording_db.count("ON CONFLICT (category_id, metric_type, time_period, day) DO UPDATE") == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestLearningWorker:
+    """Off-request learning updates with per-category coalescing"""
+    
+    async def test_submit_returns_before_metrics_are_recomputed(self, recording_db, stored_interaction, learning_worker):
+        await FeedbackCollector().submit_feedback(
+            interaction_id=stored_interaction["id"],
+            category_feedbacks=[{"category_id": 7, "feedback_type": "accept"}]
+        )
+        
+        assert recording_db.count("INSERT INTO category_feedback (") == 1
+        assert recording_db.count("INSERT INTO learning_metrics") == 0
+        assert learning_worker.get_stats()["queue_depth"] == 1
+    
+    async def test_repeated_ids_are_coalesced_into_one_batch(self, recording_db, learning_worker):
+        learning_worker.enqueue([7, 3])
+        learning_worker.enqueue([3, 5, 7])
+        
+        stats = learning_worker.get_stats()
+        assert stats["queue_depth"] == 3
+        assert stats["coalesced"] == 2
+        
+        assert await learning_worker.flush() == 3
+        assert recording_db.count("GROUP BY category_id") == 1
+        assert recording_db.count("INSERT INTO learning_metrics") == 1
+        
+        stats = learning_worker.get_stats()
+        assert stats["queue_depth"] == 0
+        assert stats["batches_processed"] == 1
+        assert stats["last_batch_size"] == 3
+    
+    async def test_stop_drains_pending_updates(self, recording_db, learning_worker):
+        learning_worker.enqueue([1, 2])
+        
+        await learning_worker.stop()
+        
+        assert recording_db.count("INSERT INTO learning_metrics") == 1
+        assert learning_worker.get_stats()["running"] is False
+    
+    async def test_flush_pushes_success_rates_to_live_matcher(self, recording_db, learning_worker, monkeypatch):
+        from app.models import category_matcher
+        
+        pushed = []
+        
+        class LiveMatcher:
+            def update_success_rates(self, category_stats):
+                pushed.append(category_stats)
+                return len(category_stats)
+        
+        monkeypatch.setattr(category_matcher, "_category_matcher_instance", LiveMatcher())
+        
+        learning_worker.enqueue([7, 3])
+        await learning_worker.flush()
+        
+        assert pushed == [{7: (3, 4), 3: (3, 4)}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestSessionTracker:
+    """Coalesced user_sessions writes"""
+    
+    async def test_only_first_request_writes(self, recording_db, session_tracker):
+        for _ in range(5):
+            await session_tracker.record_activity("session-a", "127.0.0.1", "pytest")
+        
+        assert len(recording_db.queries) == 1
+        assert recording_db.count("ON CONFLICT (session_id) DO NOTHING") == 1
+        assert session_tracker.get_stats()["pending_interactions"] == 5
+    
+    async def test_concurrent_first_requests_insert_once(self, recording_db, session_tracker):
+        await asyncio.gather(*[
+            session_tracker.record_activity("session-a", "127.0.0.1", "pytest")
+            for _ in range(3)
+        ])
+        
+        assert recording_db.count("INSERT INTO user_sessions") == 1
+    
+    async def test_flush_writes_one_bulk_upsert(self, recording_db, session_tracker):
+        for session_id in ("session-a", "session-b", "session-a"):
+            await session_tracker.record_activity(session_id, "127.0.0.1", "pytest")
+        recording_db.queries.clear()
+        
+        assert await session_tracker.flush() == 2
+        
+        assert len(recording_db.queries) == 1
+        query, values = recording_db.queries[0]
+        assert "total_interactions = user_sessions.total_interactions + EXCLUDED.total_interactions" in query
+        assert values["session_id_0"] == "session-a" and values["interactions_0"] == 2
+        assert values["session_id_1"] == "session-b" and values["interactions_1"] == 1
+        assert session_tracker.get_stats()["pending_sessions"] == 0
+    
+    async def test_failed_flush_is_requeued(self, recording_db, session_tracker, monkeypatch):
+        await session_tracker.record_activity("session-a", "127.0.0.1", "pytest")
+        
+        async def failing_execute(query, values=None):
+            raise RuntimeError("connection lost")
+        
+        monkeypatch.setattr(recording_db, "execute", failing_execute)
+        await session_tracker.flush()
+        await session_tracker.record_activity("session-a", "127.0.0.1", "pytest")
+        
+        stats = session_tracker.get_stats()
+        assert stats["failed_flushes"] == 1
+        assert stats["pending_interactions"] == 2
+
+
+def _matches():
+    return [
+        {"category_id": 7, "category_name": "Climate", "confidence_score": 0.9, "similarity_score": 0.8},
+        {"category_id": 3, "category_name": "Healthcare", "confidence_score": 0.7, "similarity_score": 0.6},
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+@pytest.mark.usefixtures("learning_worker")
+class TestInteractionWriter:
+    """Fire-and-forget interaction tracking with batched inserts"""
+    
+    async def test_tracking_returns_id_without_database_write(self, recording_db, interaction_writer):
+        from app.services.feedback_service import InteractionTracker
+        
+        interaction_id = await InteractionTracker().track_category_matching(
+            session_id="test-session",
+            user_input="climate",
+            matches=_matches(),
+            processing_time=12
+        )
+        
+        assert uuid.UUID(interaction_id).version == 7
+        assert recording_db.queries == []
+        assert interaction_writer.get_stats()["queue_depth"] == 1
+    
+    async def test_flush_writes_one_multi_row_insert(self, recording_db, interaction_writer):
+        from app.services.feedback_service import InteractionTracker
+        
+        tracker = InteractionTracker()
+        ids = [
+            await tracker.track_category_matching("test-session", f"input {i}", _matches(), 10)
+            for i in range(3)
+        ]
+        
+        assert await interaction_writer.flush() == 3
+        
+        assert recording_db.count("INSERT INTO user_interactions") == 1
+        _, values = recording_db.queries[0]
+        assert [values[f"id_{i}"] for i in range(3)] == ids
+        assert json.loads(values["interaction_metadata_0"])["match_details"][0]["category_id"] == 7
+    
+    async def test_input_embedding_is_written_with_the_row(self, recording_db, interaction_writer):
+        import numpy as np
+        from app.services.feedback_service import InteractionTracker
+        from app.utils.embeddings import unpack_embedding
+        
+        tracker = InteractionTracker()
+        await tracker.track_category_matching(
+            "test-session", "climate", _matches(), 10,
+            input_embedding=np.array([0.25, -0.5, 1.0]),
+            embedding_model="text-embedding-3-small"
+        )
+        await tracker.track_category_matching("test-session", "untracked vector", _matches(), 10)
+        
+        await interaction_writer.flush()
+        
+        _, values = recording_db.queries[0]
+        assert unpack_embedding(values["input_embedding_0"]).tolist() == [0.25, -0.5, 1.0]
+        assert values["embedding_model_0"] == "text-embedding-3-small"
+        assert values["input_embedding_1"] is None
+        assert values["embedding_model_1"] is None
+    
+    async def test_feedback_forces_flush_of_pending_interaction(self, recording_db, interaction_writer):
+        from app.services.feedback_service import InteractionTracker
+        
+        interaction_id = await InteractionTracker().track_category_matching(
+            "test-session", "climate", _matches(), 10
+        )
+        
+        result = await FeedbackCollector().submit_feedback(
+            interaction_id=interaction_id,
+            category_feedbacks=[{"category_id": 7, "feedback_type": "accept"}]
+        )
+        
+        assert result["status"] == "success"
+        queries = [query for query, _ in recording_db.queries]
+        insert_at = next(i for i, query in enumerate(queries) if "INSERT INTO user_interactions" in query)
+        read_at = next(i for i, query in enumerate(queries) if "FROM user_interactions" in query)
+        assert insert_at < read_at
+        assert interaction_writer.get_stats()["forced_flushes"] == 1
+    
+    async def test_forced_flush_writes_every_batch_up_to_the_interaction(self, recording_db, interaction_writer):
+        from app.services.feedback_service import InteractionTracker
+        
+        interaction_writer.batch_size = 2
+        ids = [
+            await InteractionTracker().track_category_matching("test-session", f"input {i}", _matches(), 10)
+            for i in range(5)
+        ]
+        
+        assert await interaction_writer.wait_until_written(ids[-1], timeout=5) is True
+        assert recording_db.count("INSERT INTO user_interactions") == 3
+        assert interaction_writer.get_stats()["queue_depth"] == 0
+    
+    async def test_unwritten_interaction_is_retryable_not_missing(self, recording_db, interaction_writer, monkeypatch):
+        from fastapi import HTTPException
+        from app.services.feedback_service import InteractionTracker
+        
+        async def not_written(interaction_id, timeout=None):
+            return False
+        
+        interaction_id = await InteractionTracker().track_category_matching(
+            "test-session", "climate", _matches(), 10
+        )
+        monkeypatch.setattr(interaction_writer, "wait_until_written", not_written)
+        
+        with pytest.raises(HTTPException) as raised:
+            await FeedbackCollector().submit_feedback(
+                interaction_id=interaction_id,
+                category_feedbacks=[{"category_id": 7, "feedback_type": "accept"}]
+            )
+        
+        assert raised.value.status_code == 503
+        assert raised.value.headers == {"Retry-After": "1"}
+    
+    async def test_failing_rows_are_dropped_after_max_attempts(self, recording_db, interaction_writer, monkeypatch):
+        from app.services.feedback_service import InteractionTracker
+        
+        async def failing_execute(query, values=None):
+            raise RuntimeError("connection lost")
+        
+        monkeypatch.setattr(recording_db, "execute", failing_execute)
+        interaction_id = await InteractionTracker().track_category_matching(
+            "test-session", "climate", _matches(), 10
+        )
+        
+        waiter = asyncio.ensure_future(interaction_writer.wait_until_written(interaction_id, timeout=5))
+        await asyncio.sleep(0)
+        for _ in range(interaction_writer.max_attempts):
+            await interaction_writer.flush()
+        
+        assert await waiter is False
+        stats = interaction_writer.get_stats()
+        assert stats["dropped"] == 1
+        assert stats["queue_depth"] == 0
+    
+    async def test_failed_batch_falls_back_to_row_by_row(self, recording_db, interaction_writer, monkeypatch):
+        from app.services.feedback_service import InteractionTracker
+        
+        tracker = InteractionTracker()
+        ids = [await tracker.track_category_matching("test-session", f"input {i}", _matches(), 10) for i in range(3)]
+        execute = recording_db.execute
+        
+        async def foreign_key_violation(query, values=None):
+            # The multi-row insert and the bad row's own insert both fail
+            if "id_1" in values or values.get("id_0") == ids[1]:
+                raise RuntimeError("violates foreign key constraint")
+            await execute(query, values)
+        
+        monkeypatch.setattr(recording_db, "execute", foreign_key_violation)
+        
+        assert await interaction_writer.flush() == 2
+        
+        written = [values["id_0"] for _, values in recording_db.queries]
+        assert written == [ids[0], ids[2]]
+        stats = interaction_writer.get_stats()
+        assert (stats["failed_batches"], stats["failed_rows"], stats["queue_depth"]) == (1, 1, 1)
+        assert await interaction_writer.wait_until_written(ids[0]) is True
+    
+    async def test_recent_interaction_from_another_worker_is_retryable(self, recording_db, interaction_writer):
+        from fastapi import HTTPException
+        from app.utils.ids import uuid7
+        
+        recording_db.interaction = None
+        
+        with pytest.raises(HTTPException) as raised:
+            await FeedbackCollector().submit_feedback(
+                interaction_id=str(uuid7()),
+                category_feedbacks=[{"category_id": 7, "feedback_type": "accept"}]
+            )
+        
+        assert raised.value.status_code == 503
+        assert interaction_writer.may_be_queued_elsewhere(str(uuid.UUID(int=(7 << 76) | (0b10 << 62)))) is False
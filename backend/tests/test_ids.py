@@ -0,0 +1,38 @@
+"""
+Time-ordered identifier tests
+"""
+import time
+import uuid
+
+import pytest
+
+from app.utils.ids import uuid7, uuid7_timestamp_ms
+
+
+@pytest.mark.unit
+class TestUuid7:
+    """UUIDv7 generation used for feedback table primary keys"""
+    
+    def test_version_and_variant(self):
+        value = uuid7()
+        
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+    
+    def test_embeds_current_millisecond_timestamp(self):
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+        
+        assert before <= uuid7_timestamp_ms(value) <= after + 1
+    
+    def test_strictly_increasing_within_a_process(self):
+        values = [uuid7() for _ in range(10_000)]
+        
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+    
+    def test_string_order_matches_generation_order(self):
+        values = [str(uuid7()) for _ in range(1_000)]
+        
+        assert values == sorted(values)
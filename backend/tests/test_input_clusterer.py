@@ -0,0 +1,162 @@
+"""
+Input clustering tests
+
+Feeds synthetic embeddings (noisy copies of a few fixed directions) through
+the streaming clusterer, and runs identify_missing_categories against an
+in-memory database and a fake encoder.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.input_clusterer import InputClusterer
+from app.models.text_encoder import EMBEDDING_MODEL
+from app.services.learning_service import FeedbackAnalyzer
+from app.utils.embeddings import pack_embedding
+
+DIMENSION = 16
+TOPICS = {
+    "broadband": 0,
+    "ferry": 5,
+    "libraries": 10,
+}
+
+
+def _embed(text, rng=None):
+    """Unit vector along the axis of the topic the text mentions, plus noise."""
+    vector = np.zeros(DIMENSION)
+    for topic, axis in TOPICS.items():
+        if topic in text:
+            vector[axis] = 1.0
+    if rng is not None:
+        vector += rng.normal(scale=0.05, size=DIMENSION)
+    return vector
+
+
+def _stream(sizes, batch_size, seed=1):
+    """Shuffled (texts, embeddings) batches with sizes[topic] inputs per topic."""
+    rng = np.random.default_rng(seed)
+    texts = [f"{topic} input {i}" for topic, size in sizes.items() for i in range(size)]
+    rng.shuffle(texts)
+    embeddings = np.array([_embed(text, rng) for text in texts])
+    for start in range(0, len(texts), batch_size):
+        yield texts[start:start + batch_size], embeddings[start:start + batch_size]
+
+
+@pytest.mark.unit
+class TestInputClusterer:
+    """Streaming mini-batch k-means"""
+    
+    def test_recovers_separated_topics(self):
+        clusterer = InputClusterer(n_clusters=3)
+        for texts, embeddings in _stream({"broadband": 60, "ferry": 30, "libraries": 10}, batch_size=16):
+            clusterer.partial_fit(embeddings, texts)
+        
+        clusters = clusterer.clusters()
+        
+        assert [cluster["size"] for cluster in clusters] == [60, 30, 10]
+        for cluster, topic in zip(clusters, ["broadband", "ferry", "libraries"]):
+            assert all(text.startswith(topic) for text in cluster["representative_inputs"])
+    
+    def test_memory_is_bounded_by_clusters(self):
+        clusterer = InputClusterer(n_clusters=3, representatives=2, init_size=200)
+        for texts, embeddings in _stream({"broadband": 500, "ferry": 500, "libraries": 500}, batch_size=100):
+            clusterer.partial_fit(embeddings, texts)
+        
+        assert clusterer.inputs_seen == 1500
+        assert [cluster["size"] for cluster in clusterer.clusters()] == [500, 500, 500]
+        assert clusterer.centroids.shape == (3, DIMENSION)
+        assert clusterer._buffer == []
+        assert all(len(heap) <= 2 for heap in clusterer._representatives)
+    
+    def test_reports_nearest_existing_category(self):
+        clusterer = InputClusterer(n_clusters=2)
+        for texts, embeddings in _stream({"broadband": 20, "ferry": 20}, batch_size=8):
+            clusterer.partial_fit(embeddings, texts)
+        
+        categories = np.array([_embed("ferry"), _embed("ferry libraries")])
+        clusters = clusterer.clusters(category_embeddings=categories, category_names=["Transit", "Services"])
+        by_topic = {cluster["representative_inputs"][0].split()[0]: cluster for cluster in clusters}
+        
+        assert by_topic["ferry"]["nearest_category"] == "Transit"
+        assert by_topic["ferry"]["nearest_category_distance"] < 0.05
+        # Nothing in the catalog points along the broadband axis
+        assert by_topic["broadband"]["nearest_category_distance"] > 0.9
+    
+    def test_small_clusters_are_filtered(self):
+        clusterer = InputClusterer(n_clusters=3)
+        for texts, embeddings in _stream({"broadband": 20, "ferry": 20, "libraries": 2}, batch_size=10):
+            clusterer.partial_fit(embeddings, texts)
+        
+        assert [cluster["size"] for cluster in clusterer.clusters(min_size=5)] == [20, 20]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestIdentifyMissingCategories:
+    """Missing category suggestions from clustered low-confidence inputs"""
+    
+    async def test_streams_every_page_and_clusters(self, fake_text_encoder, paging_database, monkeypatch):
+        start = datetime(2026, 10, 1)
+        texts = ["broadband access"] * 12 + ["ferry schedules"] * 9 + ["libraries"] * 2
+        db = paging_database([
+            {"id": i, "created_at": start + timedelta(minutes=i), "user_input": text,
+             "input_embedding": None, "embedding_model": None}
+            for i, text in enumerate(texts)
+        ], "app.services.learning_service.database")
+        encoder = fake_text_encoder(_embed, targets=("app.models.text_encoder.get_text_encoder",))
+        monkeypatch.setattr("app.models.category_matcher._category_matcher_instance", None)
+        
+        suggestions = await FeedbackAnalyzer().identify_missing_categories(
+            frequency_threshold=5, n_clusters=3, batch_size=5
+        )
+        
+        assert len(db.queries) == 5
+        assert sum(encoder.batch_sizes) == len(texts)
+        assert [(s["theme"], s["frequency"]) for s in suggestions] == [
+            ("broadband access", 12),
+            ("ferry schedules", 9),
+        ]
+    
+    async def test_stored_embeddings_skip_the_encoder(self, fake_text_encoder, paging_database, monkeypatch):
+        start = datetime(2026, 10, 1)
+        texts = ["broadband access"] * 6 + ["ferry schedules"] * 6
+        db = paging_database([
+            {
+                "id": i,
+                "created_at": start + timedelta(minutes=i),
+                "user_input": text,
+                # Every other row was stored by an older model and must be re-embedded
+                "input_embedding": pack_embedding(_embed(text)),
+                "embedding_model": EMBEDDING_MODEL if i % 2 == 0 else "retired-model"
+            }
+            for i, text in enumerate(texts)
+        ], "app.services.learning_service.database")
+        encoder = fake_text_encoder(_embed, targets=("app.models.text_encoder.get_text_encoder",))
+        monkeypatch.setattr("app.models.category_matcher._category_matcher_instance", None)
+        
+        suggestions = await FeedbackAnalyzer().identify_missing_categories(
+            frequency_threshold=5, n_clusters=2, batch_size=50
+        )
+        
+        assert encoder.batch_sizes == [6]
+        assert sorted(s["frequency"] for s in suggestions) == [6, 6]
+    
+    async def test_stops_reading_at_max_inputs(self, fake_text_encoder, paging_database, monkeypatch):
+        start = datetime(2026, 10, 1)
+        db = paging_database([
+            {"id": i, "created_at": start + timedelta(minutes=i), "user_input": "broadband access",
+             "input_embedding": None, "embedding_model": None}
+            for i in range(30)
+        ], "app.services.learning_service.database")
+        encoder = fake_text_encoder(_embed, targets=("app.models.text_encoder.get_text_encoder",))
+        monkeypatch.setattr("app.models.category_matcher._category_matcher_instance", None)
+        
+        suggestions = await FeedbackAnalyzer().identify_missing_categories(
+            frequency_threshold=5, n_clusters=1, batch_size=8, max_inputs=12
+        )
+        
+        assert [values["batch_size"] for values in db.queries] == [8, 4]
+        assert encoder.batch_sizes == [8, 4]
+        assert [s["frequency"] for s in suggestions] == [12]
@@ -0,0 +1,194 @@
+"""
+Admin job queue tests
+
+Runs claimed jobs through a recording database (no Postgres needed) and
+checks how outcomes are written back: results, retries with backoff,
+permanent failures, timeouts and lease expiry.
+"""
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import job_queue as job_queue_module
+from app.services.job_queue import JobQueue, PermanentJobError
+
+
+class RecordingDatabase:
+    def __init__(self, claim_row=None):
+        self.claim_row = claim_row
+        self.queries = []
+    
+    def _record(self, query, values):
+        self.queries.append((" ".join(query.split()), values or {}))
+    
+    async def fetch_one(self, query, values=None):
+        self._record(query, values)
+        if "FOR UPDATE SKIP LOCKED" in query:
+            row, self.claim_row = self.claim_row, None
+            return row
+        return None
+    
+    async def fetch_all(self, query, values=None):
+        self._record(query, values)
+        return []
+    
+    async def execute(self, query, values=None):
+        self._record(query, values)
+    
+    def outcome(self):
+        """Status set by the last UPDATE and its values"""
+        query, values = [q for q in self.queries if q[0].startswith("UPDATE admin_jobs")][-1]
+        return query.split("status = '")[1].split("'")[0], values
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = RecordingDatabase()
+    monkeypatch.setattr(job_queue_module, "database", db)
+    return db
+
+
+def _job(job_type="test", attempts=1, max_attempts=3):
+    return {"id": str(uuid.uuid4()), "job_type": job_type, "payload": {"n": 2}, "attempts": attempts, "max_attempts": max_attempts}
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestJobExecution:
+    """Outcomes written back for a claimed job"""
+    
+    async def test_success_stores_result(self, db):
+        queue = JobQueue()
+        
+        async def double(payload):
+            return {"value": payload["n"] * 2}
+        
+        queue.register("test", double)
+        
+        assert await queue.execute(_job(), "worker-1") == "succeeded"
+        status, values = db.outcome()
+        assert status == "succeeded"
+        assert values["result"] == '{"value": 4}'
+        assert values["worker_id"] == "worker-1"
+        assert queue.get_stats()["succeeded"] == 1
+    
+    async def test_failures_retry_with_backoff_until_max_attempts(self, db):
+        queue = JobQueue(retry_base_seconds=10, retry_max_seconds=25)
+        
+        async def flaky(payload):
+            raise RuntimeError("upstream 502")
+        
+        queue.register("test", flaky)
+        
+        assert await queue.execute(_job(attempts=2), "worker-1") == "queued"
+        status, values = db.outcome()
+        assert status == "queued"
+        assert (values["delay"], values["error"]) == (20, "upstream 502")
+        
+        assert await queue.execute(_job(attempts=3), "worker-1") == "failed"
+        assert [queue.retry_delay(n) for n in (1, 2, 3, 4)] == [10, 20, 25, 25]
+    
+    async def test_permanent_errors_and_timeouts(self, db):
+        queue = JobQueue(job_timeout=0.01)
+        
+        async def missing(payload):
+            raise PermanentJobError("Category 7 not found")
+        
+        async def slow(payload):
+            await asyncio.sleep(1)
+        
+        queue.register("missing", missing)
+        queue.register("slow", slow)
+        
+        assert await queue.execute(_job("missing"), "worker-1") == "failed"
+        assert db.outcome()[1]["error"] == "Category 7 not found"
+        assert await queue.execute(_job("slow"), "worker-1") == "queued"
+        assert db.outcome()[1]["error"] == "Timed out"
+    
+    async def test_progress_is_written_to_the_running_row(self, db):
+        queue = JobQueue()
+        
+        async def counting(payload, progress):
+            await progress({"completed": 1, "total": payload["n"]})
+            return {"completed": payload["n"]}
+        
+        queue.register("test", counting, reports_progress=True)
+        
+        assert await queue.execute(_job(), "worker-1") == "succeeded"
+        query, values = [q for q in db.queries if "SET progress" in q[0]][0]
+        assert "locked_by = :worker_id AND status = 'running'" in query
+        assert (values["progress"], values["worker_id"]) == ('{"completed": 1, "total": 2}', "worker-1")
+    
+    async def test_expired_final_attempt_is_not_run_again(self, db):
+        queue = JobQueue()
+        calls = []
+        
+        async def handler(payload):
+            calls.append(payload)
+            return {}
+        
+        queue.register("test", handler)
+        
+        assert await queue.execute(_job(attempts=2, max_attempts=1), "worker-1") == "failed"
+        assert calls == []
+    
+    async def test_claim_reports_reclaimed_leases(self, db):
+        queue = JobQueue(job_timeout=120)
+        db.claim_row = {
+            "id": uuid.uuid4(), "job_type": "test", "payload": '{"n": 1}',
+            "attempts": 2, "max_attempts": 3, "previous_status": "running"
+        }
+        
+        job = await queue.claim("worker-1")
+        
+        assert job["payload"] == {"n": 1}
+        assert "INTERVAL '180 seconds'" in db.queries[0][0]
+        assert (queue.claimed, queue.reclaimed) == (1, 1)
+        assert await queue.claim("worker-1") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestWorkers:
+    """Worker loop and submission"""
+    
+    async def test_enqueue_wakes_a_worker(self, db):
+        queue = JobQueue(workers=1, poll_interval=60)
+        done = asyncio.Event()
+        
+        async def handler(payload):
+            done.set()
+            return {}
+        
+        queue.register("test", handler)
+        queue.start()
+        await asyncio.sleep(0)
+        
+        job_id = await queue.enqueue("test", {"n": 1}, created_by="admin")
+        db.claim_row = {"id": job_id, "job_type": "test", "payload": {}, "attempts": 1, "max_attempts": 3, "previous_status": "queued"}
+        queue._wakeup.set()
+        await asyncio.wait_for(done.wait(), timeout=1)
+        await queue.stop()
+        
+        assert uuid.UUID(job_id).version == 7
+        assert not queue.is_running
+    
+    async def test_unknown_job_type_is_rejected(self, db):
+        with pytest.raises(ValueError):
+            await JobQueue().enqueue("missing", {})
+    
+    async def test_route_client_errors_become_permanent(self):
+        from app.api.routes.category_admin import _run_as_job
+        
+        async def not_found():
+            raise HTTPException(status_code=404, detail="Category 7 not found")
+        
+        async def server_error():
+            raise HTTPException(status_code=500, detail="OpenAI unavailable")
+        
+        with pytest.raises(PermanentJobError):
+            await _run_as_job(not_found())
+        with pytest.raises(RuntimeError):
+            await _run_as_job(server_error())
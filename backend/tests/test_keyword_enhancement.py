@@ -0,0 +1,181 @@
+"""
+Bulk keyword enhancement tests
+
+Runs bulk enhancement with a fake GPT call, a recording database and a
+matcher on a fake encoder: checks bounded concurrency, the single
+transaction, progress reporting and that only changed categories are
+re-embedded.
+"""
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.models.category_matcher import CategoryMatcher
+from app.services import keyword_enhancement
+from app.services.keyword_enhancement import BulkKeywordEnhancer, merge_keywords
+
+CATEGORIES = [
+    {"id": i, "name": f"Category {i}", "description": "", "keywords": ["base"]}
+    for i in range(1, 9)
+]
+
+
+class RecordingDatabase:
+    """Serves each category's current keywords to FOR UPDATE reads and records writes."""
+    
+    def __init__(self):
+        self.keywords = {category["id"]: list(category["keywords"]) for category in CATEGORIES}
+        self.queries = []
+        self.transactions = 0
+    
+    async def fetch_all(self, query, values=None):
+        self.queries.append((" ".join(query.split()), values or {}))
+        ids = [value for key, value in (values or {}).items() if key.startswith("id_")]
+        return [{"id": i, "keywords": json.dumps(self.keywords[i])} for i in sorted(ids) if i in self.keywords]
+    
+    async def execute(self, query, values=None):
+        self.queries.append((" ".join(query.split()), values or {}))
+    
+    def transaction(self):
+        database = self
+        
+        class _Transaction:
+            async def __aenter__(self):
+                database.transactions += 1
+            
+            async def __aexit__(self, *exc_info):
+                return False
+        
+        return _Transaction()
+
+
+@pytest.fixture
+def encoder(fake_text_encoder):
+    return fake_text_encoder(lambda text: np.array([len(text), 1.0]))
+
+
+@pytest.fixture
+def matcher(encoder, monkeypatch):
+    matcher = CategoryMatcher()
+    matcher.load_categories([{**category, "success_count": 0, "total_usage_count": 0} for category in CATEGORIES])
+    monkeypatch.setattr(keyword_enhancement, "get_category_matcher", lambda: matcher)
+    return matcher
+
+
+@pytest.fixture
+def recording_db(monkeypatch):
+    db = RecordingDatabase()
+    monkeypatch.setattr(keyword_enhancement, "database", db)
+    return db
+
+
+@pytest.mark.unit
+def test_merge_keywords_skips_existing_and_repeated():
+    assert merge_keywords(["Tax", "rent"], ["tax", "Levy", "levy", "rent control"]) == ["Levy", "rent control"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestBulkKeywordEnhancer:
+    """Concurrent GPT calls, one write, one incremental reload"""
+    
+    async def test_calls_are_bounded_and_results_written_once(self, matcher, encoder, recording_db, monkeypatch):
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+        
+        def fake_request(category, context):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.02)
+            with lock:
+                active["now"] -= 1
+            # Even categories get nothing new
+            return ["base"] if category["id"] % 2 == 0 else ["base", f"new {category['id']}"]
+        
+        monkeypatch.setattr(keyword_enhancement, "request_new_keywords", fake_request)
+        encoder.batches.clear()
+        
+        reports = []
+        
+        async def progress(value):
+            reports.append(value)
+        
+        job = await BulkKeywordEnhancer(concurrency=3).run(CATEGORIES, "context", progress=progress)
+        
+        assert active["peak"] == 3
+        assert job["stage"] == "completed"
+        assert (job["completed"], job["failed"], job["keywords_added"], job["categories_updated"]) == (8, 0, 4, 4)
+        assert [report["stage"] for report in reports] == ["enhancing", "writing", "reloading"]
+        assert reports[0]["total"] == 8 and reports[1]["completed"] == 8
+        
+        assert recording_db.transactions == 1
+        (select, _), (query, values) = recording_db.queries
+        assert select.endswith("FOR UPDATE")
+        assert query.startswith("UPDATE political_categories pc")
+        assert sorted(v for k, v in values.items() if k.startswith("id_")) == [1, 3, 5, 7]
+        
+        # One embedding call covering only the changed categories
+        assert len(encoder.batches) == 1 and len(encoder.batches[0]) == 4
+        assert matcher.get_category_by_id(3)["keywords"] == ["base", "new 3"]
+        assert matcher.get_category_by_id(4)["keywords"] == ["base"]
+    
+    async def test_failed_calls_are_reported_and_others_still_written(self, matcher, recording_db, monkeypatch):
+        def fake_request(category, context):
+            if category["id"] == 2:
+                raise ValueError("bad JSON")
+            return ["extra"]
+        
+        monkeypatch.setattr(keyword_enhancement, "request_new_keywords", fake_request)
+        
+        job = await BulkKeywordEnhancer().run(CATEGORIES[:3], "context")
+        
+        assert job["stage"] == "completed"
+        assert (job["completed"], job["failed"], job["categories_updated"]) == (2, 1, 2)
+        assert job["errors"] == [{"category_id": 2, "error": "bad JSON"}]
+    
+    async def test_edits_made_during_the_job_are_kept(self, matcher, recording_db, monkeypatch):
+        def fake_request(category, context):
+            # An admin edits the category while its GPT call is in flight
+            recording_db.keywords[category["id"]] = ["base", "edited", "Extra"]
+            return ["extra", "new"]
+        
+        monkeypatch.setattr(keyword_enhancement, "request_new_keywords", fake_request)
+        
+        job = await BulkKeywordEnhancer().run(CATEGORIES[:1], "context")
+        
+        assert (job["categories_updated"], job["keywords_added"]) == (1, 1)
+        assert json.loads(recording_db.queries[-1][1]["keywords_0"]) == ["base", "edited", "Extra", "new"]
+        assert matcher.get_category_by_id(1)["keywords"] == ["base", "edited", "Extra", "new"]
+    
+    async def test_concurrency_is_capped_by_the_connection_pool(self, monkeypatch):
+        monkeypatch.setattr(keyword_enhancement.settings, "openai_max_connections", 5)
+        
+        assert BulkKeywordEnhancer(concurrency=50).concurrency == 5
+        assert BulkKeywordEnhancer(concurrency=0).concurrency == 1
+
+
+@pytest.mark.unit
+class TestUpdateCategories:
+    """Incremental re-embedding in the matcher"""
+    
+    def test_only_known_categories_are_replaced(self, matcher, encoder):
+        before = matcher.category_embeddings.copy()
+        encoder.batches.clear()
+        
+        replaced = matcher.update_categories([
+            {**matcher.get_category_by_id(2), "keywords": ["base", "a much longer keyword"]},
+            {"id": 99, "name": "Unknown", "keywords": []},
+        ])
+        
+        assert replaced == 1
+        assert len(encoder.batches) == 1 and len(encoder.batches[0]) == 1
+        assert matcher.category_embeddings[1][0] != before[1][0]
+        np.testing.assert_array_equal(np.delete(matcher.category_embeddings, 1, axis=0), np.delete(before, 1, axis=0))
+    
+    def test_requires_loaded_catalog(self, encoder):
+        with pytest.raises(RuntimeError):
+            CategoryMatcher().update_categories([{"id": 1, "name": "x"}])
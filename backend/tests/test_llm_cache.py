@@ -0,0 +1,142 @@
+"""
+LLM response cache tests
+
+Drives the cache with a counting fake GPT call: hits, TTL expiry, LRU
+eviction, bypass, catalog version changes and shared in-flight calls. Also
+checks that admin prompts (and their similarity prefilter) are only built on
+a miss.
+"""
+import asyncio
+
+import pytest
+
+from app.services import llm_cache
+from app.services.llm_cache import LLMResponseCache, catalog_version
+
+CATALOG = [{"id": 2, "updated_at": "2026-10-01T00:00:00"}, {"id": 1, "updated_at": "2026-09-01T00:00:00"}]
+
+
+class FakeCompletion:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+    
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"category": {"name": f"Result {self.calls}"}}
+
+
+@pytest.mark.unit
+def test_catalog_version_tracks_membership_and_edits():
+    version = catalog_version(CATALOG)
+    
+    assert catalog_version(list(reversed(CATALOG))) == version
+    assert catalog_version(CATALOG[:1]) != version
+    assert catalog_version([{**CATALOG[0], "updated_at": "2026-10-19T00:00:00"}, CATALOG[1]]) != version
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestLLMResponseCache:
+    """Keying, expiry, bounds and bypass"""
+    
+    async def _ask(self, cache, compute, prompt="describe housing", version="v1", temperature=0.3, bypass=False):
+        return await cache.get_or_compute("gpt-4o", temperature, prompt, version, compute, bypass=bypass)
+    
+    async def test_identical_requests_hit(self):
+        cache, compute = LLMResponseCache(), FakeCompletion()
+        
+        first, first_cached = await self._ask(cache, compute)
+        first["category"]["name"] = "mutated by caller"
+        second, second_cached = await self._ask(cache, compute)
+        
+        assert (first_cached, second_cached) == (False, True)
+        assert second == {"category": {"name": "Result 1"}}
+        assert compute.calls == 1
+        assert cache.get_stats()["hit_rate"] == 0.5
+    
+    async def test_key_covers_prompt_temperature_and_catalog(self):
+        cache, compute = LLMResponseCache(), FakeCompletion()
+        
+        await self._ask(cache, compute)
+        await self._ask(cache, compute, prompt="describe housing costs")
+        await self._ask(cache, compute, temperature=0.7)
+        await self._ask(cache, compute, version="v2")
+        
+        assert compute.calls == 4
+    
+    async def test_expired_and_evicted_entries_are_recomputed(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(llm_cache.time, "monotonic", lambda: clock[0])
+        cache, compute = LLMResponseCache(max_entries=2, ttl=60), FakeCompletion()
+        
+        await self._ask(cache, compute, prompt="a")
+        clock[0] += 61
+        _, cached = await self._ask(cache, compute, prompt="a")
+        assert not cached and cache.expired == 1
+        
+        await self._ask(cache, compute, prompt="b")
+        await self._ask(cache, compute, prompt="a")  # refreshes "a"
+        await self._ask(cache, compute, prompt="c")  # evicts "b"
+        
+        assert cache.evictions == 1
+        assert (await self._ask(cache, compute, prompt="a"))[1] is True
+        assert (await self._ask(cache, compute, prompt="b"))[1] is False
+    
+    async def test_bypass_forces_a_fresh_response_and_replaces_the_entry(self):
+        cache, compute = LLMResponseCache(), FakeCompletion()
+        
+        await self._ask(cache, compute)
+        fresh, cached = await self._ask(cache, compute, bypass=True)
+        again, again_cached = await self._ask(cache, compute)
+        
+        assert (cached, again_cached) == (False, True)
+        assert fresh == again == {"category": {"name": "Result 2"}}
+        assert cache.bypassed == 1
+    
+    async def test_concurrent_identical_requests_share_one_call(self):
+        cache, compute = LLMResponseCache(), FakeCompletion(delay=0.02)
+        
+        results = await asyncio.gather(*(self._ask(cache, compute) for _ in range(5)))
+        
+        assert compute.calls == 1
+        assert sorted(cached for _, cached in results) == [False, True, True, True, True]
+        assert not cache._locks
+    
+    async def test_failures_are_not_cached(self):
+        cache = LLMResponseCache()
+        
+        async def failing():
+            raise RuntimeError("rate limited")
+        
+        with pytest.raises(RuntimeError):
+            await self._ask(cache, failing)
+        
+        assert cache.get_stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+async def test_admin_prompt_is_only_built_on_a_miss(monkeypatch):
+    from types import SimpleNamespace
+    from app.api.routes import category_admin
+    
+    cache = LLMResponseCache()
+    monkeypatch.setattr(category_admin, "get_llm_response_cache", lambda: cache)
+    message = SimpleNamespace(content='{"is_redundant": false}')
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    )))
+    built = []
+    
+    async def build_prompt():
+        # Stands in for the similarity prefilter's embedding call
+        built.append(1)
+        return "prompt"
+    
+    for _ in range(2):
+        result, cached = await category_admin.complete_admin_prompt(client, "generate_preview:housing", CATALOG, build_prompt)
+    
+    assert (result, cached) == ({"is_redundant": False}, True)
+    assert len(built) == 1
@@ -0,0 +1,150 @@
+"""
+Metric time-series tests
+
+Checks the vectorized trend fit against known slopes and runs the series
+queries and the admin performance endpoint against an in-memory database.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.metric_series import MetricSeriesService, classify_trend, trend_slopes
+
+
+class SeriesDatabase:
+    """Returns canned rows per source table and records every query."""
+    
+    def __init__(self, daily_rows=(), total_rows=()):
+        self.daily_rows = list(daily_rows)
+        self.total_rows = list(total_rows)
+        self.queries = []
+    
+    async def fetch_all(self, query, values=None):
+        self.queries.append((" ".join(query.split()), values or {}))
+        if "MAX(updated_at)" in query:
+            return self.total_rows
+        return self.daily_rows
+
+
+def _daily(category_id, day, successful, total):
+    return {
+        "category_id": category_id,
+        "bucket": day,
+        "total": total,
+        "successful": successful,
+        "confidence_sum": 0.8 * total,
+        "rating_sum": 0,
+        "rating_count": 0
+    }
+
+
+@pytest.mark.unit
+class TestTrendSlopes:
+    """Weighted least-squares slopes for many series at once"""
+    
+    def test_matches_polyfit_per_row(self):
+        rng = np.random.default_rng(3)
+        positions = np.arange(10, dtype=float)
+        values = rng.normal(size=(4, 10)) + np.array([[0.5], [-1.0], [0.0], [2.0]]) * positions
+        
+        slopes = trend_slopes(positions, values, np.ones_like(values))
+        
+        expected = [np.polyfit(positions, row, 1)[0] for row in values]
+        assert slopes == pytest.approx(expected)
+    
+    def test_empty_buckets_are_ignored(self):
+        positions = np.arange(4, dtype=float)
+        values = np.array([[0.1, np.nan, 0.3, 0.4], [np.nan, np.nan, 0.5, np.nan]])
+        
+        slopes = trend_slopes(positions, values, np.ones_like(values))
+        
+        assert slopes[0] == pytest.approx(0.1)
+        # A single point has no slope
+        assert slopes[1] == 0.0
+    
+    def test_classification_needs_samples_and_movement(self):
+        assert classify_trend(0.05, samples=50) == "improving"
+        assert classify_trend(-0.05, samples=50) == "declining"
+        assert classify_trend(0.001, samples=50) == "stable"
+        assert classify_trend(0.05, samples=2) == "stable"
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestMetricSeriesService:
+    """Grouped series queries"""
+    
+    async def test_one_query_for_all_categories(self, monkeypatch):
+        start = date(2026, 10, 1)
+        db = SeriesDatabase([
+            _daily(category_id, start + timedelta(days=d), successful, 10)
+            for d in range(7)
+            for category_id, successful in ((1, 3 + d), (2, 9 - d), (3, 5))
+        ])
+        monkeypatch.setattr("app.services.metric_series.database", db)
+        
+        result = await MetricSeriesService().feedback_series("success_rate", "day", days=7)
+        
+        assert len(db.queries) == 1
+        assert result["series"][1]["slope"] == pytest.approx(0.1)
+        assert result["series"][2]["slope"] == pytest.approx(-0.1)
+        assert result["series"][3]["slope"] == pytest.approx(0.0)
+        assert result["series"][1]["points"][0] == {"bucket": "2026-10-01", "value": 0.3, "samples": 10}
+    
+    async def test_weekly_and_hourly_buckets_are_grouped_in_sql(self, monkeypatch):
+        db = SeriesDatabase()
+        monkeypatch.setattr("app.services.metric_series.database", db)
+        service = MetricSeriesService()
+        
+        await service.feedback_series("feedback_count", "week", days=90, category_ids=[4, 5])
+        await service.feedback_series("avg_rating", "hour", days=2)
+        
+        (weekly, weekly_values), (hourly, _) = db.queries
+        assert "date_trunc('week', day)" in weekly and "FROM category_feedback_daily" in weekly
+        assert weekly_values == {"category_id_0": 4, "category_id_1": 5}
+        assert "date_trunc('hour', created_at)" in hourly and "FROM category_feedback " in hourly
+    
+    async def test_invalid_requests_are_rejected(self, monkeypatch):
+        monkeypatch.setattr("app.services.metric_series.database", SeriesDatabase())
+        service = MetricSeriesService()
+        
+        with pytest.raises(ValueError):
+            await service.feedback_series("success_rate", "hour", days=90)
+        with pytest.raises(ValueError):
+            await service.learning_metric_series("success_rate", "hour")
+        with pytest.raises(ValueError):
+            await service.feedback_series("clicks")
+    
+    async def test_performance_endpoint_fills_trend_fields(self, monkeypatch):
+        start = date(2026, 10, 1)
+        db = SeriesDatabase(
+            daily_rows=[_daily(7, start + timedelta(days=d), 2 + d, 10) for d in range(7)],
+            total_rows=[
+                {"category_id": 7, "last_used": datetime(2026, 10, 7, 12, 30), "avg_confidence": 0.62},
+                {"category_id": 8, "last_used": datetime(2026, 9, 1), "avg_confidence": None},
+            ]
+        )
+        monkeypatch.setattr("app.services.metric_series.database", db)
+        
+        class Matcher:
+            categories = [
+                {"id": 7, "name": "Climate", "total_usage_count": 10, "success_count": 6},
+                {"id": 8, "name": "Transit", "total_usage_count": 4, "success_count": 1},
+                {"id": 9, "name": "Housing"},
+            ]
+        monkeypatch.setattr("app.api.routes.admin.get_category_matcher", lambda: Matcher())
+        
+        from app.api.routes.admin import get_category_performance
+        
+        performance = {
+            row.category_id: row
+            for row in await get_category_performance(admin_auth=True, sort_by="name", order="asc")
+        }
+        
+        assert len(db.queries) == 2
+        assert performance[7].trend_7_days == "improving"
+        assert performance[7].last_used == "2026-10-07T12:30:00"
+        assert performance[7].avg_confidence_score == 0.62
+        assert performance[8].trend_7_days == "stable"
+        assert performance[9].last_used is None and performance[9].avg_confidence_score == 0.0
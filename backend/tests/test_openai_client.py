@@ -0,0 +1,132 @@
+"""
+Shared OpenAI client tests
+
+Drives the instrumented transport against a local keep-alive HTTP server
+(no OpenAI access needed) and checks that the client is built once.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.services import openai_client
+from app.services.openai_client import InstrumentedTransport, get_openai_client, get_openai_pool_stats
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        body = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fresh_client(monkeypatch):
+    monkeypatch.setattr(openai_client, "_openai_client_instance", None)
+    monkeypatch.setattr(openai_client, "_openai_transport_instance", None)
+    yield
+    openai_client.close_openai_client()
+
+
+@pytest.mark.unit
+class TestInstrumentedTransport:
+    """Pool utilization counters"""
+    
+    def test_sequential_requests_reuse_one_connection(self, server):
+        transport = InstrumentedTransport(limits=httpx.Limits(max_connections=4, max_keepalive_connections=2))
+        
+        with httpx.Client(transport=transport) as client:
+            for _ in range(5):
+                assert client.post(f"{server}/v1/embeddings", json={}).status_code == 200
+            stats = transport.get_stats()
+        
+        assert stats["requests"] == 5
+        assert stats["connections_opened"] == 1
+        assert stats["connection_reuse_rate"] == 0.8
+        assert stats["open_connections"] == 1
+        assert stats["idle_connections"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["peak_in_flight"] == 1
+        assert stats["max_connections"] == 4
+    
+    def test_concurrent_requests_count_each_connection_once(self, server):
+        transport = InstrumentedTransport(limits=httpx.Limits(max_connections=3, max_keepalive_connections=3))
+        
+        with httpx.Client(transport=transport) as client:
+            def post_many():
+                for _ in range(5):
+                    assert client.post(f"{server}/v1/embeddings", json={}).status_code == 200
+            
+            threads = [threading.Thread(target=post_many) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = transport.get_stats()
+        
+        assert stats["requests"] == 15
+        assert 1 <= stats["connections_opened"] <= 3
+        assert stats["connections_opened"] == stats["open_connections"]
+        assert stats["connection_reuse_rate"] > 0
+        assert stats["queued_requests"] == 0
+    
+    def test_failures_are_counted(self):
+        transport = InstrumentedTransport()
+        
+        with httpx.Client(transport=transport) as client:
+            with pytest.raises(httpx.ConnectError):
+                client.post("http://127.0.0.1:9/unreachable")
+        
+        assert transport.failed_requests == 1
+        assert transport.in_flight == 0
+
+
+@pytest.mark.unit
+class TestSharedClient:
+    """One client for every subsystem"""
+    
+    def test_client_is_created_once(self, fresh_client, monkeypatch):
+        monkeypatch.setattr(openai_client.settings, "openai_api_key", "sk-test")
+        assert get_openai_pool_stats() == {"initialized": False}
+        
+        first = get_openai_client()
+        
+        assert get_openai_client() is first
+        assert first.max_retries == openai_client.settings.openai_max_retries
+        assert get_openai_pool_stats()["initialized"] is True
+        assert get_openai_pool_stats()["max_connections"] == openai_client.settings.openai_max_connections
+    
+    def test_missing_key_raises(self, fresh_client, monkeypatch):
+        monkeypatch.setattr(openai_client.settings, "openai_api_key", None)
+        
+        with pytest.raises(ValueError):
+            get_openai_client()
+    
+    def test_subsystems_share_the_client(self, fresh_client, monkeypatch):
+        from app.models.sentiment_analyzer import SentimentAnalyzer
+        from app.models.text_encoder import TextEncoder
+        
+        monkeypatch.setattr(openai_client.settings, "openai_api_key", "sk-test")
+        
+        assert TextEncoder().client is SentimentAnalyzer().client is get_openai_client()
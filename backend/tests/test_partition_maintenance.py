@@ -0,0 +1,130 @@
+"""
+Partition maintenance tests
+
+Uses an in-memory stand-in for the Postgres catalog so partition creation and
+expiry decisions can be asserted without a live database.
+"""
+from datetime import date
+
+import pytest
+
+from app.services import partition_maintenance
+from app.services.partition_maintenance import PartitionMaintenance, partition_month, partition_name
+
+
+class CatalogDatabase:
+    """Answers the catalog queries maintenance issues and records DDL."""
+    
+    def __init__(self, partitions, sessions_to_prune=0):
+        # table -> list of partition names
+        self.partitions = partitions
+        self.sessions_to_prune = sessions_to_prune
+        self.statements = []
+    
+    async def fetch_one(self, query, values=None):
+        if "pg_partitioned_table" in query:
+            return {"partitioned": 1} if values["table"] in self.partitions else None
+        return None
+    
+    async def fetch_all(self, query, values=None):
+        if "pg_constraint" in query:
+            return [{"conname": values["table"].split("_p")[0] + "_session_id_fkey"}]
+        if "pg_inherits" in query:
+            return [{"name": name} for name in self.partitions[values["table"]]]
+        if "DELETE FROM user_sessions" in query:
+            batch = min(self.sessions_to_prune, values["batch_size"])
+            self.sessions_to_prune -= batch
+            self.statements.append("DELETE FROM user_sessions")
+            return [{"id": i} for i in range(batch)]
+        return []
+    
+    async def execute(self, query, values=None):
+        self.statements.append(" ".join(query.split()))
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    db = CatalogDatabase({
+        "category_feedback": [
+            "category_feedback_p202508",
+            "category_feedback_p202509",
+            "category_feedback_p202510",
+            "category_feedback_p202610",
+            "category_feedback_default",
+        ]
+    })
+    monkeypatch.setattr(partition_maintenance, "database", db)
+    return db
+
+
+@pytest.mark.unit
+class TestPartitionNames:
+    """Monthly partition naming"""
+    
+    def test_round_trip(self):
+        name = partition_name("user_interactions", date(2026, 3, 1))
+        
+        assert name == "user_interactions_p202603"
+        assert partition_month(name) == date(2026, 3, 1)
+    
+    def test_default_partition_has_no_month(self):
+        assert partition_month("user_interactions_default") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestPartitionMaintenance:
+    """Creating upcoming partitions and expiring old ones"""
+    
+    async def test_creates_missing_upcoming_months(self, catalog):
+        report = await PartitionMaintenance(retention_months=12, months_ahead=3).run_once(today=date(2026, 10, 19))
+        
+        assert report["created"] == [
+            "category_feedback_p202611",
+            "category_feedback_p202612",
+            "category_feedback_p202701",
+        ]
+        assert any(
+            "PARTITION OF category_feedback FOR VALUES FROM ('2027-01-01') TO ('2027-02-01')" in statement
+            for statement in catalog.statements
+        )
+    
+    async def test_drops_partitions_past_retention(self, catalog):
+        report = await PartitionMaintenance(retention_months=12, months_ahead=0).run_once(today=date(2026, 10, 19))
+        
+        assert report["retention_cutoff"] == "2025-10-01"
+        assert report["dropped"] == ["category_feedback_p202508", "category_feedback_p202509"]
+        assert "ALTER TABLE category_feedback DETACH PARTITION category_feedback_p202508" in catalog.statements
+        assert "DROP TABLE category_feedback_p202510" not in catalog.statements
+    
+    async def test_archives_instead_of_dropping(self, catalog):
+        report = await PartitionMaintenance(
+            retention_months=12, months_ahead=0, archive_schema="archive"
+        ).run_once(today=date(2026, 10, 19))
+        
+        assert report["dropped"] == []
+        assert report["archived"] == ["archive.category_feedback_p202508", "archive.category_feedback_p202509"]
+        assert "ALTER TABLE category_feedback_p202509 SET SCHEMA archive" in catalog.statements
+        assert 'ALTER TABLE category_feedback_p202509 DROP CONSTRAINT "category_feedback_session_id_fkey"' in catalog.statements
+    
+    async def test_unpartitioned_tables_are_skipped(self, catalog):
+        report = await PartitionMaintenance(months_ahead=1).run_once(today=date(2026, 10, 19))
+        
+        assert all(name.startswith("category_feedback") for name in report["created"])
+    
+    async def test_sessions_not_pruned_before_user_interactions_is_partitioned(self, catalog):
+        catalog.sessions_to_prune = 12
+        
+        report = await PartitionMaintenance().run_once(today=date(2026, 10, 19))
+        
+        assert report["sessions_pruned"] == 0
+        assert "DELETE FROM user_sessions" not in catalog.statements
+    
+    async def test_sessions_pruned_in_batches(self, catalog):
+        catalog.partitions["user_interactions"] = ["user_interactions_default"]
+        catalog.sessions_to_prune = 12
+        
+        report = await PartitionMaintenance(session_batch_size=5).run_once(today=date(2026, 10, 19))
+        
+        assert report["sessions_pruned"] == 12
+        assert catalog.statements.count("DELETE FROM user_sessions") == 3
@@ -0,0 +1,323 @@
+"""
+Query plan regression tests for the feedback path
+
+Builds the feedback schema (runtime SQL plus the Alembic feedback migrations)
+in a scratch schema on a local Postgres, loads synthetic data, then runs the
+real service and route methods through a database wrapper that EXPLAINs every
+query before executing it. Each checked query must reach the feedback tables
+through an index, never a sequential scan.
+
+Requires TEST_DATABASE_URL (a disposable local Postgres); skipped otherwise.
+"""
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+RUNTIME_SCHEMA = BACKEND_DIR / "app" / "db" / "migrations" / "001_create_feedback_tables.sql"
+FEEDBACK_MIGRATIONS = [
+    "create_category_feedback_daily.py",
+    "create_uuid7_defaults.py",
+    "create_feedback_covering_indexes.py",
+    "partition_event_tables.py",
+    "create_feedback_rollups.py",
+    "add_interaction_embeddings.py",
+    "create_category_cooccurrence.py",
+    "dedupe_learning_metrics.py",
+]
+FEEDBACK_TABLES = {"user_sessions", "user_interactions", "category_feedback", "category_feedback_daily"}
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+SCHEMA = f"plan_regression_{os.getpid()}"
+
+SYNTHETIC_DATA = [
+    """
+    INSERT INTO user_sessions (session_id, user_ip, created_at)
+    SELECT 'session-' || g, '127.0.0.1', NOW() - (g % 365) * INTERVAL '1 day'
+    FROM generate_series(1, 5000) g
+    """,
+    """
+    INSERT INTO user_interactions
+    (session_id, interaction_type, user_input, created_at, processing_time_ms)
+    SELECT
+        'session-' || (1 + g % 5000),
+        'category_matching',
+        'synthetic priority ' || (g % 997),
+        NOW() - (g % 365) * INTERVAL '1 day' - (g % 86400) * INTERVAL '1 second',
+        50 + g % 200
+    FROM generate_series(1, 50000) g
+    """,
+    """
+    INSERT INTO category_feedback
+    (interaction_id, category_id, category_name, feedback_type,
+     confidence_score, similarity_score, user_rating, feedback_reason, created_at)
+    SELECT
+        id,
+        category_id,
+        'Category ' || category_id,
+        (ARRAY['accept', 'reject', 'maybe', 'irrelevant'])[1 + (h >> 9) % 4],
+        ((h >> 3) % 10000) / 10000.0,
+        ((h >> 5) % 10000) / 10000.0,
+        CASE WHEN h % 3 = 0 THEN 1 + h % 5 END,
+        CASE WHEN h % 5 = 0 THEN 'reason ' || h % 10 END,
+        created_at
+    FROM (
+        SELECT ui.id, ui.created_at, 1 + abs(hashtext(ui.id::text || k)) % 500 AS category_id,
+               abs(hashtext(k || ui.id::text)) AS h
+        FROM user_interactions ui CROSS JOIN generate_series(1, 4) k
+    ) synthetic
+    """,
+]
+
+
+class _MigrationOps:
+    """Stand-in for alembic.op that runs each statement on the scratch schema."""
+    
+    def __init__(self):
+        self.statements = []
+    
+    def execute(self, sql):
+        self.statements.append(str(sql))
+    
+    def get_context(self):
+        return self
+    
+    def autocommit_block(self):
+        return contextlib.nullcontext()
+
+
+def _migration_statements(filename):
+    spec = importlib.util.spec_from_file_location(filename[:-3], BACKEND_DIR / "alembic" / "versions" / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    
+    ops = _MigrationOps()
+    module.op = ops
+    module.upgrade()
+    return ops.statements
+
+
+class ExplainingDatabase:
+    """Wraps a database: EXPLAINs each read query, then runs it for real."""
+    
+    def __init__(self, db, empty_relations=()):
+        self.db = db
+        self.plans = []
+        # Empty partitions (default, upcoming months) may be seq scanned for free
+        self.empty_relations = set(empty_relations)
+    
+    async def _explain(self, query, values):
+        row = await self.db.fetch_one(f"EXPLAIN (FORMAT JSON) {query}", values)
+        plan = row[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        self.plans.append((" ".join(query.split()), plan[0]["Plan"]))
+    
+    async def fetch_one(self, query, values=None):
+        await self._explain(query, values)
+        return await self.db.fetch_one(query, values)
+    
+    async def fetch_all(self, query, values=None):
+        await self._explain(query, values)
+        return await self.db.fetch_all(query, values)
+    
+    async def execute(self, query, values=None):
+        return await self.db.execute(query, values)
+
+
+def _scan_nodes(plan):
+    """Yield (node type, relation, index) for every node in a JSON plan."""
+    yield plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name")
+    for child in plan.get("Plans", []):
+        yield from _scan_nodes(child)
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    """Module-scoped loop so the synthetic dataset is built once."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+async def plan_db():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not configured")
+    
+    import databases
+    
+    # One connection so the scratch search_path sticks
+    db = databases.Database(url, min_size=1, max_size=1)
+    try:
+        await db.connect()
+    except Exception as e:
+        pytest.skip(f"Postgres not available: {e}")
+    
+    try:
+        await db.execute(f"CREATE SCHEMA {SCHEMA}")
+        # Scratch schema only, so migrations never see tables in public
+        await db.execute(f"SET search_path TO {SCHEMA}")
+        
+        statements = [stmt.strip() for stmt in RUNTIME_SCHEMA.read_text().split(';') if stmt.strip()]
+        statements += SYNTHETIC_DATA
+        for filename in FEEDBACK_MIGRATIONS:
+            statements += _migration_statements(filename)
+        
+        for statement in statements:
+            await db.execute(statement)
+        
+        # Fill the visibility map so covering indexes can be read index-only
+        await db.execute("VACUUM ANALYZE")
+        
+        yield db
+    finally:
+        await db.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await db.disconnect()
+
+
+@pytest.fixture
+async def explaining_db(plan_db, monkeypatch):
+    empty = await plan_db.fetch_all("SELECT relname FROM pg_class WHERE relkind = 'r' AND relpages = 0")
+    db = ExplainingDatabase(plan_db, [row["relname"] for row in empty])
+    monkeypatch.setattr("app.db.database.database", db)
+    monkeypatch.setattr("app.services.feedback_service.database", db)
+    monkeypatch.setattr("app.services.learning_service.database", db)
+    monkeypatch.setattr("app.services.metric_series.database", db)
+    return db
+
+
+def _is_feedback_relation(relation):
+    """Feedback tables and their monthly/default partitions."""
+    return relation is not None and any(
+        relation == table or relation.startswith(f"{table}_p") or relation == f"{table}_default"
+        for table in FEEDBACK_TABLES
+    )
+
+
+def assert_index_access(explaining_db):
+    """Every feedback-table access in every recorded plan goes through an index."""
+    assert explaining_db.plans, "no queries were recorded"
+    
+    for query, plan in explaining_db.plans:
+        nodes = list(_scan_nodes(plan))
+        seq_scans = [
+            relation for node, relation, _ in nodes
+            if node == "Seq Scan" and _is_feedback_relation(relation)
+            and relation not in explaining_db.empty_relations
+        ]
+        index_scans = [index for node, _, index in nodes if node in INDEX_NODES]
+        
+        assert not seq_scans, f"sequential scan on {seq_scans} for: {query}"
+        assert index_scans, f"no index used for: {query}"
+
+
+@pytest.mark.asyncio
+@pytest.mark.database
+@pytest.mark.integration
+class TestFeedbackQueryPlans:
+    """Feedback analytics queries stay on indexes"""
+    
+    async def test_interaction_lookup(self, explaining_db, plan_db):
+        from app.services.feedback_service import FeedbackCollector
+        
+        row = await plan_db.fetch_one("SELECT id FROM user_interactions LIMIT 1")
+        await FeedbackCollector()._get_interaction(str(row["id"]))
+        
+        assert_index_access(explaining_db)
+    
+    async def test_category_feedback_details(self, explaining_db):
+        from app.api.routes.feedback import get_category_feedback_details
+        
+        await get_category_feedback_details(category_id=7, days=30, token="test")
+        
+        assert len(explaining_db.plans) == 3
+        assert_index_access(explaining_db)
+    
+    async def test_category_metrics_are_index_only(self, explaining_db):
+        from app.api.routes.feedback import get_category_feedback_details
+        
+        await get_category_feedback_details(category_id=7, days=30, token="test")
+        
+        _, metrics_plan = next(
+            (query, plan) for query, plan in explaining_db.plans
+            if query.startswith("SELECT COUNT(*) as total_feedback")
+        )
+        assert "Index Only Scan" in [node for node, _, _ in _scan_nodes(metrics_plan)]
+    
+    async def test_learning_performance_summary(self, explaining_db):
+        from app.services.learning_service import CategoryLearningService
+        
+        await CategoryLearningService().get_category_performance_summary(category_id=7, days=30)
+        
+        assert_index_access(explaining_db)
+    
+    async def test_metric_aggregation(self, explaining_db):
+        from app.services.learning_service import CategoryLearningService
+        
+        await CategoryLearningService()._aggregate_feedback_stats([7, 8, 9], days=30)
+        
+        assert_index_access(explaining_db)
+    
+    async def test_rejection_patterns_use_partial_index(self, explaining_db, plan_db, monkeypatch):
+        from app.models.category_cooccurrence import CategoryCooccurrence, feedback_pair_counts
+        from app.services.learning_service import FeedbackAnalyzer
+        
+        # The parent index plus the per-partition indexes attached to it
+        children = await plan_db.fetch_all("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'idx_category_feedback_rejections'::regclass
+        """)
+        rejection_indexes = {"idx_category_feedback_rejections"} | {row["relname"] for row in children}
+        
+        # The reason sample is only read for categories the matrices rank
+        cooccurrence = CategoryCooccurrence()
+        cooccurrence.load([])
+        cooccurrence.record(feedback_pair_counts([{"category_id": 7, "feedback_type": "reject"}]))
+        monkeypatch.setattr("app.services.learning_service.get_category_cooccurrence", lambda: cooccurrence)
+        
+        await FeedbackAnalyzer().analyze_rejection_patterns(category_id=7, days=30)
+        
+        assert_index_access(explaining_db)
+        _, plan = explaining_db.plans[0]
+        assert rejection_indexes & {index for _, _, index in _scan_nodes(plan)}
+    
+    async def test_metric_upsert_keeps_one_row_per_day(self, explaining_db, plan_db):
+        from app.services.learning_service import CategoryLearningService
+        
+        service = CategoryLearningService()
+        await service._store_metric_rows([(9001, 'success_rate', 0.5, 4), (9001, 'avg_rating', 4.0, 2)])
+        await service._store_metric_rows([(9001, 'success_rate', 0.6, 5)])
+        
+        rows = await plan_db.fetch_all(
+            "SELECT metric_type, metric_value, sample_size FROM learning_metrics WHERE category_id = 9001 ORDER BY metric_type"
+        )
+        assert [(row['metric_type'], row['metric_value'], row['sample_size']) for row in rows] == [('avg_rating', 4.0, 2), ('success_rate', 0.6, 5)]
+    
+    async def test_metric_series(self, explaining_db):
+        from app.services.metric_series import MetricSeriesService
+        
+        await MetricSeriesService().feedback_series("success_rate", "week", days=30)
+        await MetricSeriesService().feedback_series("success_rate", "hour", days=2)
+        
+        assert_index_access(explaining_db)
+    
+    async def test_underperforming_categories(self, explaining_db):
+        from app.services.learning_service import CategoryLearningService
+        
+        await CategoryLearningService().identify_underperforming_categories(days=30)
+        
+        assert_index_access(explaining_db)
+    
+    async def test_health_counts(self, explaining_db):
+        from app.api.routes.feedback import feedback_system_health
+        
+        await feedback_system_health()
+        
+        assert_index_access(explaining_db)
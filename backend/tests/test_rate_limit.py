@@ -0,0 +1,151 @@
+"""
+Rate limiting tests
+
+Token bucket arithmetic with an explicit clock, then the ASGI middleware in
+front of a minimal Starlette app (no database or OpenAI access needed).
+"""
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.config import settings
+from app.middleware.rate_limit import (
+    InMemoryBuckets,
+    RateLimiter,
+    RateLimitMiddleware,
+    RouteClassLimit,
+)
+
+ROUTES = {
+    ("POST", "/expensive"): ("inference", 1),
+    ("POST", "/batch"): ("inference", 3),
+}
+
+
+@pytest.mark.unit
+class TestInMemoryBuckets:
+    """Token bucket refill, capacity and all-or-nothing takes"""
+    
+    def test_burst_then_refill(self):
+        buckets = InMemoryBuckets()
+        spec = [("client", 1.0, 3.0)]
+        
+        assert [buckets.take(spec, 1, now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert buckets.take(spec, 1, now=100.0) == pytest.approx(1.0)
+        assert buckets.take(spec, 1, now=100.5) == pytest.approx(0.5)
+        assert buckets.take(spec, 1, now=101.0) == 0.0
+        # Refill never exceeds capacity
+        assert [buckets.take(spec, 1, now=200.0) for _ in range(4)][-1] > 0
+    
+    def test_denied_take_consumes_from_no_bucket(self):
+        buckets = InMemoryBuckets()
+        burst, day = ("burst", 1.0, 5.0), ("day", 0.001, 2.0)
+        
+        assert buckets.take([burst, day], 2, now=0.0) == 0.0
+        # The daily bucket is empty; the burst bucket must keep its 3 tokens
+        assert buckets.take([burst, day], 2, now=0.0) == pytest.approx(2000.0)
+        assert buckets.take([burst], 3, now=0.0) == 0.0
+    
+    def test_refilled_buckets_are_swept(self):
+        buckets = InMemoryBuckets(sweep_interval=10.0)
+        buckets.take([("idle", 1.0, 5.0)], 1, now=buckets._next_sweep - 10.0)
+        buckets.take([("slow", 0.01, 5.0)], 1, now=buckets._next_sweep - 10.0)
+        
+        buckets.take([("active", 1.0, 5.0)], 1, now=buckets._next_sweep)
+        
+        assert sorted(buckets._buckets) == ["active", "slow"]
+
+
+def _client(limits, trusted_proxy_hops=0):
+    async def endpoint(request):
+        return JSONResponse({"ok": True})
+    
+    app = Starlette(routes=[
+        Route("/expensive", endpoint, methods=["POST"]),
+        Route("/batch", endpoint, methods=["POST"]),
+        Route("/cheap", endpoint, methods=["POST"]),
+    ])
+    limiter = RateLimiter(limits, route_costs=ROUTES, trusted_proxy_hops=trusted_proxy_hops)
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(app), limiter
+
+
+@pytest.mark.unit
+class TestRateLimitMiddleware:
+    """429 responses per client and route class"""
+    
+    def test_limits_listed_routes_only(self):
+        client, limiter = _client({"inference": RouteClassLimit(per_minute=1, burst=2)})
+        
+        statuses = [client.post("/expensive").status_code for _ in range(3)]
+        limited = client.post("/expensive")
+        
+        assert statuses == [200, 200, 429]
+        assert int(limited.headers["retry-after"]) >= 1
+        assert limited.json()["retry_after"] == int(limited.headers["retry-after"])
+        assert all(client.post("/cheap").status_code == 200 for _ in range(5))
+        assert limiter.get_stats()["limited"] == {"inference": 2}
+        assert limiter.get_stats()["admitted"] == 2
+    
+    def test_route_cost_and_class_share_buckets(self):
+        client, _ = _client({"inference": RouteClassLimit(per_minute=1, burst=4)})
+        
+        assert client.post("/batch").status_code == 200
+        assert client.post("/batch").status_code == 429
+        assert client.post("/expensive").status_code == 200
+        assert client.post("/expensive").status_code == 429
+    
+    def test_daily_quota_applies_after_burst_refills(self):
+        client, limiter = _client({"inference": RouteClassLimit(per_minute=6000, burst=10, per_day=3)})
+        
+        statuses = [client.post("/expensive").status_code for _ in range(4)]
+        limited = client.post("/expensive")
+        
+        assert statuses == [200, 200, 200, 429]
+        # The day bucket refills one token every 8 hours
+        assert int(limited.headers["retry-after"]) > 3600
+    
+    def test_forwarded_clients_get_separate_buckets(self):
+        client, limiter = _client({"inference": RouteClassLimit(per_minute=1, burst=1)}, trusted_proxy_hops=1)
+        
+        def post(forwarded_for):
+            return client.post("/expensive", headers={"X-Forwarded-For": forwarded_for}).status_code
+        
+        assert post("203.0.113.1") == 200
+        assert post("203.0.113.2") == 200
+        # A spoofed leading entry does not buy a fresh bucket
+        assert post("198.51.100.7, 203.0.113.1") == 429
+        assert limiter.client_key({"headers": [], "client": ("10.0.0.1", 5000)}) == "10.0.0.1"
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestBehindProxy:
+    """Every request's peer is the proxy; clients differ only in X-Forwarded-For"""
+    
+    PROXY = ("10.0.0.1", 5000)
+    
+    def _scope(self, forwarded_for):
+        return {"method": "POST", "path": "/expensive", "client": self.PROXY,
+                "headers": [(b"x-forwarded-for", forwarded_for.encode())]}
+    
+    async def test_default_hops_key_each_forwarded_client(self):
+        limiter = RateLimiter(
+            {"inference": RouteClassLimit(per_minute=1, burst=1)}, route_costs=ROUTES,
+            trusted_proxy_hops=settings.rate_limit_trusted_proxy_hops
+        )
+        
+        assert await limiter.check(self._scope("203.0.113.1")) is None
+        assert await limiter.check(self._scope("203.0.113.2")) is None
+        assert await limiter.check(self._scope("203.0.113.3")) is None
+        assert (await limiter.check(self._scope("203.0.113.1")))[0] == "inference"
+    
+    async def test_untrusted_proxy_is_not_used_as_a_shared_key(self):
+        limiter = RateLimiter({"inference": RouteClassLimit(per_minute=1, burst=1)}, route_costs=ROUTES)
+        
+        for n in range(5):
+            assert await limiter.check(self._scope(f"203.0.113.{n}")) is None
+        assert limiter.get_stats()["unkeyed"] == 5
+        assert len(limiter.local) == 0
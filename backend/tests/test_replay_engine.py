@@ -0,0 +1,165 @@
+"""
+Interaction replay tests
+
+Checks that batch scoring ranks exactly like find_matches, then replays
+stored interactions from an in-memory keyset-paging database with a fake
+encoder and checks the drift and acceptance figures of the report.
+"""
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.models.category_matcher import CategoryMatcher
+from app.models.text_encoder import EMBEDDING_MODEL
+from app.services.replay_engine import ReplayEngine, configured_matcher, overlap_at_k
+from app.utils.embeddings import pack_embedding
+
+AXES = ("climate", "health", "tax", "housing")
+
+CATEGORIES = [
+    {"id": 10, "name": "Climate", "type": "issue", "keywords": ["emissions", "carbon"], "success_count": 8, "total_usage_count": 10},
+    {"id": 11, "name": "Climate health", "type": "issue", "keywords": ["air quality"], "success_count": 0, "total_usage_count": 0},
+    {"id": 12, "name": "Health", "type": "policy", "keywords": ["hospital", "Clinic", "clinic"], "success_count": 1, "total_usage_count": 10},
+    {"id": 13, "name": "Tax", "type": "policy", "keywords": [], "success_count": 5, "total_usage_count": 10},
+    {"id": 14, "name": "Housing tax", "type": "issue", "keywords": ["rent"], "success_count": 3, "total_usage_count": 4},
+]
+
+
+def _embed(text):
+    vector = np.full(len(AXES), 0.1)
+    for axis, word in enumerate(AXES):
+        if word in text.lower():
+            vector[axis] = 1.0
+    return vector
+
+
+@pytest.fixture
+def fake_encoder(fake_text_encoder):
+    return fake_text_encoder(_embed, targets=(
+        "app.models.category_matcher.get_text_encoder",
+        "app.services.replay_engine.get_text_encoder",
+    ))
+
+
+@pytest.fixture
+def matcher(fake_encoder):
+    matcher = CategoryMatcher()
+    matcher.load_categories(CATEGORIES)
+    return matcher
+
+
+INPUTS = [
+    "climate emissions and carbon",
+    "health clinic near me",
+    "tax on housing rent",
+    "air quality climate health",
+    "nothing relevant",
+    "Hospital CLINIC health tax",
+]
+
+
+@pytest.mark.unit
+def test_overlap_at_k_is_measured_against_the_longer_list():
+    assert overlap_at_k([1, 2], [2, 1]) == 1.0
+    assert overlap_at_k([1, 2], [2, 3]) == 0.5
+    assert overlap_at_k([1, 2], [1]) == 0.5
+    assert overlap_at_k([], []) == 1.0
+
+
+@pytest.mark.unit
+class TestScoreBatch:
+    """Vectorized scoring agrees with the per-input path"""
+    
+    @pytest.mark.parametrize("category_types", [None, ["policy"]])
+    @pytest.mark.parametrize("threshold", [0.0, 0.45])
+    def test_matches_find_matches(self, matcher, category_types, threshold):
+        matcher.min_confidence_threshold = threshold
+        embeddings = np.array([_embed(text) for text in INPUTS])
+        
+        rows, confidences = matcher.score_batch(INPUTS, embeddings, category_types, top_k=3)
+        
+        for text, row, confidence in zip(INPUTS, rows, confidences):
+            expected = matcher.find_matches(text, category_types=category_types, top_k=3)
+            assert [matcher.categories[p]["id"] for p in row if p >= 0] == [m.category_id for m in expected]
+            assert confidence[:len(expected)] == pytest.approx([m.confidence_score for m in expected])
+    
+    def test_keyword_index_follows_catalog_reloads(self, matcher):
+        matcher.score_batch(["rent"], np.array([_embed("rent")]))
+        
+        matcher.load_categories(CATEGORIES[:2])
+        rows, _ = matcher.score_batch(["emissions"], np.array([_embed("emissions")]), top_k=2)
+        
+        assert matcher._keyword_index[2].shape == (3, 2)
+        assert list(rows[0]) == [0, 1]
+    
+    def test_configured_matcher_leaves_base_untouched(self, matcher):
+        candidate = configured_matcher(matcher, {"keyword_weight": 0.5})
+        candidate.success_rates[0] = 0.0
+        
+        assert matcher.keyword_weight == 0.2
+        assert candidate.keyword_weight == 0.5
+        assert matcher.success_rates[0] > 0.0
+        
+        with pytest.raises(ValueError):
+            configured_matcher(matcher, {"similarity_weigth": 0.5})
+
+
+def _interaction(i, text, served, accepted=None, rejected=None, stored=True):
+    return {
+        "id": i,
+        "created_at": datetime(2026, 10, 1) + timedelta(minutes=i),
+        "user_input": text,
+        "input_embedding": pack_embedding(_embed(text)) if stored else None,
+        "embedding_model": EMBEDDING_MODEL if stored else None,
+        "interaction_metadata": json.dumps({"match_details": [{"category_id": c} for c in served]}),
+        "accepted": accepted,
+        "rejected": rejected,
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestReplayEngine:
+    """Replay report over stored interactions"""
+    
+    async def test_report_compares_served_and_replayed(self, matcher, fake_encoder, paging_database):
+        db = paging_database([
+            # Replay ranks 10 first as served
+            _interaction(0, "climate emissions", [10, 11], accepted=[10]),
+            # Served only rejected categories; replay ranks the accepted 12 first
+            _interaction(1, "health clinic", [11, 13], accepted=[12], rejected=[11, 13], stored=False),
+            _interaction(2, "", [10]),
+            _interaction(3, "tax on rent housing", [13, 14], stored=False),
+        ], "app.services.replay_engine.database")
+        
+        report = await ReplayEngine(matcher, top_k=2, batch_size=2).run(days=30)
+        
+        # Two full pages, then an empty one
+        assert len(db.queries) == 3
+        assert report["interactions"] == 3
+        assert fake_encoder.batch_sizes[-2:] == [1, 1]
+        assert report["throughput"]["embeddings_reused"] == 1
+        assert report["throughput"]["embeddings_encoded"] == 2
+        assert report["throughput"]["batches"] == 2
+        
+        drift = report["ranking_drift"]
+        assert drift["compared"] == 3
+        assert drift["top1_changed_rate"] == pytest.approx(round(2 / 3, 4))
+        assert {"category_id": 12, "count": 1} in drift["most_entered"]
+        
+        acceptance = report["acceptance_proxy"]
+        assert acceptance["interactions_with_feedback"] == 2
+        assert acceptance["served_accepted_recall"] == 0.5
+        assert acceptance["replay_accepted_recall"] == 1.0
+        assert acceptance["served_rejected_rate"] == 0.5
+        assert acceptance["replay_rejected_rate"] == 0.25
+    
+    async def test_limit_stops_paging(self, matcher, paging_database):
+        db = paging_database([_interaction(i, "climate", [10]) for i in range(10)], "app.services.replay_engine.database")
+        
+        report = await ReplayEngine(matcher, batch_size=4).run(limit=6)
+        
+        assert report["interactions"] == 6
+        assert [values["batch_size"] for values in db.queries] == [4, 2]
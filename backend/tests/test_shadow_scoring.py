@@ -0,0 +1,132 @@
+"""
+Shadow scoring tests
+
+Shadows requests with candidate matchers built from a fake encoder and checks
+the comparison results, queue limits and CPU budget throttling.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.models.category_matcher import CategoryMatcher
+from app.services.replay_engine import configured_matcher
+from app.services.shadow_scoring import ShadowScorer
+
+AXES = ("climate", "health", "tax")
+
+
+def _embed(text):
+    vector = np.full(len(AXES), 0.1)
+    for axis, word in enumerate(AXES):
+        if word in text.lower():
+            vector[axis] = 1.0
+    return vector
+
+
+@pytest.fixture
+def matcher(fake_text_encoder):
+    fake_text_encoder(_embed)
+    matcher = CategoryMatcher()
+    matcher.load_categories([
+        {"id": 1, "name": "Climate", "keywords": [], "success_count": 0, "total_usage_count": 0},
+        {"id": 2, "name": "Climate health", "keywords": [], "success_count": 0, "total_usage_count": 0},
+        {"id": 3, "name": "Tax", "keywords": [], "success_count": 0, "total_usage_count": 0},
+    ])
+    return matcher
+
+
+def _serve(matcher, scorer, text, top_k=2):
+    embedding = matcher.encode_input(text)
+    served = [m.category_id for m in matcher.find_matches(text, top_k=top_k, user_embedding=embedding)]
+    return scorer.submit(text, embedding, served, 1.0, top_k=top_k)
+
+
+async def _drain(scorer):
+    for _ in range(100):
+        if not scorer._queue and scorer.batches_scored:
+            break
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+@pytest.mark.unit
+class TestShadowScorer:
+    """Candidate scoring off the request path"""
+    
+    async def test_identical_candidate_agrees_with_primary(self, matcher):
+        scorer = ShadowScorer(cpu_budget=0.5)
+        scorer.enable(configured_matcher(matcher), label="baseline")
+        
+        for text in ("climate", "health", "tax", "climate health"):
+            assert _serve(matcher, scorer, text)
+        await _drain(scorer)
+        stats = scorer.get_stats()
+        await scorer.stop()
+        
+        assert stats["compared"] == 4
+        assert stats["mean_overlap_at_k"] == 1.0
+        assert stats["top1_agreement_rate"] == 1.0
+        assert stats["mean_shadow_ms"] is not None
+        assert stats["cpu_seconds"] >= 0
+    
+    async def test_changed_catalog_shows_drift(self, matcher):
+        scorer = ShadowScorer(cpu_budget=0.5)
+        scorer.enable(configured_matcher(matcher, categories=matcher.categories[1:]), label="no climate")
+        
+        _serve(matcher, scorer, "climate")
+        await _drain(scorer)
+        await scorer.stop()
+        
+        # Served [1, 2]; the candidate has no category 1
+        assert scorer.top1_agreements == 0
+        assert scorer.overlap_sum == pytest.approx(0.5)
+    
+    async def test_disabled_full_and_sampled_out_requests_are_not_queued(self, matcher):
+        scorer = ShadowScorer(queue_size=1)
+        assert not _serve(matcher, scorer, "climate")
+        
+        scorer.enable(configured_matcher(matcher))
+        scorer.start()
+        # The loop only runs once the test yields, so the queue stays full here
+        assert _serve(matcher, scorer, "climate")
+        assert not _serve(matcher, scorer, "tax")
+        scorer.sample_rate = 0.0
+        assert not _serve(matcher, scorer, "health")
+        await scorer.stop()
+        
+        assert (scorer.submitted, scorer.dropped, scorer.sampled_out) == (3, 1, 1)
+    
+    async def test_mismatched_embeddings_are_skipped(self, matcher):
+        scorer = ShadowScorer(cpu_budget=0.5)
+        scorer.enable(configured_matcher(matcher))
+        
+        scorer.submit("climate", np.ones(8), [1], 1.0)
+        await _drain(scorer)
+        await scorer.stop()
+        
+        assert scorer.incompatible == 1
+        assert scorer.compared == 0
+    
+    async def test_pause_keeps_cpu_share_within_budget(self, matcher, monkeypatch):
+        scorer = ShadowScorer(cpu_budget=0.1)
+        scorer.enable(configured_matcher(matcher))
+        monkeypatch.setattr(scorer, "_score", lambda batch: 0.002)
+        pauses = []
+        real_sleep = asyncio.sleep
+        
+        async def record_sleep(seconds):
+            pauses.append(seconds)
+            await real_sleep(0)
+        
+        monkeypatch.setattr("app.services.shadow_scoring.asyncio.sleep", record_sleep)
+        
+        _serve(matcher, scorer, "climate")
+        for _ in range(20):
+            await real_sleep(0.01)
+            if pauses:
+                break
+        await scorer.stop()
+        
+        # 2ms of CPU buys 20ms of wall time at a 10% budget
+        assert pauses[0] == pytest.approx(0.018)